@@ -0,0 +1,145 @@
+# Random-play workloads for every Coup engine in the repo, one function per engine.
+# Each takes (num_games, num_players, seed), plays that many complete games and
+# returns the number of steps it took, or None if the engine does not expose its
+# steps. Engines whose imports are missing are listed in UNAVAILABLE instead.
+import random
+
+import numpy as np
+
+MAX_STEPS = 10000  # per game, for engines whose random play can stall
+
+ENGINES = {}
+UNAVAILABLE = {}
+
+
+def engine(name):
+    def register(fn):
+        ENGINES[name] = fn
+        return fn
+    return register
+
+
+@engine("game.main")
+def play_main(num_games, num_players, seed):
+    from game.main import main
+    rng = random.Random(seed)
+    for _ in range(num_games):
+        main(num_players, rng)
+    return None
+
+
+@engine("game.game_state")
+def play_game_state(num_games, num_players, seed):
+    from game.actions import Action
+    from game.cards import Card
+    from game.game_state import GameState
+
+    claims = {Action.TAX: Card.DUKE, Action.ASSASSINATE: Card.ASSASSIN, Action.STEAL: Card.CAPTAIN,
+              Action.EXCHANGE: Card.AMBASSADOR}
+    targeted = (Action.COUP, Action.ASSASSINATE, Action.STEAL)
+    rng = random.Random(seed)
+    steps = 0
+    for _ in range(num_games):
+        state = GameState(num_players, rng)
+        for _ in range(MAX_STEPS):
+            if state.is_game_over():
+                break
+            player = state.get_current_player()
+            action = rng.choice(state.get_legal_actions(player.id))
+            others = [p.id for p in state.get_alive_players() if p.id != player.id]
+            target = rng.choice(others) if action in targeted else None
+            claim = claims.get(action)
+            # perform_action does not re-check the target after a challenge or a
+            # challenged block, so the target never challenges and blocks are
+            # only tried on unchallenged actions
+            bystanders = [p for p in others if p != target]
+            challenger = blocker = None
+            if claim is not None and bystanders and rng.random() < 0.25:
+                challenger = rng.choice(bystanders)
+            elif action in Action.BLOCK_FOR and rng.random() < 0.25:
+                blocker = rng.choice(others) if target is None else target
+            state.perform_action(player.id, action, target, claim, blocker, challenger)
+            steps += 1
+    return steps
+
+
+@engine("game.batch_sim")
+def play_batch_sim(num_games, num_players, seed):
+    from game.batch_sim import BatchGame
+    game = BatchGame(num_games, num_players, np.random.default_rng(seed))
+    game.run()
+    return int(game.turns.sum())
+
+
+@engine("rl.coup_env")
+def play_rl_env(num_games, num_players, seed):
+    from rl import coup_env as rl_env
+    rl_env.NUM_PLAYERS = num_players
+    rng = np.random.default_rng(seed)
+    env = rl_env.CoupEnv()
+    steps = 0
+    for game in range(num_games):
+        env.reset(seed=seed + game)
+        for _ in range(MAX_STEPS):
+            steps += 1
+            if env.step(int(rng.integers(len(rl_env.Action))))[2]:
+                break
+    return steps
+
+
+try:
+    from rl import train_coup_rllib as rllib
+except ImportError as e:
+    UNAVAILABLE["rl.train_coup_rllib"] = str(e)
+else:
+    @engine("rl.train_coup_rllib")
+    def play_rllib_env(num_games, num_players, seed):
+        rllib.NUM_PLAYERS = num_players
+        random.seed(seed)
+        rng = np.random.default_rng(seed)
+        env = rllib.CoupMultiAgentEnv()
+        steps = 0
+        for _ in range(num_games):
+            env.reset()
+            for _ in range(MAX_STEPS):
+                steps += 1
+                action = int(rng.integers(len(rllib.Action)))
+                if env.step({str(env.current_player): action})[2]["__all__"]:
+                    break
+        return steps
+
+
+@engine("rl_new.coup_env")
+def play_rl_new_env(num_games, num_players, seed):
+    from rl_new.coup_env import CoupEnv, Action
+    rng = np.random.default_rng(seed)
+    env = CoupEnv(num_players)
+    steps = 0
+    for game in range(num_games):
+        env.reset(seed=seed + game)
+        for _ in range(MAX_STEPS):
+            if all(env.dones.values()):
+                break
+            env.step(int(rng.integers(len(Action))))
+            steps += 1
+    return steps
+
+
+@engine("rl_new.vec_env")
+def play_vec_env(num_games, num_players, seed):
+    from rl_new.vec_env import CoupVecEnv, NUM_ACTIONS
+    num_envs = min(num_games, 4096)
+    env = CoupVecEnv(num_envs, num_players, player_id=None, seed=seed)
+    env.reset()
+    rng = np.random.default_rng(seed)
+    active = np.ones(num_envs, dtype=bool)
+    started, steps = num_envs, 0
+    while active.any():
+        g = np.nonzero(active)[0]
+        finished = env.advance(g, rng.integers(0, NUM_ACTIONS, len(g)))
+        steps += len(g)
+        restart = finished[:max(0, num_games - started)]
+        started += len(restart)
+        active[finished[len(restart):]] = False
+        env.reset_games(restart)
+    return steps
@@ -0,0 +1,166 @@
+# Throughput benchmarks for the Coup engines in bench/engines.py.
+#
+#   python -m bench.run                      measure and print
+#   python -m bench.run --save               ... and store as the baseline
+#   python -m bench.run --compare            ... and fail on regressions against it
+#
+# Every engine plays random games at each player count. The game count doubles
+# until one run takes at least --min-time seconds; that size is then timed
+# --repeat times and the fastest run gives games/sec and steps/sec. A separate
+# short run under tracemalloc gives the peak traced memory and the memory
+# blocks still allocated after it per game (CPython keeps no cumulative
+# allocation count, so this catches growth and leaks, not churn).
+#
+# Absolute speeds depend on the machine, so the baseline stores every speed
+# relative to reference(), a fixed pure-Python loop timed the same way in the
+# same run, and --compare checks those ratios. They cancel out CPU and
+# interpreter speed, not every difference between machines (numpy builds,
+# core counts), which --tolerance has to absorb.
+#
+# Changes to an engine refresh the baseline with --save in the same commit.
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from bench.engines import ENGINES, UNAVAILABLE
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PLAYER_COUNTS = (2, 3, 4, 5, 6)
+MEMORY_GAMES = 100
+BASELINE_COLUMNS = ("games_per_ref", "steps_per_ref", "blocks_per_game", "peak_kib")
+
+
+def reference(num_games, num_players, seed):
+    """Machine-speed yardstick: 1000 rounds of a toy coin game per game, never to be optimized."""
+    rng = random.Random(seed)
+    gains = (1, 2, -7, 3, -3, 2, 0)
+    coins = [2] * num_players
+    for i in range(num_games * 1000):
+        p = i % num_players
+        coins[p] += gains[rng.randrange(7)]
+        if coins[p] < 0:
+            coins[p] = 2
+    return None
+
+
+def timed(play, num_games, num_players, seed):
+    start = time.perf_counter()
+    steps = play(num_games, num_players, seed)
+    return time.perf_counter() - start, steps
+
+
+def fastest(play, num_players, min_time=1.0, repeat=3, seed=0):
+    """(num_games, elapsed, steps) of the fastest of repeat runs lasting at least min_time."""
+    play(1, num_players, seed)  # imports and first-call setup stay out of the timing
+    num_games = 1
+    while True:
+        elapsed, steps = timed(play, num_games, num_players, seed)
+        if elapsed >= min_time:
+            break
+        num_games *= 2 if elapsed == 0 else min(16, max(2, int(min_time / elapsed * 1.2) + 1))
+    for _ in range(repeat - 1):
+        elapsed = min(elapsed, timed(play, num_games, num_players, seed)[0])
+    return num_games, elapsed, steps
+
+
+def reference_speed(min_time=1.0, repeat=3):
+    """Games/sec of reference() on this machine."""
+    num_games, elapsed, _ = fastest(reference, 4, min_time, repeat)
+    return num_games / elapsed
+
+
+def measure(play, num_players, min_time=1.0, repeat=3, seed=0, speed=1.0):
+    """One benchmark row; the *_per_ref speeds are the games/sec and steps/sec divided by speed."""
+    num_games, elapsed, steps = fastest(play, num_players, min_time, repeat, seed)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    play(MEMORY_GAMES, num_players, seed)
+    peak = tracemalloc.get_traced_memory()[1]
+    grown = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+
+    games_per_sec = num_games / elapsed
+    steps_per_sec = None if steps is None else steps / elapsed
+    return {
+        "games": num_games,
+        "games_per_sec": games_per_sec,
+        "steps_per_sec": steps_per_sec,
+        "games_per_ref": games_per_sec / speed,
+        "steps_per_ref": None if steps is None else steps_per_sec / speed,
+        "blocks_per_game": sum(stat.count_diff for stat in grown) / MEMORY_GAMES,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(engines, player_counts, min_time, repeat, speed):
+    results = {}
+    for name in engines:
+        for num_players in player_counts:
+            key = f"{name}/{num_players}p"
+            results[key] = measure(ENGINES[name], num_players, min_time, repeat, speed=speed)
+            print(format_row(key, results[key]), flush=True)
+    return results
+
+
+def format_row(key, row, baseline=None):
+    steps = "n/a" if row["steps_per_sec"] is None else f"{row['steps_per_sec']:12.0f}"
+    line = (f"{key:26s} {row['games_per_sec']:12.1f} {steps:>12s} {row['games_per_ref']:10.4f} "
+            f"{row['blocks_per_game']:10.2f} {row['peak_kib']:10.1f}")
+    if baseline is not None:
+        line += f"  {row['games_per_ref'] / baseline['games_per_ref'] - 1:+7.1%}"
+    return line
+
+
+def saved(results):
+    """The machine-independent columns of results, as stored in the baseline."""
+    return {key: {column: row[column] for column in BASELINE_COLUMNS} for key, row in results.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Rows whose games/sec relative to reference() fell more than tolerance below the baseline."""
+    regressions = []
+    for key, row in results.items():
+        if key not in baseline:
+            continue
+        print(format_row(key, row, baseline[key]))
+        if row["games_per_ref"] < baseline[key]["games_per_ref"] * (1 - tolerance):
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark games/sec and steps/sec of every Coup engine")
+    parser.add_argument("--engines", nargs="*", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--players", type=int, nargs="*", default=list(PLAYER_COUNTS))
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per row, the fastest is kept")
+    parser.add_argument("--save", action="store_true", help=f"store the results as the baseline ({BASELINE})")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline, exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed drop in games/sec relative to the reference for --compare")
+    args = parser.parse_args()
+
+    for name, reason in UNAVAILABLE.items():
+        print(f"skipping {name}: {reason}")
+    speed = reference_speed(args.min_time, args.repeat)
+    print(f"reference: {speed:.1f} games/s")
+    print(f"{'engine':26s} {'games/s':>12s} {'steps/s':>12s} {'games/ref':>10s} {'blocks/game':>10s} {'peak KiB':>10s}")
+    results = run(args.engines, args.players, args.min_time, args.repeat, speed)
+
+    if args.compare:
+        with open(BASELINE) as f:
+            stored = json.load(f)
+        print(f"\nagainst baseline from {stored['machine']}:")
+        regressions = compare(results, stored["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    if args.save:
+        with open(BASELINE, "w") as f:
+            machine = f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus, Python {platform.python_version()}"
+            json.dump({"machine": machine, "results": saved(results)}, f, indent=1, sort_keys=True)
@@ -0,0 +1,110 @@
+import random
+
+import numpy as np
+
+from game.engine import EMPTY, NUM_CARD_TYPES, NUM_DECISIONS, ACTION_SELECTION, PHASE_NAMES, coin_bucket
+
+# Abstract information sets for CFR (see cfr_solver.py) and the lookup-table bot
+# that plays the solved strategy. The information set of the seat to act is:
+#   own hand (one of 20 multisets of 1-2 cards) and own coin bucket,
+#   each opponent's influence count and coin bucket, in seat order after us,
+#   phase and pending action, the actor's seat relative to us and whether we
+#   are the target (the last three only outside action selection).
+# Phase and pending action use the engine codes, which rl_new CoupEnv and
+# CoupVecEnv share.
+
+NUM_BUCKETS = 3
+
+HANDS = [(a,) for a in range(NUM_CARD_TYPES)] + [
+    (a, b) for a in range(NUM_CARD_TYPES) for b in range(a, NUM_CARD_TYPES)
+]
+# HAND_INDEX[slot 0 + 1, slot 1 + 1] with EMPTY slots at 0; the hand of a dead seat maps to 0
+HAND_INDEX = np.zeros((NUM_CARD_TYPES + 1, NUM_CARD_TYPES + 1), dtype=np.int64)
+for _i, _hand in enumerate(HANDS):
+    _a, _b = _hand if len(_hand) == 2 else (_hand[0], EMPTY)
+    HAND_INDEX[_a + 1, _b + 1] = HAND_INDEX[_b + 1, _a + 1] = _i
+_HAND_INDEX = HAND_INDEX.tolist()
+
+
+class Abstraction:
+    """Dense information-set indices for the seat to act in a num_players game."""
+
+    def __init__(self, num_players):
+        self.num_players = num_players
+        self.turn_size = len(PHASE_NAMES) * NUM_DECISIONS * num_players * 2
+        self.num_infosets = len(HANDS) * NUM_BUCKETS * (3 * NUM_BUCKETS) ** (num_players - 1) * self.turn_size
+
+    def index(self, engine):
+        """Information set of engine.to_act in a game/engine.py Engine."""
+        p = self.num_players
+        seat = engine.to_act
+        hands, coins = engine.hands, engine.coins
+        key = _HAND_INDEX[hands[2 * seat] + 1][hands[2 * seat + 1] + 1] * NUM_BUCKETS + coin_bucket(coins[seat])
+        for k in range(1, p):
+            other = (seat + k) % p
+            influence = (hands[2 * other] != EMPTY) + (hands[2 * other + 1] != EMPTY)
+            key = key * 3 * NUM_BUCKETS + influence * NUM_BUCKETS + coin_bucket(coins[other])
+        key *= self.turn_size
+        if engine.phase != ACTION_SELECTION:
+            key += (((engine.phase * NUM_DECISIONS + engine.pending_action) * p + (engine.actor - seat) % p) * 2
+                    + (engine.pending_target == seat))
+        return key
+
+    def index_batch(self, env, g):
+        """index() for the seat to act in games g of an rl_new CoupVecEnv."""
+        p = self.num_players
+        seat = env.to_act[g]
+        hands, coins = env.hands[g], env.coins[g]
+        buckets = (coins >= 3).astype(np.int64) + (coins >= 7)
+        rows = np.arange(len(g))
+        key = HAND_INDEX[hands[rows, seat, 0] + 1, hands[rows, seat, 1] + 1] * NUM_BUCKETS + buckets[rows, seat]
+        for k in range(1, p):
+            other = (seat + k) % p
+            influence = (hands[rows, other] != EMPTY).sum(axis=1)
+            key = key * 3 * NUM_BUCKETS + influence * NUM_BUCKETS + buckets[rows, other]
+        phase = env.phase[g]
+        turn = (((phase * NUM_DECISIONS + env.pending_action[g]) * p + (env.actor[g] - seat) % p) * 2
+                + (env.pending_target[g] == seat))
+        return key * self.turn_size + np.where(phase == ACTION_SELECTION, 0, turn)
+
+
+class CFRBot:
+    """Lookup-table bot playing an average strategy exported by cfr_solver.py.
+
+    choose_action(observation, legal_actions) takes the Engine whose to_act seat
+    decides, like ISMCTSBot; act_batch() plays the to_act seats of a CoupVecEnv.
+    Information sets the solver never reached are played uniformly over the
+    legal actions.
+    """
+
+    def __init__(self, strategy, num_players, deterministic=False, seed=None):
+        self.strategy = strategy
+        self.abstraction = Abstraction(num_players)
+        self.deterministic = deterministic
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def load(cls, path, deterministic=False, seed=None):
+        with np.load(path) as data:
+            return cls(data["strategy"], int(data["num_players"]), deterministic, seed)
+
+    def choose_action(self, observation, legal_actions):
+        row = self.strategy[self.abstraction.index(observation)]
+        weights = [float(row[a]) for a in legal_actions]
+        if sum(weights) <= 0:
+            return self.rng.choice(legal_actions)
+        if self.deterministic:
+            return legal_actions[weights.index(max(weights))]
+        return self.rng.choices(legal_actions, weights)[0]
+
+    def act_batch(self, env, g, rng):
+        """Actions of the seat to act in games g of env, drawn with the numpy Generator rng."""
+        masks = env.action_masks()[g]
+        probs = self.strategy[self.abstraction.index_batch(env, g)] * masks
+        unseen = probs.sum(axis=1) <= 0
+        probs[unseen] = masks[unseen]
+        if self.deterministic:
+            return probs.argmax(axis=1)
+        cdf = probs.cumsum(axis=1)
+        pick = rng.random(len(g)) * cdf[:, -1]
+        return np.minimum((cdf <= pick[:, None]).sum(axis=1), NUM_DECISIONS - 1)
@@ -0,0 +1,206 @@
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import RawArray
+
+import numpy as np
+
+from bots.cfr_bot import Abstraction, CFRBot
+from game.engine import NUM_DECISIONS, Engine
+
+# Outcome-sampling Monte Carlo CFR on the rules engine (game/engine.py) over the
+# information sets of cfr_bot.Abstraction. Every iteration plays one sampled
+# game: the seat being updated (the traverser, which rotates) explores with an
+# epsilon-uniform mix of its regret-matching strategy, everyone else follows
+# theirs and the engine rng samples the deal, draws and lost cards. Regrets of
+# the traverser's sampled information sets are updated with importance-weighted
+# counterfactual values. A single trajectory per iteration keeps the cost linear
+# in game length, where external sampling would branch at every traverser decision.
+#
+# Regret and average-strategy sums are dense (num_infosets, NUM_DECISIONS)
+# float32 tables in shared memory. Workers read them during a round, keep the
+# rows they touch in a local copy and return the changed rows, which are added
+# into the tables between rounds.
+
+_tables = None  # (regrets, strategy_sums) in a worker
+
+
+def _table(raw, num_infosets):
+    return np.frombuffer(raw, dtype=np.float32).reshape(num_infosets, NUM_DECISIONS)
+
+
+def _init_worker(num_infosets, regrets, strategy_sums):
+    global _tables
+    _tables = (_table(regrets, num_infosets), _table(strategy_sums, num_infosets))
+
+
+class _Sampler:
+    """Runs MCCFR iterations against read-only tables, tracking the rows it changes."""
+
+    def __init__(self, num_players, regrets, strategy_sums, epsilon, max_depth, seed):
+        self.abstraction = Abstraction(num_players)
+        self.base_regrets = regrets
+        self.base_strategy_sums = strategy_sums
+        self.epsilon = epsilon
+        self.max_depth = max_depth
+        self.rng = random.Random(seed)
+        self.engine = Engine(num_players, self.rng)
+        self.regrets = {}
+        self.strategy_sums = {}
+
+    def run(self, iterations, first_traverser=0):
+        p = self.engine.num_players
+        for i in range(iterations):
+            self.engine.reset()
+            self._episode((first_traverser + i) % p, 1.0, 1.0, 1.0, 0)
+        return self.deltas()
+
+    def deltas(self):
+        """(rows, regret deltas, strategy-sum deltas) of every row touched so far."""
+        rows = np.array(sorted(self.regrets), dtype=np.int64)
+        regrets = np.array([self.regrets[r] for r in rows], dtype=np.float32).reshape(-1, NUM_DECISIONS)
+        strategy_sums = np.array([self.strategy_sums[r] for r in rows], dtype=np.float32).reshape(-1, NUM_DECISIONS)
+        if len(rows):
+            regrets -= self.base_regrets[rows]
+            strategy_sums -= self.base_strategy_sums[rows]
+        return rows, regrets, strategy_sums
+
+    def _rows(self, key):
+        regrets = self.regrets.get(key)
+        if regrets is None:
+            regrets = self.regrets[key] = self.base_regrets[key].tolist()
+            self.strategy_sums[key] = self.base_strategy_sums[key].tolist()
+        return regrets, self.strategy_sums[key]
+
+    def _episode(self, traverser, my_reach, opp_reach, sample_reach, depth):
+        engine = self.engine
+        if engine.is_over():
+            p = engine.num_players
+            return 1.0 if engine.winner == traverser else -1.0 / (p - 1)
+        if depth == self.max_depth:
+            return 0.0  # a cut-off game counts as a draw
+
+        seat = engine.to_act
+        legal = engine.legal_actions()
+        regrets, strategy_sums = self._rows(self.abstraction.index(engine))
+        positive = [max(regrets[a], 0.0) for a in legal]
+        total = sum(positive)
+        n = len(legal)
+        policy = [r / total for r in positive] if total > 0 else [1.0 / n] * n
+        if seat == traverser:
+            sample_policy = [self.epsilon / n + (1 - self.epsilon) * q for q in policy]
+        else:
+            sample_policy = policy
+
+        i = self.rng.choices(range(n), sample_policy)[0]
+        engine.step(legal[i])
+        if seat == traverser:
+            child = self._episode(traverser, my_reach * policy[i], opp_reach, sample_reach * sample_policy[i], depth + 1)
+        else:
+            child = self._episode(traverser, my_reach, opp_reach * policy[i], sample_reach * sample_policy[i], depth + 1)
+
+        # Importance-weighted values: the sampled action stands in for all of them
+        sampled_value = child / sample_policy[i]
+        value = policy[i] * sampled_value
+        if seat == traverser:
+            weight = opp_reach / sample_reach
+            for j, a in enumerate(legal):
+                regrets[a] += ((sampled_value if j == i else 0.0) - value) * weight
+                strategy_sums[a] += my_reach * policy[j] / sample_reach
+        return value
+
+
+def _sample(num_players, epsilon, max_depth, iterations, first_traverser, seed):
+    regrets, strategy_sums = _tables
+    return _Sampler(num_players, regrets, strategy_sums, epsilon, max_depth, seed).run(iterations, first_traverser)
+
+
+class MCCFRSolver:
+    """Outcome-sampling MCCFR for num_players (2 or 3) over cfr_bot.Abstraction.
+
+    epsilon is the traverser's exploration rate and max_depth the number of
+    decisions after which a game is cut off as a draw. solve() can be called
+    repeatedly to continue training.
+    """
+
+    def __init__(self, num_players, epsilon=0.6, max_depth=200, seed=None):
+        self.num_players = num_players
+        self.abstraction = Abstraction(num_players)
+        self.epsilon = epsilon
+        self.max_depth = max_depth
+        self.rng = random.Random(seed)
+        self.iterations = 0
+        n = self.abstraction.num_infosets
+        self._raw = (RawArray("f", n * NUM_DECISIONS), RawArray("f", n * NUM_DECISIONS))
+        self.regrets, self.strategy_sums = (_table(raw, n) for raw in self._raw)
+
+    def solve(self, iterations, workers=1, rounds=10):
+        """Run iterations split over rounds; each round runs one share per worker in parallel."""
+        args = (self.num_players, self.epsilon, self.max_depth)
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(self.abstraction.num_infosets, *self._raw))
+        try:
+            for r in range(rounds):
+                share = iterations * (r + 1) // rounds - iterations * r // rounds
+                sizes = [share // workers + (1 if w < share % workers else 0) for w in range(workers)]
+                jobs = [args + (size, self.iterations + sum(sizes[:w]), self.rng.getrandbits(64))
+                        for w, size in enumerate(sizes) if size > 0]
+                if pool is None:
+                    results = [_Sampler(self.num_players, self.regrets, self.strategy_sums, self.epsilon,
+                                        self.max_depth, job[-1]).run(job[3], job[4]) for job in jobs]
+                else:
+                    results = list(pool.map(_sample, *zip(*jobs)))
+                for rows, regrets, strategy_sums in results:
+                    self.regrets[rows] += regrets
+                    self.strategy_sums[rows] += strategy_sums
+                self.iterations += share
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def average_strategy(self):
+        """Normalised average strategy; information sets never reached are all zero."""
+        totals = self.strategy_sums.sum(axis=1, keepdims=True)
+        return np.divide(self.strategy_sums, totals, out=np.zeros_like(self.strategy_sums), where=totals > 0)
+
+    def export(self, path):
+        """Save the average strategy as a CFRBot lookup table (.npz)."""
+        np.savez_compressed(path, strategy=self.average_strategy(), num_players=self.num_players)
+
+    def bot(self, deterministic=False, seed=None):
+        return CFRBot(self.average_strategy(), self.num_players, deterministic, seed)
+
+
+if __name__ == "__main__":
+    from bots.ismcts_bot import play_match
+    from bots.random_bot import RandomBot
+
+    parser = argparse.ArgumentParser(description="Solve abstracted Coup with MCCFR and export a CFRBot table")
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3))
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--epsilon", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="table path (default cfr_<players>p.npz)")
+    parser.add_argument("--eval-games", type=int, default=1000, help="games against random bots afterwards")
+    args = parser.parse_args()
+
+    solver = MCCFRSolver(args.players, args.epsilon, seed=args.seed)
+    start = time.perf_counter()
+    solver.solve(args.iterations, args.workers, args.rounds)
+    elapsed = time.perf_counter() - start
+    reached = int((solver.strategy_sums.sum(axis=1) > 0).sum())
+    print(f"{args.iterations} iterations in {elapsed:.1f}s, {reached} of {solver.abstraction.num_infosets} "
+          f"information sets reached")
+    out = args.out or f"cfr_{args.players}p.npz"
+    solver.export(out)
+    print(f"saved {out}")
+
+    if args.eval_games:
+        bot = CFRBot.load(out, seed=args.seed)
+        wins = play_match([bot] + [RandomBot() for _ in range(args.players - 1)], args.eval_games, args.seed)
+        print(f"wins per seat: {wins} (CFR in seat 0: {wins[0] / args.eval_games:.1%})")
@@ -0,0 +1,183 @@
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game.engine import EMPTY, Engine
+
+# Single-observer information-set MCTS on the rules engine (game/engine.py).
+# Every iteration deals the cards the searching seat cannot see (opponents'
+# hands and the court deck) at random from their known composition, then walks
+# one shared tree keyed by (seat to act, phase, decision): turn actions,
+# challenges and blocks are all tree moves, so the search covers the response
+# phases too. Losing a card and deck draws are left to the engine's rng as
+# chance events.
+
+
+class Node:
+    __slots__ = ("seat", "children", "visits", "wins")
+
+    def __init__(self, seat):
+        self.seat = seat  # who made the decision leading here
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+
+
+def determinize(engine, seat, rng):
+    """Copy of engine with every card seat cannot see redealt from the same pool."""
+    state = engine.clone(rng)
+    hidden = [i for i, card in enumerate(state.hands) if card != EMPTY and i // 2 != seat]
+    for i in hidden:
+        state.deck.put(state.hands[i])
+    for i in hidden:
+        state.hands[i] = state.deck.draw()
+    return state
+
+
+def search(num_players, snapshot, iterations=1000, time_limit=None, exploration=0.7, rollout_limit=200, seed=None):
+    """Run ISMCTS from a snapshot for the seat to act; returns {action: root visits}.
+
+    Stops after iterations (None = no limit) or time_limit seconds, whichever comes first.
+    """
+    rng = random.Random(seed)
+    engine = Engine(num_players, rng)
+    engine.restore(snapshot)
+    seat = engine.to_act
+    root = Node(None)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    done = 0
+    while (iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline):
+        done += 1
+        state = determinize(engine, seat, rng)
+        node, path = root, [root]
+
+        # Selection and expansion. Challenges are decided by the redealt cards and
+        # the engine rng picks the card a seat loses, so the same moves can lead
+        # to a different seat, phase or legal set in another determinization.
+        # Children are keyed by (seat to act, phase, decision) and only the ones
+        # legal in this determinization compete, so a node's statistics always
+        # belong to the seat that made its decision.
+        while not state.is_over():
+            mover, phase = state.to_act, state.phase
+            moves = [(mover, phase, a) for a in state.legal_actions()]
+            untried = [m for m in moves if m not in node.children]
+            if untried:
+                move = rng.choice(untried)
+                node.children[move] = child = Node(mover)
+                state.step(move[2])
+                path.append(child)
+                break
+            log_visits = math.log(node.visits)
+            move, node = max(
+                ((m, node.children[m]) for m in moves),
+                key=lambda item: item[1].wins / item[1].visits
+                + exploration * math.sqrt(log_visits / item[1].visits),
+            )
+            state.step(move[2])
+            path.append(node)
+
+        # Random playout
+        for _ in range(rollout_limit):
+            if state.is_over():
+                break
+            state.step(rng.choice(state.legal_actions()))
+        winner = state.winner
+        # A cut-off playout is shared between the seats still in
+        share = 1.0 if winner is not None else 1.0 / bin(state.alive).count("1")
+
+        for n in path:
+            n.visits += 1
+            if winner == n.seat or (winner is None and n.seat is not None and state.is_alive(n.seat)):
+                n.wins += share
+    # The root's seat and phase are the real ones, so its moves differ only in the decision
+    return {action: child.visits for (_, _, action), child in root.children.items()}
+
+
+class ISMCTSBot:
+    """ISMCTS opponent for the rules engine.
+
+    choose_action(observation, legal_actions) takes the game/engine.py Engine
+    whose to_act seat is deciding, and legal_actions from engine.legal_actions().
+    The bot only reads its own hand and public information: every hidden card
+    is redealt before each iteration. Each worker searches for iterations
+    (None = unlimited) or time_limit seconds per decision, whichever ends first. With
+    workers > 1 independent searches run in a process pool (root parallelization)
+    and their root visit counts are summed.
+    """
+
+    def __init__(self, iterations=1000, time_limit=None, workers=1, exploration=0.7, rollout_limit=200, seed=None):
+        if iterations is None and time_limit is None:
+            raise ValueError("ISMCTSBot needs an iteration or a time budget")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.rng = random.Random(seed)
+        self._pool = None
+
+    def choose_action(self, observation, legal_actions):
+        if len(legal_actions) == 1:
+            return legal_actions[0]
+        visits = self.root_visits(observation, legal_actions)
+        return max(visits, key=visits.get)
+
+    def root_visits(self, observation, legal_actions):
+        """Root visits per legal action, summed over the workers' searches."""
+        args = (observation.num_players, observation.snapshot(), self.iterations, self.time_limit,
+                self.exploration, self.rollout_limit)
+        seeds = [self.rng.getrandbits(64) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [search(*args, seeds[0])]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._pool.map(search, *zip(*[args + (seed,) for seed in seeds])))
+
+        visits = dict.fromkeys(legal_actions, 0)
+        for result in results:
+            for action, count in result.items():
+                if action in visits:
+                    visits[action] += count
+        return visits
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def play_match(bots, num_games, seed=0):
+    """Wins per seat of bots[s] playing seat s of the engine."""
+    rng = random.Random(seed)
+    engine = Engine(len(bots), rng)
+    wins = [0] * len(bots)
+    for _ in range(num_games):
+        engine.reset()
+        while not engine.is_over():
+            engine.step(bots[engine.to_act].choose_action(engine, engine.legal_actions()))
+        wins[engine.winner] += 1
+    return wins
+
+
+if __name__ == "__main__":
+    from bots.random_bot import RandomBot
+
+    parser = argparse.ArgumentParser(description="ISMCTS bot in seat 0 against random bots")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="iterations per decision and worker (default 500, unlimited with --time-limit)")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per decision")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    iterations = args.iterations if args.iterations is not None or args.time_limit else 500
+    bot = ISMCTSBot(iterations, args.time_limit, args.workers, seed=args.seed)
+    wins = play_match([bot] + [RandomBot() for _ in range(args.players - 1)], args.games, args.seed)
+    bot.close()
+    print(f"wins per seat: {wins} (ISMCTS in seat 0: {wins[0] / args.games:.1%})")
@@ -0,0 +1,116 @@
+import random
+import unittest
+
+import numpy as np
+
+from bots.cfr_bot import Abstraction, CFRBot
+from bots.cfr_solver import MCCFRSolver, _Sampler
+from game.actions import Action
+from game.engine import NUM_DECISIONS, Engine
+from rl_new import test_vec_env
+from rl_new.vec_env import CoupVecEnv
+
+
+def random_legal(env, g, rng):
+    """A uniformly random legal decision for the seat to act in each game of g."""
+    probs = env.action_masks()[g] * rng.random((len(g), NUM_DECISIONS))
+    return probs.argmax(axis=1)
+
+
+class AbstractionTest(unittest.TestCase):
+    def test_index_batch_matches_index(self):
+        for num_players in (2, 3):
+            abstraction = Abstraction(num_players)
+            env = CoupVecEnv(16, num_players, player_id=None, seed=num_players)
+            env.reset()
+            engine = Engine(num_players, random.Random(0))
+            rng = np.random.default_rng(num_players)
+            seen = set()
+            for _ in range(150):
+                keys = abstraction.index_batch(env, env._all)
+                for i in range(env.num_envs):
+                    engine.restore(test_vec_env.snapshot(env, i))
+                    self.assertEqual(keys[i], abstraction.index(engine))
+                seen.update(keys.tolist())
+                self.assertTrue(((keys >= 0) & (keys < abstraction.num_infosets)).all())
+                env.reset_games(env.advance(env._all, random_legal(env, env._all, rng)))
+            # Both action selection and the challenge/block phases were compared
+            self.assertGreater(len({key % abstraction.turn_size for key in seen}), 1)
+
+
+class MCCFRSolverTest(unittest.TestCase):
+    def test_workers_merge_their_rows(self):
+        solver = MCCFRSolver(2, seed=3, max_depth=60)
+        solver.solve(30, workers=2, rounds=1)
+        self.assertEqual(solver.iterations, 30)
+
+        # One round, two shares of 15 iterations, both sampled from the empty tables
+        rng = random.Random(3)
+        n = solver.abstraction.num_infosets
+        regrets = np.zeros((n, NUM_DECISIONS), dtype=np.float32)
+        strategy_sums = np.zeros_like(regrets)
+        expected_regrets, expected_sums = regrets.copy(), strategy_sums.copy()
+        for first_traverser in (0, 15):
+            sampler = _Sampler(2, regrets, strategy_sums, solver.epsilon, solver.max_depth, rng.getrandbits(64))
+            rows, regret_deltas, sum_deltas = sampler.run(15, first_traverser)
+            expected_regrets[rows] += regret_deltas
+            expected_sums[rows] += sum_deltas
+        np.testing.assert_allclose(solver.regrets, expected_regrets, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(solver.strategy_sums, expected_sums, rtol=1e-5, atol=1e-5)
+        self.assertGreater((solver.strategy_sums.sum(axis=1) > 0).sum(), 0)
+
+    def test_rounds_continue_from_the_tables(self):
+        solver = MCCFRSolver(2, seed=4, max_depth=60)
+        solver.solve(20, workers=1, rounds=2)
+        reached = (solver.strategy_sums.sum(axis=1) > 0).sum()
+        solver.solve(20, workers=1, rounds=2)
+        self.assertEqual(solver.iterations, 40)
+        self.assertGreaterEqual((solver.strategy_sums.sum(axis=1) > 0).sum(), reached)
+        strategy = solver.average_strategy()
+        totals = strategy.sum(axis=1)
+        np.testing.assert_allclose(totals[totals > 0], 1, rtol=1e-5)
+
+
+class CFRBotTest(unittest.TestCase):
+    def strategies(self, num_players):
+        """A random table with half the rows unreached, and one that favours COUP everywhere."""
+        n = Abstraction(num_players).num_infosets
+        rng = np.random.default_rng(0)
+        noisy = rng.random((n, NUM_DECISIONS), dtype=np.float32)
+        noisy[rng.random(n) < 0.5] = 0
+        coup = np.zeros((n, NUM_DECISIONS), dtype=np.float32)
+        coup[:, Action.COUP] = 1
+        return {"noisy": noisy, "coup": coup, "unreached": np.zeros((n, NUM_DECISIONS), dtype=np.float32)}
+
+    def test_choose_action_is_legal(self):
+        for name, strategy in self.strategies(3).items():
+            for deterministic in (False, True):
+                with self.subTest(strategy=name, deterministic=deterministic):
+                    bot = CFRBot(strategy, 3, deterministic, seed=0)
+                    engine = Engine(3, random.Random(0))
+                    for _ in range(3):
+                        engine.reset()
+                        for _ in range(500):
+                            if engine.is_over():
+                                break
+                            legal = engine.legal_actions()
+                            action = bot.choose_action(engine, legal)
+                            self.assertIn(action, legal)
+                            engine.step(action)
+
+    def test_act_batch_is_legal(self):
+        for name, strategy in self.strategies(3).items():
+            for deterministic in (False, True):
+                with self.subTest(strategy=name, deterministic=deterministic):
+                    bot = CFRBot(strategy, 3, deterministic)
+                    env = CoupVecEnv(16, 3, player_id=None, seed=0)
+                    env.reset()
+                    rng = np.random.default_rng(0)
+                    for _ in range(200):
+                        actions = bot.act_batch(env, env._all, rng)
+                        self.assertTrue(env.action_masks()[env._all, actions].all())
+                        env.reset_games(env.advance(env._all, actions))
+
+
+if __name__ == '__main__':
+    unittest.main()
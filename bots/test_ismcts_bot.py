@@ -0,0 +1,73 @@
+import random
+import time
+import unittest
+
+from bots.ismcts_bot import ISMCTSBot, search
+from game.actions import Action
+from game.engine import Engine, CHALLENGE, COUNTER
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine(3, random.Random(0))
+
+    def test_iteration_budget(self):
+        visits = search(3, self.engine.snapshot(), iterations=60, seed=0)
+        self.assertEqual(sum(visits.values()), 60)
+        self.assertLessEqual(set(visits), set(self.engine.legal_actions()))
+        self.assertEqual(visits, search(3, self.engine.snapshot(), iterations=60, seed=0))
+
+    def test_time_budget(self):
+        start = time.perf_counter()
+        visits = search(3, self.engine.snapshot(), iterations=None, time_limit=0.05, seed=0)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertGreater(sum(visits.values()), 0)
+
+    def test_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            ISMCTSBot(iterations=None, time_limit=None)
+
+
+class ISMCTSBotTest(unittest.TestCase):
+    def check_legal(self, engine, phase):
+        self.assertEqual(engine.phase, phase)
+        legal = engine.legal_actions()
+        for seed in range(5):
+            bot = ISMCTSBot(iterations=40, seed=seed)
+            visits = bot.root_visits(engine, legal)
+            self.assertEqual(set(visits), set(legal))
+            self.assertEqual(sum(visits.values()), 40)
+            self.assertIn(bot.choose_action(engine, legal), legal)
+
+    def test_challenge_decisions_are_legal(self):
+        engine = Engine(3, random.Random(1))
+        engine.step(Action.TAX)
+        self.check_legal(engine, CHALLENGE)
+
+    def test_counter_decisions_are_legal(self):
+        engine = Engine(3, random.Random(2))
+        engine.coins[0] = 3
+        engine.step(Action.ASSASSINATE)
+        while engine.phase == CHALLENGE:
+            engine.step(Action.PASS)
+        self.check_legal(engine, COUNTER)
+
+    def test_workers_sum_their_root_visits(self):
+        engine = Engine(4, random.Random(3))
+        legal = engine.legal_actions()
+        bot = ISMCTSBot(iterations=30, workers=2, seed=7)
+        try:
+            visits = bot.root_visits(engine, legal)
+        finally:
+            bot.close()
+        seeds = random.Random(7)
+        expected = dict.fromkeys(legal, 0)
+        for _ in range(2):
+            for action, count in search(4, engine.snapshot(), iterations=30, seed=seeds.getrandbits(64)).items():
+                expected[action] += count
+        self.assertEqual(visits, expected)
+        self.assertEqual(sum(visits.values()), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,4 @@
+# Modules import each other by package from the repo root (from game.engine
+# import ..., from rl_new.coup_env import ...) and scripts run from here as
+# modules, e.g. python -m rl_new.train or python -m game.runner. pytest puts the
+# directory of this conftest on sys.path, so the tests resolve the same names.
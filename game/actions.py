@@ -1,15 +1,21 @@
 class Action:
-    INCOME = "income"
-    FOREIGN_AID = "foreign_aid"
-    COUP = "coup"
-    TAX = "tax"
-    ASSASSINATE = "assassinate"
-    STEAL = "steal"
-    EXCHANGE = "exchange"
-    BLOCK_FOREIGN_AID = "block_foreign_aid"
-    BLOCK_STEAL = "block_steal"
-    BLOCK_ASSASSINATE = "block_assassinate"
-    CHALLENGE = "challenge"
+    # Small-int codes so history records pack into a few bits. INCOME..PASS are
+    # also the decision codes of the rules engine and the RL environments
+    INCOME = 0
+    FOREIGN_AID = 1
+    COUP = 2
+    TAX = 3
+    ASSASSINATE = 4
+    EXCHANGE = 5
+    STEAL = 6
+    PASS = 7
+    BLOCK_FOREIGN_AID = 8
+    BLOCK_STEAL = 9
+    BLOCK_ASSASSINATE = 10
+    CHALLENGE = 11
+    NAMES = ["income", "foreign_aid", "coup", "tax", "assassinate", "exchange", "steal", "pass",
+             "block_foreign_aid", "block_steal", "block_assassinate", "challenge"]
 
     PRIMARY_ACTIONS = [INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, STEAL, EXCHANGE]
-    BLOCK_ACTIONS = [BLOCK_FOREIGN_AID, BLOCK_STEAL, BLOCK_ASSASSINATE]
\ No newline at end of file
+    BLOCK_ACTIONS = [BLOCK_FOREIGN_AID, BLOCK_STEAL, BLOCK_ASSASSINATE]
+    BLOCK_FOR = {FOREIGN_AID: BLOCK_FOREIGN_AID, STEAL: BLOCK_STEAL, ASSASSINATE: BLOCK_ASSASSINATE}
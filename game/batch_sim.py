@@ -0,0 +1,275 @@
+# Vectorized Monte Carlo simulator for the random-policy game in main.py.
+# Every game in a batch advances one turn per iteration, with the whole table
+# stored as NumPy arrays, so seat-fairness sweeps over tens of millions of
+# games don't need the per-game Python loop.
+import argparse
+
+import numpy as np
+
+from game.deck import draw_counts
+
+# Card codes match main.Card values
+DUKE, ASSASSIN, AMBASSADOR, CAPTAIN, CONTESSA = range(5)
+NUM_CARD_TYPES = 5
+COPIES_PER_CARD = 3
+
+# Action codes follow the order of main.Action (INCOME = 5 ... STEAL = 11)
+INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, EXCHANGE, STEAL = range(7)
+NUM_ACTIONS = 7
+
+EMPTY = -1
+
+CHALLENGE_PROB = 0.3
+COUNTERACT_PROB = 0.3
+COUNTERACT_CHALLENGE_PROB = 0.5
+
+MAX_PLAYERS = 6
+
+# Lookup tables over alive bitmasks (bit p set = seat p alive)
+POPCOUNT = np.array([bin(m).count("1") for m in range(1 << MAX_PLAYERS)], dtype=np.int64)
+# NTH_SEAT[m, j] = j-th alive seat of mask m, EMPTY past the last one
+NTH_SEAT = np.full((1 << MAX_PLAYERS, MAX_PLAYERS + 1), EMPTY, dtype=np.int64)
+for _m in range(1 << MAX_PLAYERS):
+    _seats = [p for p in range(MAX_PLAYERS) if _m >> p & 1]
+    NTH_SEAT[_m, :len(_seats)] = _seats
+
+# Legal actions per coin bucket (<3, 3-6, 7+), in main.Player.get_legal_actions order
+LEGAL_ACTIONS = np.array([
+    [INCOME, FOREIGN_AID, TAX, EXCHANGE, STEAL, EMPTY, EMPTY],
+    [INCOME, FOREIGN_AID, TAX, ASSASSINATE, EXCHANGE, STEAL, EMPTY],
+    [INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, EXCHANGE, STEAL],
+], dtype=np.int64)
+NUM_LEGAL_ACTIONS = np.array([5, 6, 7], dtype=np.int64)
+
+# Exchange pool is [hand 0, hand 1, drawn 0, drawn 1] with EMPTY slots 1 and 3
+# for a one-card hand. Rows 0-1 keep one of {hand, drawn}, rows 2-7 are every
+# way to keep two of the four cards.
+EXCHANGE_KEEP = np.array([[0, 1], [2, 1], [0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]])
+EXCHANGE_RETURN = np.array([[2, 3], [0, 3], [2, 3], [1, 3], [1, 2], [0, 3], [0, 2], [0, 1]])
+
+# Card that has to be shown when the action is challenged (EMPTY = unchallengeable)
+CLAIM_CARD = np.array([EMPTY, EMPTY, EMPTY, DUKE, ASSASSIN, AMBASSADOR, CAPTAIN], dtype=np.int8)
+
+
+class BatchGame:
+    """num_games independent games of main.py's random game, stored as arrays.
+
+    coins[g, p]    coins of player p in game g
+    hands[g, p, s] card code in hand slot s, EMPTY if lost (slot 0 is filled first)
+    alive[g]       bitmask of players that still have influence
+    deck[g, c]     number of copies of card c left in the court deck
+    """
+
+    def __init__(self, num_games, num_players=5, rng=None):
+        if not 2 <= num_players <= MAX_PLAYERS:
+            raise ValueError(f"num_players must be between 2 and {MAX_PLAYERS}, got {num_players}")
+        self.num_games = num_games
+        self.num_players = num_players
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.coins = np.full((num_games, num_players), 2, dtype=np.int16)
+        self.hands = np.full((num_games, num_players, 2), EMPTY, dtype=np.int8)
+        self.alive = np.full(num_games, (1 << num_players) - 1, dtype=np.int64)
+        self.deck = np.full((num_games, NUM_CARD_TYPES), COPIES_PER_CARD, dtype=np.int8)
+        self.current = np.zeros(num_games, dtype=np.int64)
+        self.winner = np.full(num_games, EMPTY, dtype=np.int64)
+        self.turns = np.zeros(num_games, dtype=np.int64)
+        self._active = np.arange(num_games)
+        # Flat per-seat views (index g * num_players + p), much cheaper to gather from
+        self._seat_coins = self.coins.reshape(-1)
+        self._seat_hands = self.hands.reshape(-1, 2)
+
+        # next_seat[m, p] = first alive seat of mask m at or after seat p
+        seats = np.arange(num_players)
+        self._next_seat = np.empty((1 << num_players, num_players), dtype=np.int64)
+        for m in range(1 << num_players):
+            for p in seats:
+                order = (p + seats) % num_players
+                alive = [q for q in order if m >> q & 1]
+                self._next_seat[m, p] = alive[0] if alive else EMPTY
+
+        everyone = np.arange(num_games)
+        for p in range(num_players):
+            for slot in range(2):
+                self.hands[:, p, slot] = self._draw(everyone)
+
+    def is_finished(self):
+        return len(self._active) == 0
+
+    def run(self):
+        while not self.is_finished():
+            self.step()
+        return self.winner
+
+    def step(self):
+        """Play one turn in every unfinished game."""
+        g = self._active
+        alive = self.alive[g]
+        over = POPCOUNT[alive] == 1
+        self.winner[g[over]] = NTH_SEAT[alive[over], 0]
+        g = g[~over]
+        self._active = g
+        if len(g) == 0:
+            return
+
+        n = len(g)
+        # Dead players are skipped until the next alive seat
+        p = self._next_seat[alive[~over], self.current[g]]
+        self.turns[g] += 1
+
+        gp = g * self.num_players + p
+        coins = self._seat_coins[gp]
+        bucket = (coins >= 3).astype(np.int64) + (coins >= 7)
+        action = LEGAL_ACTIONS[bucket, self._uniform_index(NUM_LEGAL_ACTIONS[bucket])]
+        action[coins >= 10] = COUP
+
+        # Drawn before anyone can lose influence this turn, as in main()
+        target = self._random_other(g, p)
+
+        sel = action == INCOME
+        self._seat_coins[gp[sel]] += 1
+
+        sel = action == COUP
+        self._seat_coins[gp[sel]] -= 7
+        self._lose_influence(g[sel], target[sel])
+
+        # Everything else can be challenged and/or counteracted
+        live = (action != INCOME) & (action != COUP)
+        idx = np.nonzero(live & (action != FOREIGN_AID) & (self._random(n) < CHALLENGE_PROB))[0]
+        challenger = self._random_other(g[idx], p[idx])
+        caught = self._challenge(g[idx], p[idx], challenger, CLAIM_CARD[action[idx]])
+        live[idx[caught]] = False
+
+        counterable = live & ((action == FOREIGN_AID) | (action == ASSASSINATE) | (action == STEAL))
+        idx = np.nonzero(counterable & (self._random(n) < COUNTERACT_PROB))[0]
+        fa = action[idx] == FOREIGN_AID
+        counteractor = np.where(fa, self._random_other(g[idx], p[idx]), target[idx])
+        idx, fa, counteractor = self._where_alive(g[idx], counteractor, idx, fa, counteractor)
+        live[idx] = False
+
+        counter_claim = np.where(
+            fa, DUKE,
+            np.where(action[idx] == ASSASSINATE, CONTESSA,
+                     np.where(self._random(len(idx)) < 0.5, CAPTAIN, AMBASSADOR)))
+        sub = np.nonzero(self._random(len(idx)) < COUNTERACT_CHALLENGE_PROB)[0]
+        idx, counteractor, counter_claim = idx[sub], counteractor[sub], counter_claim[sub]
+        counter_challenger = self._random_other(g[idx], counteractor)
+        caught = self._challenge(g[idx], counteractor, counter_challenger, counter_claim)
+
+        # An unchallenged counteraction blocks the action, so does a truthful one
+        live[idx[caught]] = True
+        self._perform(g[live], p[live], action[live], target[live])
+
+        self.current[g] = (p + 1) % self.num_players
+
+    def _where_alive(self, g, p, *arrays):
+        """Filter arrays down to the entries whose player p is alive."""
+        keep = (p >= 0) & ((self.alive[g] >> np.maximum(p, 0)) & 1).astype(bool)
+        return tuple(a[keep] for a in arrays)
+
+    def _perform(self, g, p, action, target):
+        gp = g * self.num_players + p
+        sel = action == FOREIGN_AID
+        self._seat_coins[gp[sel]] += 2
+
+        sel = action == TAX
+        self._seat_coins[gp[sel]] += 3
+
+        sel = action == ASSASSINATE
+        self._seat_coins[gp[sel]] -= 3
+        self._lose_influence(g[sel], target[sel])
+
+        sel = action == STEAL
+        gt = g[sel] * self.num_players + target[sel]
+        stolen = np.minimum(2, self._seat_coins[gt])
+        self._seat_coins[gt] -= stolen
+        self._seat_coins[gp[sel]] += stolen
+
+        sel = action == EXCHANGE
+        self._exchange(g[sel], p[sel])
+
+    def _exchange(self, g, p):
+        """Draw as many cards as are in hand, keep a random subset of that size."""
+        n = len(g)
+        gp = g * self.num_players + p
+        pool = np.full((n, 4), EMPTY, dtype=np.int64)
+        pool[:, :2] = self._seat_hands[gp]
+        two = pool[:, 1] != EMPTY
+        pool[:, 2] = self._draw(g)
+        pool[two, 3] = self._draw(g[two])
+
+        choice = np.where(two, 2 + self._uniform_index(np.full(n, 6)), self._random(n) < 0.5)
+        base = np.arange(n)[:, None] * 4
+        kept = pool.reshape(-1)[base + EXCHANGE_KEEP[choice]]
+        returned = pool.reshape(-1)[base + EXCHANGE_RETURN[choice]]
+
+        self._seat_hands[gp] = kept
+        self.deck[g, returned[:, 0]] += 1
+        self.deck[g[two], returned[two, 1]] += 1
+
+    def _challenge(self, g, claimant, challenger, card):
+        """Resolve challenges of claimant's card; returns True where claimant was bluffing."""
+        hand = self._seat_hands[g * self.num_players + claimant]
+        has_card = (hand[:, 0] == card) | (hand[:, 1] == card)
+        ok = np.nonzero(has_card)[0]
+        self._lose_influence(g[ok], challenger[ok])
+        self._redraw(g[ok], claimant[ok], card[ok])
+        bluff = np.nonzero(~has_card)[0]
+        self._lose_influence(g[bluff], claimant[bluff])
+        return ~has_card
+
+    def _redraw(self, g, p, card):
+        """Shuffle the revealed card back into the deck and draw a replacement."""
+        gp = g * self.num_players + p
+        slot = (self._seat_hands[gp, 0] != card).astype(np.int64)
+        self.deck[g, card] += 1
+        self._seat_hands[gp, slot] = self._draw(g)
+
+    def _lose_influence(self, g, p):
+        """Discard a random card (the only card if one is left) of player p in each game."""
+        gp = g * self.num_players + p
+        hand = self._seat_hands[gp]
+        two = hand[:, 1] != EMPTY
+        drop_first = two & (self._random(len(g)) < 0.5)
+        self._seat_hands[gp, 0] = np.where(drop_first, hand[:, 1], np.where(two, hand[:, 0], EMPTY))
+        self._seat_hands[gp, 1] = EMPTY
+        self.alive[g[~two]] &= ~(1 << p[~two])
+
+    def _draw(self, g):
+        """Draw one uniformly random card from the deck of each game in g."""
+        return draw_counts(self.deck, g, self._random(len(g)))
+
+    def _random_other(self, g, p):
+        """Uniformly random alive player other than p in each game, EMPTY if none."""
+        others = self.alive[g] & ~(1 << p)
+        return NTH_SEAT[others, self._uniform_index(POPCOUNT[others])]
+
+    def _uniform_index(self, count):
+        """Uniformly random integer in [0, count) per entry (0 where count is 0)."""
+        return (self._random(len(count)) * count).astype(np.int64)
+
+    def _random(self, n):
+        return self.rng.random(n, dtype=np.float32)
+
+
+def simulate(num_games, num_players=5, seed=None, batch_size=1 << 18):
+    """Play num_games random games and return the number of wins per seat."""
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(num_players, dtype=np.int64)
+    remaining = num_games
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        winners = BatchGame(batch, num_players, rng).run()
+        wins += np.bincount(winners, minlength=num_players)
+        remaining -= batch
+    return wins.tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched random-policy Coup win rates per seat")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1 << 18)
+    args = parser.parse_args()
+    print(simulate(args.games, args.players, args.seed, args.batch_size))
@@ -1,7 +1,9 @@
 class Card:
-    DUKE = "Duke"
-    ASSASSIN = "Assassin"
-    CAPTAIN = "Captain"
-    AMBASSADOR = "Ambassador"
-    CONTESSA = "Contessa"
-    ALL_CARDS = [DUKE, ASSASSIN, CAPTAIN, AMBASSADOR, CONTESSA]
+    # Small-int codes so hands, the deck counts and history records stay compact
+    DUKE = 0
+    ASSASSIN = 1
+    AMBASSADOR = 2
+    CAPTAIN = 3
+    CONTESSA = 4
+    ALL_CARDS = [DUKE, ASSASSIN, AMBASSADOR, CAPTAIN, CONTESSA]
+    NAMES = ["Duke", "Assassin", "Ambassador", "Captain", "Contessa"]
@@ -0,0 +1,64 @@
+import random
+from array import array
+
+import numpy as np
+
+from game.cards import Card
+
+
+class Deck:
+    """Court deck stored as a count per card code instead of a shuffled list.
+
+    A draw picks a card with probability proportional to its count, which is the
+    same distribution as shuffling the list and popping, without the O(n) shuffle.
+    Returning a card is a single increment.
+    """
+    __slots__ = ("counts", "size", "rng")
+
+    def __init__(self, copies=3, rng=random):
+        self.counts = array("b", [copies] * len(Card.ALL_CARDS))
+        self.size = copies * len(Card.ALL_CARDS)
+        self.rng = rng
+
+    def __len__(self):
+        return self.size
+
+    def copy(self):
+        deck = Deck.__new__(Deck)
+        deck.counts = array("b", self.counts)
+        deck.size = self.size
+        deck.rng = self.rng
+        return deck
+
+    def draw(self):
+        if not self.size:
+            raise IndexError("draw from an empty deck")
+        pick = self.rng.randrange(self.size)
+        for card, count in enumerate(self.counts):
+            if pick < count:
+                self.counts[card] -= 1
+                self.size -= 1
+                return card
+            pick -= count
+
+    def put(self, card):
+        self.counts[card] += 1
+        self.size += 1
+
+    def swap(self, card):
+        """Shuffle card back in and draw a replacement."""
+        self.put(card)
+        return self.draw()
+
+
+def draw_counts(decks, g, u):
+    """Batched Deck.draw over a (num_games, num_cards) array of per-game card counts.
+
+    Draws one card from the deck of each game in g, using one uniform number in
+    [0, 1) per game from u, decrements decks in place and returns the cards.
+    """
+    deck = decks[g].astype(np.int64)
+    pick = (u * deck.sum(axis=1)).astype(np.int64)
+    cards = (deck.cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+    decks[g, cards] -= 1
+    return cards
@@ -0,0 +1,377 @@
+import random
+from array import array
+from game.actions import Action
+from game.cards import Card
+from game.deck import Deck
+
+# Single rules engine behind the RL environments. The state is flat and integer
+# coded: per-seat coins and a two-slot hand list, an alive bitmask and the
+# per-card deck counts. Every decision (a turn action, or a pass / challenge /
+# block by a responder) goes through step(), which is what the PettingZoo,
+# Gymnasium and RLlib adapters, and CoupVecEnv's batched copy, build on.
+#
+# Decision codes are Action.INCOME..Action.PASS. In the counter phase a
+# decision is read as the card the block is claimed with (Card codes) and
+# anything that cannot block the pending action is a pass; in the challenge
+# phases anything but PASS is a challenge. Illegal turn actions become INCOME.
+
+EMPTY = -1
+NUM_DECISIONS = Action.PASS + 1
+NUM_CARD_TYPES = len(Card.ALL_CARDS)
+
+ACTION_SELECTION, CHALLENGE, COUNTER, COUNTER_CHALLENGE = range(4)
+PHASE_NAMES = ("action_selection", "challenge", "counter", "counter_challenge")
+
+# Card claimed by each decision, EMPTY if it makes no claim
+CLAIM_CARD = [EMPTY] * NUM_DECISIONS
+CLAIM_CARD[Action.TAX] = Card.DUKE
+CLAIM_CARD[Action.ASSASSINATE] = Card.ASSASSIN
+CLAIM_CARD[Action.EXCHANGE] = Card.AMBASSADOR
+CLAIM_CARD[Action.STEAL] = Card.CAPTAIN
+
+# Cards that can block each decision
+BLOCKERS = [()] * NUM_DECISIONS
+BLOCKERS[Action.FOREIGN_AID] = (Card.DUKE,)
+BLOCKERS[Action.STEAL] = (Card.CAPTAIN, Card.AMBASSADOR)
+BLOCKERS[Action.ASSASSINATE] = (Card.CONTESSA,)
+
+TARGETED = (Action.COUP, Action.ASSASSINATE, Action.STEAL)
+
+# Legal turn actions per coin bucket: <3, 3-6, 7+
+LEGAL = (
+    (Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.EXCHANGE, Action.STEAL, Action.PASS),
+    (Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.ASSASSINATE, Action.EXCHANGE, Action.STEAL, Action.PASS),
+    (Action.INCOME, Action.FOREIGN_AID, Action.COUP, Action.PASS),
+)
+# The rl/ adapters' rules, where 7+ coins adds COUP to everything else instead
+OPEN_LEGAL = LEGAL[:2] + (LEGAL[1] + (Action.COUP,),)
+
+# In the challenge phases every decision but PASS challenges; the masks below
+# only offer this one, so masked policies see each choice once
+CHALLENGE_DECISION = Action.INCOME
+
+
+def _mask(decisions):
+    return sum(1 << a for a in set(decisions))
+
+
+def legal_masks(legal):
+    """LEGAL_MASK for the turn actions legal[coin bucket]."""
+    return tuple(
+        tuple(
+            tuple(
+                _mask(legal[bucket]) if phase == ACTION_SELECTION
+                else _mask((Action.PASS,) + BLOCKERS[pending]) if phase == COUNTER
+                else _mask((Action.PASS, CHALLENGE_DECISION))
+                for pending in range(NUM_DECISIONS)
+            )
+            for bucket in range(len(legal))
+        )
+        for phase in range(len(PHASE_NAMES))
+    )
+
+
+# LEGAL_MASK[phase][coin bucket][pending action]: bitmask of the decisions to_act
+# can make (bit a = decision a). The coin bucket only matters when selecting an
+# action and the pending action only in the counter phase; rows are repeated so
+# a lookup never branches (pending EMPTY at the start of a game indexes row -1).
+LEGAL_MASK = legal_masks(LEGAL)
+_LEGAL_MASKS = {LEGAL: LEGAL_MASK}
+# Decision codes in each bitmask, ascending
+MASK_DECISIONS = tuple(tuple(a for a in range(NUM_DECISIONS) if m >> a & 1) for m in range(1 << NUM_DECISIONS))
+
+
+def coin_bucket(coins):
+    return (coins >= 3) + (coins >= 7)
+
+
+_SEAT_TABLES = {}
+
+
+def seat_tables(num_players):
+    """Lookup tables over alive bitmasks (bit i set = seat i alive), cached per player count.
+
+    first_at[m][i]  lowest seat >= i in m, EMPTY if none (responder order)
+    next_turn[m][i] next seat after i in m going round the table (turn order)
+    """
+    if num_players not in _SEAT_TABLES:
+        masks = 1 << num_players
+        first_at = []
+        next_turn = []
+        for m in range(masks):
+            seats = [s for s in range(num_players) if m >> s & 1]
+            first_at.append(tuple(next((s for s in seats if s >= i), EMPTY) for i in range(num_players + 1)))
+            next_turn.append(tuple(
+                next((s for s in seats if s > i), seats[0]) if seats else i for i in range(num_players)
+            ))
+        _SEAT_TABLES[num_players] = (tuple(first_at), tuple(next_turn))
+    return _SEAT_TABLES[num_players]
+
+
+class Engine:
+    """One game of Coup as a sequence of single-seat decisions.
+
+    to_act is the seat whose decision step() expects next: the actor in the
+    action_selection phase, otherwise the responder being asked. Responders are
+    asked in seat order and always alive. The game is over when one seat is left.
+
+    Targeted actions hit the lowest alive seat other than the actor, or with
+    random_targets a uniformly drawn one (from rng). legal gives the turn actions
+    per coin bucket (LEGAL, or OPEN_LEGAL for the rl/ rules); other actions
+    become INCOME.
+    """
+    __slots__ = ("num_players", "rng", "random_targets", "legal", "coins", "hands", "alive", "deck", "phase", "actor",
+                 "to_act", "pending_action", "pending_target", "counter_player", "counter_card",
+                 "_first_at", "_next_turn", "_legal_mask")
+
+    def __init__(self, num_players=4, rng=random, random_targets=False, legal=LEGAL):
+        self.num_players = num_players
+        self.rng = rng
+        self.random_targets = random_targets
+        self.legal = legal
+        if legal not in _LEGAL_MASKS:
+            _LEGAL_MASKS[legal] = legal_masks(legal)
+        self._legal_mask = _LEGAL_MASKS[legal]
+        self._first_at, self._next_turn = seat_tables(num_players)
+        self.reset()
+
+    def reset(self):
+        self.deck = Deck(3, self.rng)
+        self.coins = [2] * self.num_players
+        # hands[2 * seat + slot], slot 0 is filled first
+        self.hands = [self.deck.draw() for _ in range(2 * self.num_players)]
+        self.alive = (1 << self.num_players) - 1
+        self.phase = ACTION_SELECTION
+        self.actor = self.to_act = 0
+        self.pending_action = self.pending_target = EMPTY
+        self.counter_player = self.counter_card = EMPTY
+
+    # --- Snapshots ---
+
+    def snapshot(self):
+        """The whole game as a flat tuple of 3 * num_players + 14 ints, for restore().
+
+        Layout: coins per seat, hands (two slots per seat), deck counts per card,
+        deck size, alive mask, phase, actor, to_act, pending action and target,
+        counter player and card. The rng is not part of the state.
+        """
+        deck = self.deck
+        return (*self.coins, *self.hands, *deck.counts, deck.size, self.alive, self.phase, self.actor, self.to_act,
+                self.pending_action, self.pending_target, self.counter_player, self.counter_card)
+
+    def restore(self, state):
+        """Put the game back into a state returned by snapshot() (of any engine with as many seats)."""
+        p = self.num_players
+        self.coins[:] = state[:p]
+        self.hands[:] = state[p:3 * p]
+        deck = self.deck
+        deck.counts = array("b", state[3 * p:3 * p + NUM_CARD_TYPES])
+        (deck.size, self.alive, self.phase, self.actor, self.to_act, self.pending_action, self.pending_target,
+         self.counter_player, self.counter_card) = state[3 * p + NUM_CARD_TYPES:]
+
+    def clone(self, rng=None):
+        """Independent copy of this game, drawing from rng (default: the same rng)."""
+        other = Engine.__new__(Engine)
+        other.num_players = self.num_players
+        other.rng = self.rng if rng is None else rng
+        other.random_targets = self.random_targets
+        other.legal, other._legal_mask = self.legal, self._legal_mask
+        other._first_at, other._next_turn = self._first_at, self._next_turn
+        other.deck = self.deck.copy()
+        other.deck.rng = other.rng
+        other.coins = self.coins[:]
+        other.hands = self.hands[:]
+        (other.alive, other.phase, other.actor, other.to_act, other.pending_action, other.pending_target,
+         other.counter_player, other.counter_card) = (
+            self.alive, self.phase, self.actor, self.to_act, self.pending_action, self.pending_target,
+            self.counter_player, self.counter_card)
+        return other
+
+    # --- Queries ---
+
+    def is_over(self):
+        return self.alive & (self.alive - 1) == 0
+
+    @property
+    def winner(self):
+        return self.alive.bit_length() - 1 if self.is_over() else None
+
+    def is_alive(self, seat):
+        return self.alive >> seat & 1 == 1
+
+    def cards(self, seat):
+        return [card for card in self.hands[2 * seat:2 * seat + 2] if card != EMPTY]
+
+    def legal_mask(self, seat=None):
+        """Bitmask of the decisions seat (default to_act) could make in the current phase."""
+        if seat is None:
+            seat = self.to_act
+        return self._legal_mask[self.phase][coin_bucket(self.coins[seat])][self.pending_action]
+
+    def legal_actions(self, seat=None):
+        return MASK_DECISIONS[self.legal_mask(seat)]
+
+    def observe(self, seat, out):
+        """Write seat's view into out (8 floats per seat, see OBS_PER_PLAYER in rl_new)."""
+        out[:] = 0
+        hands = self.hands
+        for p in range(self.num_players):
+            col = 8 * p
+            out[col] = self.coins[p] / 10
+            out[col + 1] = ((hands[2 * p] != EMPTY) + (hands[2 * p + 1] != EMPTY)) / 2
+            out[col + 2] = self.alive >> p & 1
+        for card in hands[2 * seat:2 * seat + 2]:
+            if card != EMPTY:
+                out[8 * seat + 3 + card] += 1
+        return out
+
+    # --- Decisions ---
+
+    def step(self, action):
+        """Apply the decision of seat to_act."""
+        phase = self.phase
+        if phase == ACTION_SELECTION:
+            self._action_selection(action)
+        elif phase == CHALLENGE:
+            self._challenge_phase(action)
+        elif phase == COUNTER:
+            self._counter_phase(action)
+        else:
+            self._counter_challenge_phase(action)
+
+    def _action_selection(self, action):
+        p = self.actor
+        if not self._legal_mask[ACTION_SELECTION][coin_bucket(self.coins[p])][0] >> action & 1:
+            action = Action.INCOME  # Force legal action
+        self.pending_action = action
+        self.pending_target = self._target(p) if action in TARGETED else EMPTY
+
+        if action == Action.COUP:
+            self.coins[p] -= 7
+            self._lose_influence(self.pending_target)
+            self._end_turn()
+        elif CLAIM_CARD[action] != EMPTY:
+            self.phase = CHALLENGE
+            self._ask(p, 0, self._after_claim_stands)
+        elif action == Action.INCOME:
+            self.coins[p] += 1
+            self._end_turn()
+        elif action == Action.FOREIGN_AID:
+            self._start_counter_phase()
+        else:
+            # PASS on your own turn
+            self._end_turn()
+
+    def _target(self, p):
+        others = self.alive & ~(1 << p)
+        if not self.random_targets:
+            return self._first_at[others][0]
+        seats = [s for s in range(self.num_players) if others >> s & 1]
+        return self.rng.choice(seats) if seats else EMPTY
+
+    def _challenge_phase(self, action):
+        if action == Action.PASS:
+            self._ask(self.actor, self.to_act + 1, self._after_claim_stands)
+        elif self._challenge(self.actor, self.to_act, CLAIM_CARD[self.pending_action]):
+            self._after_claim_stands()
+        else:
+            self._end_turn()
+
+    def _counter_phase(self, action):
+        responder = self.to_act
+        if action is not None and 0 <= action < len(Card.ALL_CARDS) and action in BLOCKERS[self.pending_action]:
+            self.counter_player = responder
+            self.counter_card = action
+            self.phase = COUNTER_CHALLENGE
+            # Nobody left to challenge the block means it stands
+            self._ask(responder, 0, self._end_turn)
+        else:
+            self._ask(self.actor, responder + 1, self._apply_and_end_turn)
+
+    def _counter_challenge_phase(self, action):
+        if action == Action.PASS:
+            self._ask(self.counter_player, self.to_act + 1, self._end_turn)
+        elif self._challenge(self.counter_player, self.to_act, self.counter_card):
+            self._end_turn()
+        else:
+            self._apply_and_end_turn()
+
+    def _ask(self, excluded, start, when_none):
+        """Hand the decision to the first alive seat >= start other than excluded, else call when_none."""
+        nxt = self._first_at[self.alive & ~(1 << excluded)][start]
+        if nxt == EMPTY:
+            when_none()
+        else:
+            self.to_act = nxt
+
+    def _after_claim_stands(self):
+        # Claim was not challenged or survived a challenge
+        if BLOCKERS[self.pending_action]:
+            self._start_counter_phase()
+        else:
+            self._apply_and_end_turn()
+
+    def _start_counter_phase(self):
+        self.phase = COUNTER
+        self.counter_player = self.counter_card = EMPTY
+        self._ask(self.actor, 0, self._apply_and_end_turn)
+
+    def _apply_and_end_turn(self):
+        self._apply_action()
+        self._end_turn()
+
+    def _end_turn(self):
+        self.phase = ACTION_SELECTION
+        self.actor = self.to_act = self._next_turn[self.alive][self.actor]
+
+    def _apply_action(self):
+        action, p, target = self.pending_action, self.actor, self.pending_target
+        coins = self.coins
+        if action == Action.TAX:
+            coins[p] += 3
+        elif action == Action.FOREIGN_AID:
+            coins[p] += 2
+        elif action == Action.ASSASSINATE:
+            if coins[p] >= 3 and target != EMPTY:
+                coins[p] -= 3
+                self._lose_influence(target)
+        elif action == Action.STEAL:
+            if target != EMPTY:
+                stolen = min(2, coins[target])
+                coins[target] -= stolen
+                coins[p] += stolen
+        elif action == Action.EXCHANGE:
+            # Draw as many cards as in hand, then shuffle the old hand back in
+            hands, deck = self.hands, self.deck
+            old = [card for card in hands[2 * p:2 * p + 2] if card != EMPTY]
+            for slot in range(len(old)):
+                hands[2 * p + slot] = deck.draw()
+            for card in old:
+                deck.put(card)
+
+    def _challenge(self, claimant, challenger, card):
+        """Resolve a challenge of claimant's card; returns True if the claim held."""
+        hands = self.hands
+        i = 2 * claimant
+        if hands[i] == card or hands[i + 1] == card:
+            self._lose_influence(challenger)
+            # Claimant exchanges the revealed card with the deck
+            slot = i if hands[i] == card else i + 1
+            hands[slot] = self.deck.swap(card)
+            return True
+        self._lose_influence(claimant)
+        return False
+
+    def _lose_influence(self, seat):
+        """Discard a random card of seat."""
+        if seat == EMPTY:
+            return
+        hands = self.hands
+        i = 2 * seat
+        if hands[i + 1] != EMPTY:
+            if self.rng.random() < 0.5:
+                hands[i] = hands[i + 1]
+            hands[i + 1] = EMPTY
+        else:
+            hands[i] = EMPTY
+            self.alive &= ~(1 << seat)
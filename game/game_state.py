@@ -1,73 +1,122 @@
 import random
-from collections import deque
+from array import array
 from game.actions import Action
 from game.cards import Card
+from game.deck import Deck
+from game.engine import EMPTY, coin_bucket, seat_tables
+from game.history import History
 from game.player import Player
 
+# Legal actions per coin bucket (<3, 3-6, 7+), in the order get_legal_actions always listed them
+LEGAL_ACTIONS = (
+    (Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.EXCHANGE, Action.STEAL),
+    (Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.EXCHANGE, Action.ASSASSINATE, Action.STEAL),
+    (Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.EXCHANGE, Action.COUP, Action.ASSASSINATE, Action.STEAL),
+)
+
 
 class GameState:
-    def __init__(self, num_players):
+    __slots__ = ("num_players", "players", "rng", "deck", "current_player_idx", "history", "alive", "num_alive",
+                 "_next_turn")
+
+    def __init__(self, num_players, rng=random):
         self.num_players = num_players
-        self.players = [Player(i) for i in range(num_players)]
+        self.players = [Player(i, self) for i in range(num_players)]
+        self.rng = rng
         self.deck = self._init_deck()
         self.current_player_idx = 0
-        self.action_stack = deque()
-        self.history = []
+        self.history = History()
+        # Bit i set = player i alive; only eliminate() clears bits, called by
+        # Player.lose_influence() when the last card goes
+        self.alive = (1 << num_players) - 1
+        self.num_alive = num_players
+        self._next_turn = seat_tables(num_players)[1]
         self._deal_initial_cards()
 
     def _init_deck(self):
-        deck = Card.ALL_CARDS * 3
-        random.shuffle(deck)
-        return deck
+        return Deck(3, self.rng)
 
     def _deal_initial_cards(self):
         for player in self.players:
-            player.cards = [self.deck.pop(), self.deck.pop()]
+            player.cards = [self.deck.draw(), self.deck.draw()]
+
+    def snapshot(self):
+        """Flat tuple of the game for restore(): per player coins and two card
+        slots (EMPTY = no card), deck counts and size, current player, alive
+        mask, history position, then the packed history events as bytes."""
+        state = []
+        for player in self.players:
+            cards = player.cards
+            state += (player.coins, cards[0] if cards else EMPTY, cards[1] if len(cards) > 1 else EMPTY)
+        state += self.deck.counts
+        state += (self.deck.size, self.current_player_idx, self.alive, self.history.total,
+                  self.history.events.tobytes())
+        return tuple(state)
+
+    def restore(self, state):
+        for player in self.players:
+            i = 3 * player.id
+            player.coins = state[i]
+            player.cards = [card for card in state[i + 1:i + 3] if card != EMPTY]
+            player.alive = bool(player.cards)
+        i = 3 * self.num_players
+        self.deck.counts = array("b", state[i:i + len(Card.ALL_CARDS)])
+        self.deck.size, self.current_player_idx, self.alive, self.history.total, events = state[i + len(Card.ALL_CARDS):]
+        self.num_alive = bin(self.alive).count("1")
+        self.history.events = array("H", events)
 
     def get_current_player(self):
         return self.players[self.current_player_idx]
 
+    def is_alive(self, player_id):
+        return self.alive >> player_id & 1 == 1
+
     def get_alive_players(self):
-        return [p for p in self.players if p.is_alive()]
+        alive = []
+        mask = self.alive
+        while mask:
+            low = mask & -mask
+            alive.append(self.players[low.bit_length() - 1])
+            mask ^= low
+        return alive
 
     def next_player(self):
-        start_idx = self.current_player_idx
-        while True:
-            self.current_player_idx = (self.current_player_idx + 1) % self.num_players
-            if self.players[self.current_player_idx].is_alive():
-                break
-            if self.current_player_idx == start_idx:
-                break
+        self.current_player_idx = self._next_turn[self.alive][self.current_player_idx]
 
     def is_game_over(self):
-        return len(self.get_alive_players()) == 1
+        return self.num_alive == 1
 
     def get_winner(self):
         if self.is_game_over():
-            return self.get_alive_players()[0].id
+            return self.alive.bit_length() - 1
         return None
 
+    def lose_influence(self, player_id, card_to_lose=None):
+        self.players[player_id].lose_influence(card_to_lose)
+
+    def eliminate(self, player_id):
+        if self.is_alive(player_id):
+            self.alive &= ~(1 << player_id)
+            self.num_alive -= 1
+
     def challenge(self, challenger_id, target_id, claimed_card):
         target = self.players[target_id]
-        challenger = self.players[challenger_id]
         if claimed_card in target.cards:
             # Challenge fails
-            challenger.lose_influence()
+            self.lose_influence(challenger_id)
             # Target returns and redraws card
             target.cards.remove(claimed_card)
-            self.deck.append(claimed_card)
-            random.shuffle(self.deck)
-            target.cards.append(self.deck.pop())
+            target.cards.append(self.deck.swap(claimed_card))
             return True  # action proceeds
         else:
             # Challenge succeeds
-            target.lose_influence()
+            self.lose_influence(target_id)
             return False  # action fails
 
     def perform_action(self, player_id, action, target_id=None, claim_card=None, block_by=None, challenged_by=None):
-        player = self.players[player_id]
-        if not player.is_alive():
+        if not self.is_alive(player_id):
             return False
+        player = self.players[player_id]
 
         action_valid = True
         block_success = False
@@ -76,7 +125,7 @@ class GameState:
         if challenged_by is not None:
             action_valid = self.challenge(challenged_by, player_id, claim_card)
             if not action_valid:
-                self.history.append((challenged_by, Action.CHALLENGE, player_id, claim_card))
+                self.history.append(challenged_by, Action.CHALLENGE, player_id, claim_card)
                 self.next_player()
                 return False
 
@@ -89,7 +138,7 @@ class GameState:
             elif action == Action.STEAL:
                 block_success = self.challenge(player_id, block_by, Card.CAPTAIN) if challenged_by is not None else True
             if block_success:
-                self.history.append((block_by, 'block', action))
+                self.history.append(block_by, Action.BLOCK_FOR[action], player_id)
                 self.next_player()
                 return False
 
@@ -100,38 +149,31 @@ class GameState:
             player.coins += 2
         elif action == Action.COUP and target_id is not None and player.coins >= 7:
             player.coins -= 7
-            self.players[target_id].lose_influence()
+            self.lose_influence(target_id)
         elif action == Action.TAX:
             player.coins += 3
         elif action == Action.ASSASSINATE and target_id is not None and player.coins >= 3:
             player.coins -= 3
-            self.players[target_id].lose_influence()
+            self.lose_influence(target_id)
         elif action == Action.STEAL and target_id is not None:
             target = self.players[target_id]
             stolen = min(2, target.coins)
             target.coins -= stolen
             player.coins += stolen
         elif action == Action.EXCHANGE:
-            drawn = [self.deck.pop(), self.deck.pop()]
+            drawn = [self.deck.draw(), self.deck.draw()]
             kept = player.cards + drawn
-            random.shuffle(kept)
-            player.cards = kept[:2]
-            self.deck += kept[2:]
-            random.shuffle(self.deck)
+            self.rng.shuffle(kept)
+            # Keep as many cards as the player had
+            player.cards = kept[:len(player.cards)]
+            for card in kept[len(player.cards):]:
+                self.deck.put(card)
 
-        self.history.append((player_id, action, target_id, claim_card))
+        self.history.append(player_id, action, target_id, claim_card)
         self.next_player()
         return True
 
     def get_legal_actions(self, player_id):
-        player = self.players[player_id]
-        if not player.is_alive():
-            return []
-
-        actions = [Action.INCOME, Action.FOREIGN_AID, Action.TAX, Action.EXCHANGE]
-        if player.coins >= 7:
-            actions.append(Action.COUP)
-        if player.coins >= 3:
-            actions.append(Action.ASSASSINATE)
-        actions.append(Action.STEAL)
-        return actions
\ No newline at end of file
+        if not self.is_alive(player_id):
+            return ()
+        return LEGAL_ACTIONS[coin_bucket(self.players[player_id].coins)]
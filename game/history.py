@@ -0,0 +1,50 @@
+from array import array
+
+NONE = 0xF
+
+
+class History:
+    """Ring buffer of the most recent game events.
+
+    Each event (actor, action, target, card) is packed into one 16-bit int, one
+    nibble per field with 0xF for None, so a game's history is a fixed-size
+    array instead of a growing list of tuples.
+    """
+    __slots__ = ("events", "total")
+
+    def __init__(self, capacity=64):
+        self.events = array("H", bytes(2 * capacity))
+        self.total = 0
+
+    @staticmethod
+    def pack(actor, action, target=None, card=None):
+        return (
+            (NONE if actor is None else actor) << 12
+            | (NONE if action is None else action) << 8
+            | (NONE if target is None else target) << 4
+            | (NONE if card is None else card)
+        )
+
+    @staticmethod
+    def unpack(event):
+        fields = (event >> 12, event >> 8 & NONE, event >> 4 & NONE, event & NONE)
+        return tuple(None if f == NONE else f for f in fields)
+
+    def append(self, actor, action, target=None, card=None):
+        self.events[self.total % len(self.events)] = self.pack(actor, action, target, card)
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, len(self.events))
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("history index out of range")
+        return self.unpack(self.events[(self.total - n + i) % len(self.events)])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
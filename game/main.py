@@ -1,6 +1,10 @@
 from enum import Enum
 import random
 
+from game.deck import Deck
+from game.records import (CHALLENGED, CHALLENGE_SUCCEEDED, BLOCKED, BLOCK_CHALLENGED, BLOCK_CHALLENGE_SUCCEEDED,
+                          PERFORMED)
+
 class Card(Enum):
     DUKE = 0
     ASSASSIN = 1
@@ -24,10 +28,10 @@ class Player:
         self.cards = []
         self.alive = True
 
-    def lose_influence(self):
+    def lose_influence(self, rng=random):
         if not self.cards:
             return
-        lost_card = self.cards.pop() if len(self.cards) == 1 else self.cards.pop(random.randint(0, 1))
+        lost_card = self.cards.pop() if len(self.cards) == 1 else self.cards.pop(rng.randint(0, 1))
         # print(f"Player {self.id} loses {lost_card.name}")
         # print("Remaining cards:", end=" ")
         # print_cards(self.cards)
@@ -48,7 +52,7 @@ class Player:
         # print(card.name, end=" ")
     # print()
 
-def challenge(challenger: Player, action: Action, target: Player, deck: list):
+def challenge(challenger: Player, action: Action, target: Player, deck: Deck, rng=random):
     claim_card = {
         Action.TAX: Card.DUKE,
         Action.EXCHANGE: Card.AMBASSADOR,
@@ -64,41 +68,37 @@ def challenge(challenger: Player, action: Action, target: Player, deck: list):
 
     if claim_card in target.cards:
         # print(f"Challenge failed! Player {target.id} had {claim_card.name}.")
-        challenger.lose_influence()
+        challenger.lose_influence(rng)
         target.cards.remove(claim_card)
-        deck.append(claim_card)
-        random.shuffle(deck)
-        target.cards.append(deck.pop())
+        target.cards.append(Card(deck.swap(claim_card.value)))
         return False
     else:
         # print(f"Challenge successful! Player {target.id} did not have {claim_card.name}.")
-        target.lose_influence()
+        target.lose_influence(rng)
         return True
 
-def counteract(action: Action):
+def counteract(action: Action, rng=random):
     if action == Action.ASSASSINATE:
         return Card.CONTESSA
     elif action == Action.STEAL:
-        return random.choice([Card.CAPTAIN, Card.AMBASSADOR])
+        return rng.choice([Card.CAPTAIN, Card.AMBASSADOR])
     elif action == Action.FOREIGN_AID:
         return Card.DUKE
     return None
 
-def counteract_challenge(challenger: Player, claim_card: Card, target: Player, deck: list):
+def counteract_challenge(challenger: Player, claim_card: Card, target: Player, deck: Deck, rng=random):
     if claim_card in target.cards:
         # print(f"Challenge failed! Player {target.id} had {claim_card.name}.")
-        challenger.lose_influence()
+        challenger.lose_influence(rng)
         target.cards.remove(claim_card)
-        deck.append(claim_card)
-        random.shuffle(deck)
-        target.cards.append(deck.pop())
+        target.cards.append(Card(deck.swap(claim_card.value)))
         return False
     else:
         # print(f"Challenge successful! Player {target.id} did not have {claim_card.name}.")
-        target.lose_influence()
+        target.lose_influence(rng)
         return True
 
-def perform_action(player: Player, action: Action, target: Player, deck: list):
+def perform_action(player: Player, action: Action, target: Player, deck: Deck, rng=random):
     # print(f"Player {player.id} performs {action.name}", end="")
     # if target:
         # print(f" on Player {target.id}", end="")
@@ -110,37 +110,49 @@ def perform_action(player: Player, action: Action, target: Player, deck: list):
         player.coins += 3
     elif action == Action.ASSASSINATE:
         player.coins -= 3
-        target.lose_influence()
+        target.lose_influence(rng)
     elif action == Action.STEAL:
         stolen = min(2, target.coins)
         target.coins -= stolen
         player.coins += stolen
     elif action == Action.EXCHANGE:
         num_to_draw = 2 if len(player.cards) == 2 else 1
-        drawn = [deck.pop() for _ in range(num_to_draw)]
+        drawn = [Card(deck.draw()) for _ in range(num_to_draw)]
         # print(f"Player {player.id} draws {len(drawn)} card(s): {[c.name for c in drawn]}")
         combined = player.cards + drawn
-        random.shuffle(combined)
+        rng.shuffle(combined)
         num_to_keep = len(player.cards)
         player.cards = combined[:num_to_keep]
         returned = combined[num_to_keep:]
-        deck.extend(returned)
-        random.shuffle(deck)
+        for card in returned:
+            deck.put(card.value)
         # print(f"Player {player.id}'s new hand after Exchange:")
         # print_cards(player.cards)
     # print("----")
 
-def main():
-    num_players = 5
-    deck = [card for card in Card] * 3
-    random.shuffle(deck)
+CLAIMED_BY = (Action.TAX, Action.EXCHANGE, Action.ASSASSINATE, Action.STEAL)
+# Records use the game/actions.py codes (INCOME = 0, same order). Recording reads
+# _value_, the plain attribute behind the much slower Enum.value descriptor.
+ACTION_BASE = Action.INCOME.value
+
+
+def _id(player):
+    return -1 if player is None else player.id
+
+
+def main(num_players=5, rng=random, recorder=None, seed=0):
+    # recorder (a records.GameRecordWriter) gets the deal and one event per turn;
+    # seed is stored with the game and should be what rng was seeded with for it
+    deck = Deck(3, rng)
 
     players = [Player(i) for i in range(num_players)]
     for player in players:
-        player.cards = [deck.pop(), deck.pop()]
+        player.cards = [Card(deck.draw()), Card(deck.draw())]
         # print(f"Player {player.id} starts with:")
         # print_cards(player.cards)
     # print()
+    if recorder is not None:
+        recorder.start_game(seed, [[card.value for card in player.cards] for player in players])
 
     current_player_idx = 0
 
@@ -148,6 +160,8 @@ def main():
         alive_players = [p for p in players if p.alive]
         if len(alive_players) == 1:
             # print(f"Player {alive_players[0].id} wins!")
+            if recorder is not None:
+                recorder.end_game(alive_players[0].id)
             return alive_players[0].id
 
         current_player = players[current_player_idx]
@@ -159,69 +173,85 @@ def main():
         if current_player.coins >= 10:
             action = Action.COUP
         else:
-            action = random.choice(current_player.get_legal_actions())
+            action = rng.choice(current_player.get_legal_actions())
         # print(f"Player {current_player.id} chose: {action.name}")
 
         target = None
         if action in [Action.COUP, Action.ASSASSINATE, Action.STEAL]:
             targets = [p for p in players if p != current_player and p.alive]
             if targets:
-                target = random.choice(targets)
+                target = rng.choice(targets)
 
         if action == Action.INCOME:
             current_player.coins += 1
+            if recorder is not None:
+                recorder.event(current_player.id, action._value_ - ACTION_BASE, outcome=PERFORMED)
             current_player_idx = (current_player_idx + 1) % num_players
             continue
         elif action == Action.COUP:
             current_player.coins -= 7
-            target.lose_influence()
+            target.lose_influence(rng)
+            if recorder is not None:
+                recorder.event(current_player.id, action._value_ - ACTION_BASE, target.id, outcome=PERFORMED)
             current_player_idx = (current_player_idx + 1) % num_players
             continue
 
         challenger = None
-        if random.random() < 0.3:
+        if rng.random() < 0.3:
             challengers = [p for p in players if p != current_player and p.alive]
             if challengers:
-                challenger = random.choice(challengers)
+                challenger = rng.choice(challengers)
 
         successful_challenge = False
         if challenger:
-            successful_challenge = challenge(challenger, action, current_player, deck)
+            successful_challenge = challenge(challenger, action, current_player, deck, rng)
             if successful_challenge:
+                if recorder is not None:
+                    recorder.event(current_player.id, action._value_ - ACTION_BASE, _id(target),
+                                   challenger=challenger.id, outcome=CHALLENGED | CHALLENGE_SUCCEEDED)
                 current_player_idx = (current_player_idx + 1) % num_players
                 continue
 
         counteractor = None
         counteract_challenger = None
         counter_claim = None
-        if action in [Action.FOREIGN_AID, Action.ASSASSINATE, Action.STEAL] and random.random() < 0.3:
+        if action in [Action.FOREIGN_AID, Action.ASSASSINATE, Action.STEAL] and rng.random() < 0.3:
             if action == Action.FOREIGN_AID:
-                counteractor = random.choice([p for p in players if p != current_player and p.alive])
+                counteractor = rng.choice([p for p in players if p != current_player and p.alive])
             elif target and target.alive:
                 counteractor = target
 
             if counteractor:
-                counter_claim = counteract(action)
+                counter_claim = counteract(action, rng)
                 # print(f"Player {counteractor.id} counteracts with {counter_claim.name}")
-                if random.random() < 0.5:
+                if rng.random() < 0.5:
                     challengers = [p for p in players if p != counteractor and p.alive]
                     if challengers:
-                        counteract_challenger = random.choice(challengers)
+                        counteract_challenger = rng.choice(challengers)
 
         if counteractor and counteract_challenger:
             # print(f"Player {counteract_challenger.id} challenges counteraction!")
-            if counteract_challenge(counteract_challenger, counter_claim, counteractor, deck):
-                perform_action(current_player, action, target, deck)
+            outcome = BLOCKED | BLOCK_CHALLENGED
+            if counteract_challenge(counteract_challenger, counter_claim, counteractor, deck, rng):
+                perform_action(current_player, action, target, deck, rng)
+                outcome |= BLOCK_CHALLENGE_SUCCEEDED | PERFORMED
         elif not counteractor:
-            perform_action(current_player, action, target, deck)
+            perform_action(current_player, action, target, deck, rng)
+            outcome = PERFORMED
+        else:
+            outcome = BLOCKED
+
+        if recorder is not None:
+            # A challenge of an action that claims no card has no effect and is not recorded
+            challenged = challenger is not None and action in CLAIMED_BY
+            recorder.event(current_player.id, action._value_ - ACTION_BASE, _id(target),
+                           -1 if counter_claim is None else counter_claim._value_, _id(counteractor),
+                           challenger.id if challenged else -1, _id(counteract_challenger),
+                           outcome | (CHALLENGED if challenged else 0))
 
         current_player_idx = (current_player_idx + 1) % num_players
 
-# Run the game
-main()
+if __name__ == "__main__":
+    from game.runner import run_games
 
-players = [0, 0, 0, 0, 0]
-for i in range(1000000):
-    player = main()
-    players[player] += 1
-print(players)
\ No newline at end of file
+    print(run_games(1000000, seed=0))
\ No newline at end of file
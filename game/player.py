@@ -1,18 +1,25 @@
 class Player:
-    def __init__(self, player_id):
+    __slots__ = ("id", "coins", "cards", "lost_cards", "alive", "state")
+
+    def __init__(self, player_id, state=None):
         self.id = player_id
         self.coins = 2
         self.cards = []
         self.lost_cards = []
         self.alive = True
+        # GameState the player sits in; told when the player is eliminated so
+        # its alive index stays in step with direct lose_influence() calls
+        self.state = state
 
     def is_alive(self):
         return len(self.cards) > 0
 
     def lose_influence(self, card_to_lose=None):
-        if card_to_lose and card_to_lose in self.cards:
+        if card_to_lose is not None and card_to_lose in self.cards:
             self.cards.remove(card_to_lose)
         else:
             self.cards.pop()
         if not self.cards:
-            self.alive = False
\ No newline at end of file
+            self.alive = False
+            if self.state is not None:
+                self.state.eliminate(self.id)
@@ -0,0 +1,196 @@
+import glob
+import os
+import queue
+import threading
+from array import array
+
+import numpy as np
+
+# Binary game records: a directory of .npz chunks, each holding chunk_games
+# games as columns of small ints instead of printed text.
+#
+# Per game: seed, num_players, winner, initial hands (2 card codes per seat,
+# padded with -1 up to MAX_PLAYERS seats) and the range of its events.
+# Per event (one turn): the EVENT_FIELDS below, -1 where a field does not
+# apply. Actions use the game/actions.py codes and cards the game/cards.py codes.
+
+MAX_PLAYERS = 6
+EVENT_FIELDS = ("actor", "action", "target", "claim", "blocker", "challenger", "block_challenger", "outcome")
+
+# outcome bit flags
+CHALLENGED = 1
+CHALLENGE_SUCCEEDED = 2  # the actor was bluffing; the action is cancelled
+BLOCKED = 4
+BLOCK_CHALLENGED = 8
+BLOCK_CHALLENGE_SUCCEEDED = 16  # the blocker was bluffing; the block fails
+PERFORMED = 32
+
+_NO_HANDS = (-1,) * (2 * MAX_PLAYERS)
+
+
+class GameRecordWriter:
+    """Append game records to chunk files in the directory path.
+
+    Columns are built in flat arrays while games are played; every chunk_games
+    games the full chunk is handed to a background thread that writes it with
+    np.savez, so the simulation does not wait on compression or disk. close()
+    (or leaving the with block) writes the last partial chunk and waits for
+    the writer.
+
+        with GameRecordWriter("records") as writer:
+            writer.start_game(seed, hands)
+            writer.event(actor, action, target, ...)
+            writer.end_game(winner)
+    """
+
+    def __init__(self, path, chunk_games=65536, compress=False):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_games = chunk_games
+        self._save = np.savez_compressed if compress else np.savez
+        self._chunk = len(glob.glob(os.path.join(path, "chunk-*.npz")))
+        self._error = None
+        self._queue = queue.Queue(maxsize=2)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._seeds = array("Q")
+        self._players = array("b")
+        self._winners = array("b")
+        self._hands = array("b")
+        self._event_counts = array("I")
+        self._events = array("b")
+        self._game_start = 0
+
+    def start_game(self, seed, hands):
+        """hands[s] is the pair of card codes dealt to seat s."""
+        self._seeds.append(seed)
+        self._players.append(len(hands))
+        flat = [card for hand in hands for card in hand]
+        self._hands.extend(flat)
+        self._hands.extend(_NO_HANDS[len(flat):])
+        self._game_start = len(self._events)
+
+    def event(self, actor, action, target=-1, claim=-1, blocker=-1, challenger=-1, block_challenger=-1, outcome=0):
+        self._events.extend((actor, action, target, claim, blocker, challenger, block_challenger, outcome))
+
+    def end_game(self, winner):
+        self._winners.append(winner)
+        self._event_counts.append((len(self._events) - self._game_start) // len(EVENT_FIELDS))
+        if len(self._winners) >= self.chunk_games:
+            self.flush()
+
+    def flush(self):
+        """Queue the games recorded so far as one chunk."""
+        if self._error is not None:
+            raise self._error
+        if not self._winners:
+            return
+        fields = len(EVENT_FIELDS)
+        events = np.frombuffer(self._events, dtype=np.int8).reshape(-1, fields)
+        chunk = {
+            "seed": np.frombuffer(self._seeds, dtype=np.uint64),
+            "num_players": np.frombuffer(self._players, dtype=np.int8),
+            "winner": np.frombuffer(self._winners, dtype=np.int8),
+            "hands": np.frombuffer(self._hands, dtype=np.int8).reshape(-1, MAX_PLAYERS, 2),
+            "event_count": np.frombuffer(self._event_counts, dtype=np.uint32),
+        }
+        chunk.update({name: events[:, i] for i, name in enumerate(EVENT_FIELDS)})
+        path = os.path.join(self.path, f"chunk-{self._chunk:05d}.npz")
+        self._chunk += 1
+        self._queue.put((path, chunk))
+        # The queued arrays are views of these buffers, so start fresh ones
+        self._new_chunk()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, chunk = item
+            try:
+                self._save(path, **chunk)
+            except Exception as e:  # surfaced on the next flush or close
+                self._error = e
+
+    def close(self):
+        """Write the finished games and stop the writer; a game left unfinished (an
+        exception inside the with block) is dropped."""
+        if len(self._seeds) > len(self._winners):
+            del self._seeds[-1], self._players[-1], self._events[self._game_start:]
+            del self._hands[-2 * MAX_PLAYERS:]
+        if self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_chunks(path):
+    """Yield every chunk under the directory path (subdirectories included, e.g. runner.py shards)
+    as a dict of columns, with event_start offsets added."""
+    for file in sorted(glob.glob(os.path.join(path, "**", "chunk-*.npz"), recursive=True)):
+        with np.load(file) as data:
+            chunk = {name: data[name] for name in data.files}
+        chunk["event_start"] = np.concatenate([[0], np.cumsum(chunk["event_count"], dtype=np.int64)[:-1]])
+        yield chunk
+
+
+def iter_games(path):
+    """Yield every recorded game as a dict: seed, num_players, winner, hands and events (a list of dicts)."""
+    for chunk in read_chunks(path):
+        events = np.stack([chunk[name] for name in EVENT_FIELDS], axis=1).tolist()
+        for i in range(len(chunk["seed"])):
+            p = int(chunk["num_players"][i])
+            start, count = int(chunk["event_start"][i]), int(chunk["event_count"][i])
+            yield {
+                "seed": int(chunk["seed"][i]),
+                "num_players": p,
+                "winner": int(chunk["winner"][i]),
+                "hands": chunk["hands"][i, :p].tolist(),
+                "events": [dict(zip(EVENT_FIELDS, e)) for e in events[start:start + count]],
+            }
+
+
+def describe(game):
+    """Human-readable lines for one game from iter_games(), in place of the old printed traces."""
+    from game.actions import Action
+    from game.cards import Card
+
+    lines = [f"seed {game['seed']}: " + ", ".join(
+        f"player {p} {Card.NAMES[a]}/{Card.NAMES[b]}" for p, (a, b) in enumerate(game["hands"]))]
+    for e in game["events"]:
+        line = f"player {e['actor']} {Action.NAMES[e['action']]}"
+        if e["target"] >= 0:
+            line += f" on player {e['target']}"
+        if e["challenger"] >= 0:
+            line += f", challenged by {e['challenger']}" + (" (bluff)" if e["outcome"] & CHALLENGE_SUCCEEDED else "")
+        if e["blocker"] >= 0:
+            line += f", blocked by {e['blocker']} with {Card.NAMES[e['claim']]}"
+            if e["block_challenger"] >= 0:
+                line += f", challenged by {e['block_challenger']}"
+                line += " (bluff)" if e["outcome"] & BLOCK_CHALLENGE_SUCCEEDED else ""
+        lines.append(line + ("" if e["outcome"] & PERFORMED else " -> cancelled"))
+    lines.append(f"player {game['winner']} wins")
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+    import itertools
+
+    parser = argparse.ArgumentParser(description="Print recorded games")
+    parser.add_argument("path", help="record directory (e.g. from runner.py --record)")
+    parser.add_argument("--games", type=int, default=1)
+    args = parser.parse_args()
+    for game in itertools.islice(iter_games(args.path), args.games):
+        print("\n".join(describe(game)) + "\n")
@@ -0,0 +1,123 @@
+import random
+from array import array
+
+import numpy as np
+
+from game.engine import Engine
+
+# Deterministic replay of rules-engine games (game/engine.py) from a seed and
+# the list of decisions. The engine's rng is reseeded from (seed, step) at
+# every checkpoint step, so the random draws between two checkpoints only
+# depend on that pair. A checkpoint is just Engine.snapshot() (3 * players + 14
+# ints): to rebuild step k, restore the checkpoint before k, reseed and
+# fast-forward at most checkpoint_every decisions.
+
+CHECKPOINT_EVERY = 128
+
+
+def step_seed(seed, step):
+    """Seed of the engine rng from decision step onwards (at checkpoint steps)."""
+    return seed << 32 | step
+
+
+class GameLog:
+    """Seed, decisions and checkpoints of one engine game.
+
+    record(engine) starts a game on engine: its rng is seeded and it is reset.
+    Pass every decision through step() afterwards. state(k) rebuilds the game
+    after k decisions on a separate engine.
+    """
+
+    def __init__(self, seed, num_players, checkpoint_every=CHECKPOINT_EVERY):
+        self.seed = seed
+        self.num_players = num_players
+        self.checkpoint_every = checkpoint_every
+        self.actions = array("b")
+        self.checkpoints = []
+        self._engine = None
+
+    def __len__(self):
+        return len(self.actions)
+
+    def record(self, engine):
+        engine.rng.seed(self.seed)
+        engine.reset()
+        self._engine = engine
+
+    def step(self, action):
+        """engine.step(action), logged."""
+        engine = self._engine
+        k = len(self.actions)
+        if k % self.checkpoint_every == 0:
+            self.checkpoints.append(engine.snapshot())
+            engine.rng.seed(step_seed(self.seed, k))
+        self.actions.append(action)
+        engine.step(action)
+
+    def state(self, k, engine=None):
+        """Engine (engine, or a new one) holding the game after the first k decisions."""
+        if not 0 <= k <= len(self.actions):
+            raise IndexError(f"step {k} outside the {len(self.actions)} logged decisions")
+        if engine is None:
+            engine = Engine(self.num_players, random.Random())
+        if not self.checkpoints:
+            engine.rng.seed(self.seed)
+            engine.reset()
+            return engine
+        c = min(k // self.checkpoint_every, len(self.checkpoints) - 1)
+        engine.restore(self.checkpoints[c])
+        for i in range(c * self.checkpoint_every, k):
+            if i % self.checkpoint_every == 0:
+                engine.rng.seed(step_seed(self.seed, i))
+            engine.step(self.actions[i])
+        return engine
+
+    def to_arrays(self):
+        return {
+            "header": np.array([self.seed >> 32, self.seed & 0xFFFFFFFF, self.num_players, self.checkpoint_every],
+                               dtype=np.uint64),
+            "actions": np.frombuffer(self.actions, dtype=np.int8).copy(),
+            "checkpoints": np.array(self.checkpoints, dtype=np.int16).reshape(len(self.checkpoints), -1),
+        }
+
+    @classmethod
+    def from_arrays(cls, header, actions, checkpoints):
+        high, low, num_players, every = (int(x) for x in header)
+        log = cls(high << 32 | low, num_players, every)
+        log.actions = array("b", actions.astype(np.int8).tobytes())
+        log.checkpoints = [tuple(row) for row in checkpoints.tolist()]
+        return log
+
+
+def save_logs(path, logs):
+    """Write logs to one .npz: per game a header, then all decisions and checkpoints concatenated."""
+    parts = [log.to_arrays() for log in logs]
+    width = 3 * max((log.num_players for log in logs), default=0) + 14
+    checkpoints = np.zeros((sum(len(p["checkpoints"]) for p in parts), width), dtype=np.int16)
+    row = 0
+    for p in parts:
+        n, w = p["checkpoints"].shape
+        checkpoints[row:row + n, :w] = p["checkpoints"]
+        row += n
+    np.savez(
+        path,
+        header=np.array([p["header"] for p in parts], dtype=np.uint64).reshape(-1, 4),
+        num_actions=np.array([len(p["actions"]) for p in parts], dtype=np.int64),
+        num_checkpoints=np.array([len(p["checkpoints"]) for p in parts], dtype=np.int64),
+        actions=np.concatenate([p["actions"] for p in parts]) if parts else np.zeros(0, dtype=np.int8),
+        checkpoints=checkpoints,
+    )
+
+
+def load_logs(path):
+    with np.load(path) as data:
+        header, actions, checkpoints = data["header"], data["actions"], data["checkpoints"]
+        num_actions, num_checkpoints = data["num_actions"], data["num_checkpoints"]
+    logs = []
+    a = c = 0
+    for h, na, nc in zip(header, num_actions, num_checkpoints):
+        width = 3 * int(h[2]) + 14
+        logs.append(GameLog.from_arrays(h, actions[a:a + na], checkpoints[c:c + nc, :width]))
+        a += na
+        c += nc
+    return logs
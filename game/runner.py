@@ -0,0 +1,93 @@
+# Sharded multi-process runner for the win-rate sweep in main.py.
+# The game count is split into shards, each played by a worker process with its
+# own seeded random.Random, and the per-shard win counts are summed. Results only
+# depend on (seed, num_shards), not on how many workers ran the shards.
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from game.main import main as play_game
+
+ENGINES = ("python", "batch")
+# Default shard count; fixed so results do not depend on the machine (workers
+# only sets how many processes play the shards)
+NUM_SHARDS = 64
+
+
+def shard_seed(seed, shard):
+    """64-bit seed for one shard, derived from the run seed."""
+    return random.Random(f"{seed}:{shard}").getrandbits(64)
+
+
+def shard_sizes(num_games, num_shards):
+    """Split num_games into num_shards near-equal parts."""
+    base, extra = divmod(num_games, num_shards)
+    return [base + (1 if i < extra else 0) for i in range(num_shards)]
+
+
+def run_shard(num_games, num_players=5, seed=None, engine="python", record=None):
+    """Play num_games games with a private RNG and return the wins per seat.
+
+    With record (a directory) every game is also written there as a binary
+    game record; each game then gets its own seed, drawn from the shard's, so
+    any recorded game can be replayed on its own.
+    """
+    if engine == "batch":
+        if record is not None:
+            raise ValueError("the batch engine does not record games")
+        from game.batch_sim import simulate
+        return simulate(num_games, num_players, seed)
+
+    rng = random.Random(seed)
+    wins = [0] * num_players
+    if record is None:
+        for _ in range(num_games):
+            wins[play_game(num_players, rng)] += 1
+        return wins
+
+    from game.records import GameRecordWriter
+    seeds = rng
+    rng = random.Random()
+    with GameRecordWriter(record) as writer:
+        for _ in range(num_games):
+            game_seed = seeds.getrandbits(64)
+            rng.seed(game_seed)
+            wins[play_game(num_players, rng, writer, game_seed)] += 1
+    return wins
+
+
+def run_games(num_games, num_players=5, seed=0, num_shards=NUM_SHARDS, workers=None, engine="python",
+              record=None):
+    """Play num_games games across a process pool and return the wins per seat.
+
+    With record, each shard writes its game records to record/shard-<n>.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    sizes = shard_sizes(num_games, num_shards)
+
+    wins = [0] * num_players
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_shard, size, num_players, shard_seed(seed, shard), engine,
+                        None if record is None else os.path.join(record, f"shard-{shard:04d}"))
+            for shard, size in enumerate(sizes) if size > 0
+        ]
+        for future in futures:
+            for seat, count in enumerate(future.result()):
+                wins[seat] += count
+    return wins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded random-policy Coup win rates per seat")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shards", type=int, default=NUM_SHARDS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per cpu)")
+    parser.add_argument("--engine", choices=ENGINES, default="python")
+    parser.add_argument("--record", default=None, help="directory to write binary game records to")
+    args = parser.parse_args()
+    print(run_games(args.games, args.players, args.seed, args.shards, args.workers, args.engine, args.record))
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from game.batch_sim import BatchGame, simulate, EMPTY, DUKE, CAPTAIN, CONTESSA, NUM_CARD_TYPES, COPIES_PER_CARD
+
+
+class BatchSimTest(unittest.TestCase):
+    def setUp(self):
+        self.game = BatchGame(4, 3, np.random.default_rng(0))
+
+    def test_initial_deal(self):
+        in_hands = np.bincount(self.game.hands[0].reshape(-1), minlength=NUM_CARD_TYPES)
+        self.assertTrue(((self.game.deck[0] + in_hands) == COPIES_PER_CARD).all())
+        self.assertEqual(self.game.deck.sum(axis=1).tolist(), [9] * 4)
+
+    def test_lose_influence_two_cards(self):
+        self.game._lose_influence(np.array([0]), np.array([1]))
+        self.assertNotEqual(self.game.hands[0, 1, 0], EMPTY)
+        self.assertEqual(self.game.hands[0, 1, 1], EMPTY)
+        self.assertEqual(self.game.alive[0], 0b111)
+
+    def test_lose_influence_last_card(self):
+        g, p = np.array([0, 0]), np.array([1, 1])
+        self.game._lose_influence(g[:1], p[:1])
+        self.game._lose_influence(g[1:], p[1:])
+        self.assertEqual(self.game.hands[0, 1].tolist(), [EMPTY, EMPTY])
+        self.assertEqual(self.game.alive[0], 0b101)
+
+    def test_challenge_success(self):
+        self.game.hands[0, 0] = [CAPTAIN, CONTESSA]
+        caught = self.game._challenge(np.array([0]), np.array([0]), np.array([1]), np.array([DUKE]))
+        self.assertTrue(caught[0])
+        self.assertEqual(self.game.hands[0, 0, 1], EMPTY)
+        self.assertNotEqual(self.game.hands[0, 1, 1], EMPTY)
+
+    def test_challenge_failure_redraws(self):
+        self.game.hands[0, 0] = [DUKE, CONTESSA]
+        self.game.deck[0] = [1, 2, 2, 2, 2]
+        caught = self.game._challenge(np.array([0]), np.array([0]), np.array([1]), np.array([DUKE]))
+        self.assertFalse(caught[0])
+        self.assertEqual(self.game.hands[0, 1, 1], EMPTY)
+        self.assertEqual(self.game.deck[0].sum(), 9)
+        self.assertNotEqual(self.game.hands[0, 0, 1], EMPTY)
+
+    def test_exchange_keeps_hand_size(self):
+        self.game._lose_influence(np.array([1]), np.array([0]))
+        self.game._exchange(np.array([0, 1]), np.array([0, 0]))
+        self.assertNotEqual(self.game.hands[0, 0, 1], EMPTY)
+        self.assertEqual(self.game.hands[1, 0, 1], EMPTY)
+        self.assertEqual(self.game.deck[:2].sum(axis=1).tolist(), [9, 9])
+
+    def test_run_finishes_with_one_player(self):
+        game = BatchGame(1000, 4, np.random.default_rng(1))
+        winners = game.run()
+        self.assertTrue(((winners >= 0) & (winners < 4)).all())
+        self.assertTrue((game.alive == 1 << winners).all())
+        self.assertTrue((game.deck.sum(axis=1) == 7).all())
+        self.assertTrue((game.coins >= 0).all())
+
+    def test_simulate_histogram(self):
+        wins = simulate(5000, 5, seed=3, batch_size=2048)
+        self.assertEqual(len(wins), 5)
+        self.assertEqual(sum(wins), 5000)
+        self.assertEqual(wins, simulate(5000, 5, seed=3, batch_size=2048))
+
+    def test_invalid_player_count(self):
+        with self.assertRaises(ValueError):
+            BatchGame(1, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,10 @@
+import random
 import unittest
-from main import Player, Card, Action, perform_action, challenge, counteract_challenge
+from game.main import Player, Card, Action, Deck, perform_action, challenge, counteract_challenge, main
 
 class CoupGameTest(unittest.TestCase):
     def setUp(self):
-        self.deck = [Card.DUKE, Card.ASSASSIN, Card.AMBASSADOR, Card.CAPTAIN, Card.CONTESSA] * 3
+        self.deck = Deck(3, random.Random(0))
         self.player1 = Player(0)
         self.player2 = Player(1)
         self.player1.cards = [Card.DUKE, Card.CAPTAIN]
@@ -140,5 +141,18 @@ class CoupGameTest(unittest.TestCase):
         # Deck size should remain the same after draw and return
         self.assertEqual(len(deck_copy), len(self.deck))
 
+    def test_seeded_rng_reproducible(self):
+        winners = [main(5, random.Random(42)) for _ in range(20)]
+        self.assertEqual(winners, [main(5, random.Random(42)) for _ in range(20)])
+
+    def test_lose_influence_uses_rng(self):
+        kept = set()
+        for seed in range(20):
+            player = Player(0)
+            player.cards = [Card.DUKE, Card.CAPTAIN]
+            player.lose_influence(random.Random(seed))
+            kept.add(player.cards[0])
+        self.assertEqual(kept, {Card.DUKE, Card.CAPTAIN})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import random
+import unittest
+from game.actions import Action
+from game.cards import Card
+from game.engine import Engine, EMPTY, ACTION_SELECTION, CHALLENGE, COUNTER, CHALLENGE_DECISION, OPEN_LEGAL
+
+
+class EngineTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine(3, random.Random(0))
+
+    def test_initial_deal(self):
+        self.assertEqual(len(self.engine.deck), 9)
+        self.assertNotIn(EMPTY, self.engine.hands)
+        self.assertEqual(self.engine.alive, 0b111)
+
+    def test_legal_actions_by_coins(self):
+        self.assertNotIn(Action.ASSASSINATE, self.engine.legal_actions())
+        self.engine.coins[0] = 7
+        self.assertEqual(self.engine.legal_actions(), (Action.INCOME, Action.FOREIGN_AID, Action.COUP, Action.PASS))
+
+    def test_open_legal_keeps_every_action_at_seven_coins(self):
+        engine = Engine(3, random.Random(0), legal=OPEN_LEGAL)
+        engine.coins[0] = 8
+        self.assertEqual(engine.legal_actions(), tuple(range(Action.PASS + 1)))
+        self.assertEqual(engine.clone().legal_actions(), engine.legal_actions())
+        engine.step(Action.TAX)
+        self.assertEqual((engine.phase, engine.pending_action), (CHALLENGE, Action.TAX))
+
+    def test_challenge_phase_mask(self):
+        self.engine.step(Action.TAX)
+        self.assertEqual(self.engine.phase, CHALLENGE)
+        self.assertEqual(self.engine.to_act, 1)
+        self.assertEqual(self.engine.legal_actions(), (CHALLENGE_DECISION, Action.PASS))
+
+    def test_counter_phase_mask(self):
+        self.engine.step(Action.FOREIGN_AID)
+        self.assertEqual(self.engine.phase, COUNTER)
+        self.assertEqual(self.engine.legal_actions(), (Card.DUKE, Action.PASS))
+
+    def test_block_stands_unchallenged(self):
+        self.engine.step(Action.FOREIGN_AID)
+        self.engine.step(Card.DUKE)
+        self.engine.step(Action.PASS)
+        self.engine.step(Action.PASS)
+        self.assertEqual(self.engine.phase, ACTION_SELECTION)
+        self.assertEqual(self.engine.coins[0], 2)
+        self.assertEqual(self.engine.to_act, 1)
+
+    def test_restore_replays_the_same_game(self):
+        rng = random.Random(2)
+        for _ in range(5):
+            self.engine.step(rng.choice(self.engine.legal_actions()))
+        state = self.engine.snapshot()
+        self.assertEqual(len(state), 3 * 3 + 14)
+        decisions = [rng.randrange(8) for _ in range(40)]
+
+        self.engine.rng.seed(5)
+        for action in decisions:
+            self.engine.step(action)
+        after = self.engine.snapshot()
+
+        self.engine.restore(state)
+        self.assertEqual(self.engine.snapshot(), state)
+        self.engine.rng.seed(5)
+        for action in decisions:
+            self.engine.step(action)
+        self.assertEqual(self.engine.snapshot(), after)
+
+    def test_clone_is_independent(self):
+        clone = self.engine.clone(random.Random(3))
+        self.assertEqual(clone.snapshot(), self.engine.snapshot())
+        clone.step(Action.INCOME)
+        self.assertEqual(self.engine.coins[0], 2)
+        self.assertEqual(self.engine.to_act, 0)
+        self.assertEqual(len(self.engine.deck), 9)
+
+    def test_random_games_end_with_one_seat(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            self.engine.reset()
+            while not self.engine.is_over():
+                self.engine.step(rng.choice(self.engine.legal_actions()))
+            self.assertEqual(self.engine.alive, 1 << self.engine.winner)
+            self.assertEqual(len(self.engine.deck), 9)
+
+    def test_random_targets_keep_seats_balanced(self):
+        # Random turns with every responder passing, as rl/ plays them
+        engine = Engine(3, random.Random(0), random_targets=True)
+        rng = random.Random(1)
+        wins = [0] * 3
+        for _ in range(3000):
+            engine.reset()
+            while not engine.is_over():
+                if engine.phase == ACTION_SELECTION:
+                    engine.step(rng.choice(engine.legal_actions()))
+                else:
+                    engine.step(Action.PASS)
+            wins[engine.winner] += 1
+        for seat_wins in wins:
+            self.assertAlmostEqual(seat_wins / 3000, 1 / 3, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
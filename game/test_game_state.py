@@ -0,0 +1,148 @@
+import random
+import unittest
+from game.actions import Action
+from game.cards import Card
+from game.deck import Deck
+from game.game_state import GameState
+from game.history import History
+from game.player import Player
+
+
+class DeckTest(unittest.TestCase):
+    def test_draw_empties_deck(self):
+        deck = Deck(1, random.Random(0))
+        drawn = sorted(deck.draw() for _ in range(5))
+        self.assertEqual(drawn, Card.ALL_CARDS)
+        self.assertEqual(len(deck), 0)
+        with self.assertRaises(IndexError):
+            deck.draw()
+
+    def test_swap_keeps_size(self):
+        deck = Deck(3, random.Random(0))
+        deck.draw()
+        deck.swap(Card.DUKE)
+        self.assertEqual(len(deck), 14)
+
+
+class HistoryTest(unittest.TestCase):
+    def test_pack_round_trip(self):
+        history = History()
+        history.append(2, Action.STEAL, 0, Card.CAPTAIN)
+        history.append(1, Action.INCOME)
+        self.assertEqual(list(history), [(2, Action.STEAL, 0, Card.CAPTAIN), (1, Action.INCOME, None, None)])
+
+    def test_ring_buffer_keeps_latest(self):
+        history = History(capacity=4)
+        for i in range(6):
+            history.append(i, Action.INCOME)
+        self.assertEqual(len(history), 4)
+        self.assertEqual([event[0] for event in history], [2, 3, 4, 5])
+        self.assertEqual(history[-1][0], 5)
+
+
+class GameStateTest(unittest.TestCase):
+    def setUp(self):
+        self.game = GameState(3, random.Random(0))
+
+    def test_initial_deal(self):
+        self.assertEqual(len(self.game.deck), 9)
+        for player in self.game.players:
+            self.assertEqual(len(player.cards), 2)
+
+    def test_compact_players(self):
+        self.assertFalse(hasattr(self.game.players[0], "__dict__"))
+        self.assertFalse(hasattr(self.game, "__dict__"))
+
+    def test_challenge_failed_redraws(self):
+        self.game.players[0].cards = [Card.DUKE, Card.CONTESSA]
+        self.assertTrue(self.game.challenge(1, 0, Card.DUKE))
+        self.assertEqual(len(self.game.players[0].cards), 2)
+        self.assertEqual(len(self.game.players[1].cards), 1)
+        self.assertEqual(len(self.game.deck), 9)
+
+    def test_challenge_succeeds(self):
+        self.game.players[0].cards = [Card.CAPTAIN, Card.CONTESSA]
+        self.assertFalse(self.game.challenge(1, 0, Card.DUKE))
+        self.assertEqual(len(self.game.players[0].cards), 1)
+
+    def test_exchange_returns_cards(self):
+        self.game.perform_action(0, Action.EXCHANGE, claim_card=Card.AMBASSADOR)
+        self.assertEqual(len(self.game.players[0].cards), 2)
+        self.assertEqual(len(self.game.deck), 9)
+        self.assertEqual(self.game.history[-1], (0, Action.EXCHANGE, None, Card.AMBASSADOR))
+
+    def test_exchange_keeps_hand_size(self):
+        self.game.players[0].cards = [Card.DUKE]
+        self.game.perform_action(0, Action.EXCHANGE, claim_card=Card.AMBASSADOR)
+        self.assertEqual(len(self.game.players[0].cards), 1)
+        self.assertEqual(len(self.game.deck), 9)
+
+    def test_alive_index_follows_deaths(self):
+        self.game.players[1].cards = [Card.CAPTAIN]
+        self.game.players[0].cards = [Card.DUKE]
+        self.game.challenge(1, 0, Card.DUKE)
+        self.assertEqual(self.game.alive, 0b101)
+        self.assertEqual([p.id for p in self.game.get_alive_players()], [0, 2])
+        self.game.next_player()
+        self.assertEqual(self.game.current_player_idx, 2)
+        self.game.next_player()
+        self.assertEqual(self.game.current_player_idx, 0)
+        self.assertFalse(self.game.is_game_over())
+
+    def test_direct_player_loss_updates_alive_index(self):
+        player = self.game.players[1]
+        player.cards = [Card.DUKE]
+        player.lose_influence()
+        self.assertEqual(self.game.alive, 0b101)
+        self.assertEqual(self.game.num_alive, 2)
+        self.assertFalse(self.game.is_alive(1))
+
+    def test_alive_index_agrees_with_players(self):
+        rng = random.Random(3)
+        for _ in range(200):
+            game = GameState(4, rng)
+            while not game.is_game_over():
+                player = game.get_current_player()
+                action = rng.choice(game.get_legal_actions(player.id))
+                others = [p.id for p in game.get_alive_players() if p.id != player.id]
+                target = rng.choice(others) if action in (Action.COUP, Action.ASSASSINATE, Action.STEAL) else None
+                challenger = rng.choice(others) if target is None and rng.random() < 0.3 else None
+                claim = {Action.TAX: Card.DUKE, Action.EXCHANGE: Card.AMBASSADOR}.get(action)
+                game.perform_action(player.id, action, target, claim, challenged_by=challenger if claim else None)
+                self.assertEqual([game.is_alive(p.id) for p in game.players], [p.is_alive() for p in game.players])
+                self.assertEqual([game.is_alive(p.id) for p in game.players], [p.alive for p in game.players])
+                self.assertEqual(game.num_alive, sum(p.is_alive() for p in game.players))
+
+    def test_coup_down_to_winner(self):
+        game = self.game
+        game.players[0].coins = 28
+        for target in (1, 1, 2, 2):
+            game.current_player_idx = 0
+            game.perform_action(0, Action.COUP, target)
+        self.assertTrue(game.is_game_over())
+        self.assertEqual(game.get_winner(), 0)
+        self.assertEqual(game.get_legal_actions(1), ())
+        self.assertFalse(game.perform_action(2, Action.INCOME))
+
+    def test_snapshot_round_trip(self):
+        game = self.game
+        state = game.snapshot()
+        game.players[0].coins = 7
+        game.perform_action(0, Action.COUP, 1)
+        game.perform_action(1, Action.EXCHANGE, claim_card=Card.AMBASSADOR)
+        game.restore(state)
+        self.assertEqual(game.snapshot(), state)
+        self.assertEqual(game.players[0].coins, 2)
+        self.assertEqual(len(game.players[1].cards), 2)
+        self.assertEqual(len(game.history), 0)
+        self.assertEqual(game.current_player_idx, 0)
+
+    def test_lose_duke_by_code(self):
+        player = Player(0)
+        player.cards = [Card.CAPTAIN, Card.DUKE]
+        player.lose_influence(Card.DUKE)
+        self.assertEqual(player.cards, [Card.CAPTAIN])
+
+
+if __name__ == '__main__':
+    unittest.main()
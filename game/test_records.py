@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+import unittest
+from game.main import main
+from game.records import GameRecordWriter, iter_games, read_chunks, describe, PERFORMED
+from game.runner import run_games, run_shard
+
+
+class RecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = self.dir.name
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip_in_chunks(self):
+        rng = random.Random(0)
+        with GameRecordWriter(self.path, chunk_games=30) as writer:
+            winners = [main(4, rng, writer, seed) for seed in range(100)]
+        self.assertEqual(len(list(read_chunks(self.path))), 4)
+        games = list(iter_games(self.path))
+        self.assertEqual([g["winner"] for g in games], winners)
+        self.assertEqual([g["seed"] for g in games], list(range(100)))
+        for game in games:
+            self.assertEqual(len(game["hands"]), 4)
+            self.assertTrue(all(e["actor"] in range(4) for e in game["events"]))
+            self.assertTrue(describe(game)[-1].endswith("wins"))
+
+    def test_recording_does_not_change_the_game(self):
+        with GameRecordWriter(self.path) as writer:
+            recorded = [main(5, random.Random(seed), writer, seed) for seed in range(50)]
+        self.assertEqual(recorded, [main(5, random.Random(seed)) for seed in range(50)])
+
+    def test_income_event(self):
+        with GameRecordWriter(self.path) as writer:
+            writer.start_game(7, [[0, 1], [2, 3]])
+            writer.event(1, 0, outcome=PERFORMED)
+            writer.end_game(1)
+        game = next(iter_games(self.path))
+        self.assertEqual(game["hands"], [[0, 1], [2, 3]])
+        self.assertEqual(game["events"], [{"actor": 1, "action": 0, "target": -1, "claim": -1, "blocker": -1,
+                                           "challenger": -1, "block_challenger": -1, "outcome": PERFORMED}])
+
+    def test_unfinished_game_is_dropped(self):
+        with self.assertRaises(RuntimeError):
+            with GameRecordWriter(self.path) as writer:
+                main(3, random.Random(0), writer, 0)
+                writer.start_game(1, [[0, 1], [2, 3], [4, 4]])
+                writer.event(0, 0, outcome=PERFORMED)
+                raise RuntimeError
+        games = list(iter_games(self.path))
+        self.assertEqual([g["seed"] for g in games], [0])
+        self.assertEqual(games[0]["winner"], main(3, random.Random(0)))
+
+    def test_recorded_seed_replays_the_game(self):
+        wins = run_shard(20, 3, seed=4, record=self.path)
+        games = list(iter_games(self.path))
+        self.assertEqual(sum(wins), 20)
+        for game in games:
+            self.assertEqual(main(3, random.Random(game["seed"])), game["winner"])
+
+    def test_runner_writes_one_directory_per_shard(self):
+        wins = run_games(40, 3, seed=1, num_shards=2, workers=1, record=self.path)
+        self.assertEqual(sorted(os.listdir(self.path)), ["shard-0000", "shard-0001"])
+        self.assertEqual(len(list(iter_games(self.path))), sum(wins))
+
+
+if __name__ == '__main__':
+    unittest.main()
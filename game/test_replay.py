@@ -0,0 +1,56 @@
+import os
+import random
+import tempfile
+import unittest
+from game.engine import Engine
+from game.replay import GameLog, save_logs, load_logs
+
+
+def play(log, engine, rng):
+    """Play one logged game with random decisions; returns the snapshot after every step."""
+    log.record(engine)
+    states = [engine.snapshot()]
+    while not engine.is_over():
+        log.step(rng.randrange(8))
+        states.append(engine.snapshot())
+    return states
+
+
+class ReplayTest(unittest.TestCase):
+    def test_state_at_every_step(self):
+        log = GameLog(12345, 3, checkpoint_every=4)
+        states = play(log, Engine(3, random.Random()), random.Random(0))
+        self.assertEqual(len(log.checkpoints), (len(log) + 3) // 4)
+        for k, state in enumerate(states):
+            self.assertEqual(log.state(k).snapshot(), state)
+
+    def test_same_seed_same_game(self):
+        first = play(GameLog(7, 4), Engine(4, random.Random()), random.Random(1))
+        second = play(GameLog(7, 4), Engine(4, random.Random()), random.Random(1))
+        self.assertEqual(first, second)
+
+    def test_state_out_of_range(self):
+        log = GameLog(1, 2)
+        play(log, Engine(2, random.Random()), random.Random(2))
+        with self.assertRaises(IndexError):
+            log.state(len(log) + 1)
+
+    def test_save_and_load(self):
+        logs, games = [], []
+        for seed, players in ((1, 2), (2, 5), (3 << 40, 3)):
+            log = GameLog(seed, players, checkpoint_every=8)
+            games.append(play(log, Engine(players, random.Random()), random.Random(seed)))
+            logs.append(log)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logs.npz")
+            save_logs(path, logs)
+            loaded = load_logs(path)
+        for log, states in zip(loaded, games):
+            self.assertEqual(len(log), len(states) - 1)
+            self.assertEqual(log.state(len(log)).snapshot(), states[-1])
+            self.assertEqual(log.state(len(log) // 2).snapshot(), states[len(log) // 2])
+        self.assertEqual(loaded[2].seed, 3 << 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
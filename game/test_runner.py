@@ -0,0 +1,41 @@
+import unittest
+from game.runner import NUM_SHARDS, run_games, run_shard, shard_seed, shard_sizes
+
+
+class RunnerTest(unittest.TestCase):
+    def test_shard_sizes(self):
+        self.assertEqual(shard_sizes(10, 3), [4, 3, 3])
+        self.assertEqual(shard_sizes(2, 4), [1, 1, 0, 0])
+
+    def test_shard_seed_stable(self):
+        self.assertEqual(shard_seed(0, 1), shard_seed(0, 1))
+        self.assertNotEqual(shard_seed(0, 1), shard_seed(0, 2))
+
+    def test_run_shard_counts(self):
+        wins = run_shard(50, 3, seed=7)
+        self.assertEqual(len(wins), 3)
+        self.assertEqual(sum(wins), 50)
+        self.assertEqual(wins, run_shard(50, 3, seed=7))
+
+    def test_same_seed_and_shards_independent_of_workers(self):
+        one = run_games(200, seed=1, num_shards=4, workers=1)
+        two = run_games(200, seed=1, num_shards=4, workers=2)
+        self.assertEqual(one, two)
+        self.assertEqual(sum(one), 200)
+
+    def test_default_shards_fixed(self):
+        wins = run_games(200, 3, seed=3, workers=1)
+        self.assertEqual(wins, run_games(200, 3, seed=3, num_shards=NUM_SHARDS, workers=2))
+
+    def test_batch_engine(self):
+        wins = run_games(1000, 4, seed=2, num_shards=2, workers=1, engine="batch")
+        self.assertEqual(sum(wins), 1000)
+        self.assertEqual(wins, run_games(1000, 4, seed=2, num_shards=2, workers=2, engine="batch"))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            run_games(10, engine="gpu")
+
+
+if __name__ == '__main__':
+    unittest.main()
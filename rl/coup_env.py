@@ -4,160 +4,103 @@ import numpy as np
 import random
 from enum import Enum
 
-class Card(Enum):
-    DUKE = 0
-    ASSASSIN = 1
-    AMBASSADOR = 2
-    CAPTAIN = 3
-    CONTESSA = 4
-
-class Action(Enum):
-    INCOME = 0
-    FOREIGN_AID = 1
-    COUP = 2
-    TAX = 3
-    ASSASSINATE = 4
-    EXCHANGE = 5
-    STEAL = 6
+# The rules live in game/engine.py; this is the Gymnasium adapter on top of it
+from game import actions as game_actions, cards as game_cards
+from game.engine import Engine, ACTION_SELECTION, OPEN_LEGAL, coin_bucket
+
+Card = Enum("Card", {name.upper(): code for code, name in enumerate(game_cards.Card.NAMES)})
+Action = Enum("Action", {name.upper(): code for code, name in enumerate(game_actions.Action.NAMES[:game_actions.Action.PASS])})
 
 NUM_PLAYERS = 3  # Will increase to more later
 
-class Player:
-    def __init__(self, player_id):
-        self.id = player_id
-        self.coins = 2
-        self.cards = []
-        self.alive = True
-
-    def lose_influence(self):
-        if self.cards:
-            self.cards.pop()
-        if not self.cards:
-            self.alive = False
-
-    def is_active(self):
-        return self.alive
-
-    def get_legal_actions(self):
-        if self.coins >= 10:
-            return [Action.COUP]
-        actions = list(Action)
-        if self.coins < 3:
-            actions = [a for a in actions if a != Action.ASSASSINATE]
-        if self.coins < 7:
-            actions = [a for a in actions if a != Action.COUP]
-        return actions
+# ACTION_MASKS[coin bucket] = legal actions when selecting (the engine's
+# OPEN_LEGAL rules); MUST_COUP is the only legal action at 10+ coins
+ACTION_MASKS = np.array(
+    [[a in actions for a in range(len(Action))] for actions in OPEN_LEGAL], dtype=bool
+)
+ACTION_MASKS.flags.writeable = False
+MUST_COUP = np.arange(len(Action)) == Action.COUP.value
+MUST_COUP.flags.writeable = False
 
 
 class CoupEnv(gym.Env):
+    """Whoever's turn it is picks an action; nobody challenges or blocks (responders always pass).
+
+    Coup, assassinate and steal hit a random other alive player.
+
+    Illegal actions are penalized and skip the turn; info["action_mask"] (or
+    action_masks()) gives the legal actions of the next player.
+    """
+
     def __init__(self):
         super(CoupEnv, self).__init__()
-        self.players = [Player(i) for i in range(NUM_PLAYERS)]
+        self.num_players = NUM_PLAYERS
+        self.rng = random.Random()
+        self.engine = Engine(self.num_players, self.rng, random_targets=True, legal=OPEN_LEGAL)
         self.current_player = 0
-        self.deck = []
-        self.winner = None
 
-        self.observation_space = spaces.Box(low=0, high=10, shape=(NUM_PLAYERS * 2,), dtype=np.int32)
+        self.observation_space = spaces.Box(low=0, high=10, shape=(self.num_players * 2,), dtype=np.int32)
         self.action_space = spaces.Discrete(len(Action))
 
     def reset(self, seed=None, options=None):
-        self.deck = [card for card in Card] * 3
-        random.shuffle(self.deck)
-        for p in self.players:
-            p.coins = 2
-            p.alive = True
-            p.cards = [self.deck.pop(), self.deck.pop()]
-        self.current_player = 0
-        return self._get_obs(), {}
+        super().reset(seed=seed)
+        if seed is not None:
+            self.rng.seed(seed)
+        self.engine.reset()
+        self.current_player = self.engine.to_act
+        return self._get_obs(), {"action_mask": self.action_masks().copy()}
 
     def _get_obs(self):
-        obs = []
-        for p in self.players:
-            obs.append(p.coins)
-            obs.append(len(p.cards))
-        return np.array(obs, dtype=np.int32)
+        obs = np.empty(2 * self.num_players, dtype=np.int32)
+        obs[0::2] = self.engine.coins
+        for p in range(self.num_players):
+            obs[2 * p + 1] = len(self.engine.cards(p))
+        return obs
 
     def step(self, action_idx):
-        action = Action(action_idx)
-        player = self.players[self.current_player]
-
-        if not player.alive:
-            self._next_player()
-            return self._get_obs(), 0, False, False, {}
-
-        target = self._select_target()
+        engine = self.engine
+        player = engine.to_act
         reward = 0
-        terminated = False
-
-        # Get legal actions
-        legal_actions = player.get_legal_actions()
+        info = {}
 
         # Special Coup override rule at 10+ coins
-        if player.coins >= 10 and action != Action.COUP:
-            # Enforce mandatory Coup
+        if engine.coins[player] >= 10 and action_idx != Action.COUP.value:
             reward = -10  # big penalty for illegal skip of coup
-            terminated = False
-            self._next_player()
-            return self._get_obs(), reward, terminated, False, {
-                "reason": "Coup required with 10+ coins"
-            }
-
-        # ILLEGAL ACTION handling
-        if action not in legal_actions:
-            # Option A (preferred): block and penalize
+            info = {"reason": "Coup required with 10+ coins"}
+            action_idx = game_actions.Action.PASS
+        # ILLEGAL ACTION handling: block and penalize
+        elif not self.action_masks()[action_idx]:
             reward = -5
-            terminated = False
-            self._next_player()
-            return self._get_obs(), reward, terminated, False, {
-                "reason": f"Illegal action: {action.name}"
-            }
-
-        # LEGAL ACTIONS
-        if action == Action.INCOME:
-            player.coins += 1
-        elif action == Action.FOREIGN_AID:
-            player.coins += 2
-        elif action == Action.TAX:
-            player.coins += 3
-        elif action == Action.COUP and target:
-            player.coins -= 7
-            target.lose_influence()
-        elif action == Action.ASSASSINATE and target:
-            player.coins -= 3
-            target.lose_influence()
-        elif action == Action.STEAL and target:
-            stolen = min(2, target.coins)
-            target.coins -= stolen
-            player.coins += stolen
-        elif action == Action.EXCHANGE:
-            drawn = [self.deck.pop() for _ in range(2)]
-            self.deck.extend(drawn)
-            random.shuffle(self.deck)
+            info = {"reason": f"Illegal action: {Action(action_idx).name}"}
+            action_idx = game_actions.Action.PASS
+
+        engine.step(action_idx)
+        while engine.phase != ACTION_SELECTION:
+            engine.step(game_actions.Action.PASS)
 
         # Check win condition
-        if self._check_win(player):
+        terminated = engine.winner is not None
+        if terminated and engine.winner == player:
             reward = 1
-            terminated = True
-
-        self._next_player()
-        return self._get_obs(), reward, terminated, False, {}
 
+        self.current_player = engine.to_act
+        info["action_mask"] = self.action_masks().copy()
+        return self._get_obs(), reward, terminated, False, info
 
-    def _check_win(self, player):
-        alive_players = [p for p in self.players if p.alive]
-        return len(alive_players) == 1 and player.alive
+    def snapshot(self):
+        """Flat tuple of the game (see Engine.snapshot) for restore()."""
+        return self.engine.snapshot()
 
-    def _select_target(self):
-        candidates = [p for p in self.players if p.id != self.current_player and p.alive]
-        return random.choice(candidates) if candidates else None
+    def restore(self, state):
+        self.engine.restore(state)
+        self.current_player = self.engine.to_act
 
-    def _next_player(self):
-        while True:
-            self.current_player = (self.current_player + 1) % NUM_PLAYERS
-            if self.players[self.current_player].alive:
-                break
+    def action_masks(self):
+        coins = self.engine.coins[self.engine.to_act]
+        return MUST_COUP if coins >= 10 else ACTION_MASKS[coin_bucket(coins)]
 
     def render(self):
-        for p in self.players:
-            print(f"Player {p.id}: {p.coins} coins, {len(p.cards)} cards, {'alive' if p.alive else 'dead'}")
+        for p in range(self.num_players):
+            print(f"Player {p}: {self.engine.coins[p]} coins, {len(self.engine.cards(p))} cards, "
+                  f"{'alive' if self.engine.is_alive(p) else 'dead'}")
         print(f"Current player: {self.current_player}\n")
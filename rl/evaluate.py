@@ -1,8 +1,12 @@
 from stable_baselines3 import PPO
-from coup_env import CoupEnv
+from rl.coup_env import CoupEnv
+from rl.trainer import MODEL_PATH
+from rl_new.masking import MaskObservation, is_masked
 
 env = CoupEnv()
-model = PPO.load("ppo_coup_multiagent")
+model = PPO.load(MODEL_PATH)
+if is_masked(model):
+    env = MaskObservation(env)
 
 obs, _ = env.reset()
 done = False
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import torch as th
+from stable_baselines3 import PPO
+
+from game.engine import ACTION_SELECTION
+from rl.coup_env import CoupEnv, Action
+from rl_new.masking import MaskedPolicy, MaskObservation
+
+# The original rl/ rules: no assassination below 3 coins, no coup below 7, and
+# only coup from 10 coins on
+EXPECTED_MASKS = {
+    2: [True, True, False, True, False, True, True],
+    3: [True, True, False, True, True, True, True],
+    7: [True] * 7,
+    9: [True] * 7,
+    10: [False, False, True, False, False, False, False],
+}
+
+
+class CoupEnvTest(unittest.TestCase):
+    def with_coins(self, coins):
+        env = CoupEnv()
+        env.reset(seed=0)
+        env.engine.coins[env.engine.to_act] = coins
+        return env
+
+    def test_masks_by_coins(self):
+        for coins, expected in EXPECTED_MASKS.items():
+            with self.subTest(coins=coins):
+                self.assertEqual(self.with_coins(coins).action_masks().tolist(), expected)
+
+    def test_step_rewards_follow_the_mask(self):
+        for coins in (3, 7, 9):
+            for action in Action:
+                with self.subTest(coins=coins, action=action.name):
+                    env = self.with_coins(coins)
+                    legal = env.action_masks()[action.value]
+                    _, reward, _, _, info = env.step(action.value)
+                    self.assertEqual(reward, 0 if legal else -5)
+                    self.assertEqual("reason" in info, not legal)
+
+    def test_tax_is_played_at_nine_coins(self):
+        env = self.with_coins(9)
+        env.step(Action.TAX.value)
+        self.assertEqual(env.engine.coins[0], 12)
+        self.assertEqual(env.engine.phase, ACTION_SELECTION)
+        self.assertEqual(env.current_player, 1)
+
+    def test_coup_is_required_at_ten_coins(self):
+        env = self.with_coins(10)
+        _, reward, _, _, info = env.step(Action.TAX.value)
+        self.assertEqual(reward, -10)
+        self.assertEqual(env.engine.coins[0], 10)
+        np.testing.assert_array_equal(info["action_mask"], EXPECTED_MASKS[2])
+
+
+class MaskedPolicyTest(unittest.TestCase):
+    def test_never_picks_an_illegal_action(self):
+        th.manual_seed(0)
+        env = MaskObservation(CoupEnv())
+        model = PPO(MaskedPolicy, env, n_steps=64, batch_size=64, seed=0)
+        obs, _ = env.reset(seed=0)
+        games = 0
+        for _ in range(2000):
+            mask = env.action_masks()
+            np.testing.assert_array_equal(obs[-len(Action):], mask)
+            action, _ = model.predict(obs)
+            self.assertTrue(mask[action], f"{Action(int(action)).name} with mask {mask}")
+            obs, reward, terminated, _, info = env.step(action)
+            self.assertNotIn("reason", info)
+            self.assertIn(reward, (0, 1))
+            if terminated:
+                games += 1
+                obs, _ = env.reset()
+        self.assertGreater(games, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import random
+import unittest
+
+import numpy as np
+
+from rl.train_coup_rllib import Action, CoupMultiAgentEnv, CoupVectorEnv, make_config, vector_env_creator
+
+
+class WorkerConfig(dict):
+    """Stand-in for RLlib's EnvContext: the env_config dict plus the worker index."""
+
+    def __init__(self, worker_index, **env_config):
+        super().__init__(env_config)
+        self.worker_index = worker_index
+
+
+def deals(env):
+    return [tuple(engine.hands) for engine in env.engines]
+
+
+def play(env, actions):
+    """Send actions[env_id] for the agent to act in every game that is not over; returns the poll."""
+    env.send_actions({env_id: {str(engine.to_act): actions[env_id]}
+                      for env_id, engine in enumerate(env.engines) if not env._done[env_id]})
+    return env.poll()
+
+
+class CoupVectorEnvTest(unittest.TestCase):
+    def test_workers_are_seeded_apart(self):
+        config = make_config(vector_env=True, envs_per_worker=4, seed=5)["env_config"]
+        self.assertEqual(config, {"num_envs": 4, "seed": 5})
+        first, second = (vector_env_creator(WorkerConfig(i, **config)) for i in (1, 2))
+        self.assertEqual(first.num_envs, 4)
+        self.assertNotEqual(deals(first), deals(second))
+        self.assertEqual(deals(vector_env_creator(WorkerConfig(1, **config))), deals(first))
+        # Without a seed (or a worker index) the games are still dealt
+        self.assertEqual(vector_env_creator({"num_envs": 2}).num_envs, 2)
+
+    def test_poll_after_start(self):
+        env = CoupVectorEnv(3, seed=0)
+        obs, rewards, dones, infos, _ = env.poll()
+        self.assertEqual(sorted(obs), [0, 1, 2])
+        for env_id, engine in enumerate(env.engines):
+            self.assertEqual(set(obs[env_id]), {"0", "1", "2"})
+            np.testing.assert_array_equal(obs[env_id]["0"], [2, 2] * 3)
+            self.assertEqual(dones[env_id], {"__all__": False})
+            self.assertEqual(list(infos[env_id]), [str(engine.to_act)])
+        self.assertEqual(env.poll()[0], {})
+
+    def test_send_actions_until_every_game_ends(self):
+        env = CoupVectorEnv(4, seed=1)
+        rng = np.random.default_rng(1)
+        _, _, _, infos, _ = env.poll()
+        finished = {}
+        for _ in range(2000):
+            if len(finished) == env.num_envs:
+                break
+            actions = {}
+            for env_id, info in infos.items():
+                (mask,) = (agent_info["action_mask"] for agent_info in info.values())
+                actions[env_id] = int(rng.choice(np.nonzero(mask)[0]))
+            obs, rewards, dones, infos, _ = play(env, actions)
+            self.assertEqual(set(obs), set(actions))
+            for env_id in actions:
+                engine = env.engines[env_id]
+                self.assertTrue(all(r in (0, 1) for r in rewards[env_id].values()))
+                for p in range(env.num_players):
+                    if engine.is_alive(p):
+                        self.assertEqual(obs[env_id][str(p)].tolist()[2 * p:2 * p + 2],
+                                         [engine.coins[p], len(engine.cards(p))])
+                if dones[env_id]["__all__"]:
+                    self.assertEqual(rewards[env_id][str(engine.winner)], 1)
+                    self.assertEqual(infos[env_id], {})
+                    finished[env_id] = engine.winner
+                    del infos[env_id]
+        self.assertEqual(len(finished), env.num_envs)
+        # Finished games ignore further actions until they are reset
+        self.assertEqual(play(env, [0] * env.num_envs)[0], {})
+
+    def test_illegal_action_is_penalized(self):
+        env = CoupVectorEnv(2, seed=2)
+        env.poll()
+        _, rewards, _, _, _ = play(env, [Action.COUP.value, Action.INCOME.value])
+        self.assertEqual(rewards[0]["0"], -1)
+        self.assertEqual(rewards[1]["0"], 0)
+        self.assertEqual(env.engines[0].coins[0], 2)
+        self.assertEqual(env.engines[1].coins[0], 3)
+
+    def test_try_reset(self):
+        env = CoupVectorEnv(3, seed=3)
+        env.poll()
+        env.send_actions({env_id: {"0": Action.INCOME.value} for env_id in range(3)})
+        obs = env.try_reset(1)
+        self.assertEqual(list(obs), [1])
+        np.testing.assert_array_equal(obs[1]["0"], [2, 2] * 3)
+        # The reset game's step result is dropped; the others are still polled
+        self.assertEqual(sorted(env.poll()[0]), [0, 2])
+
+        obs = env.try_reset(None)
+        self.assertEqual(sorted(obs), [0, 1, 2])
+        for env_id in range(3):
+            self.assertEqual(set(obs[env_id]), {"0", "1", "2"})
+            np.testing.assert_array_equal(obs[env_id]["2"], [2, 2] * 3)
+        self.assertEqual(env.poll()[0], {})
+
+
+class CoupMultiAgentEnvTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.env = CoupMultiAgentEnv()
+        self.obs = self.env.reset()
+
+    def test_reset_observations(self):
+        self.assertEqual(set(self.obs), {"0", "1", "2"})
+        for obs in self.obs.values():
+            np.testing.assert_array_equal(obs, [2, 2] * 3)
+        self.assertEqual(self.env.current_player, 0)
+        self.assertEqual(self.env.action_mask().tolist(), [True, True, False, True, False, True, True])
+
+    def test_illegal_action_is_penalized_and_skips_the_turn(self):
+        obs, rewards, dones, infos = self.env.step({"0": Action.ASSASSINATE.value})
+        self.assertEqual(rewards, {"0": -1, "1": 0, "2": 0})
+        self.assertEqual(obs["0"].tolist(), [2, 2] * 3)
+        self.assertEqual(list(infos), ["1"])
+        self.assertFalse(dones["__all__"])
+        _, rewards, _, _ = self.env.step({"1": Action.INCOME.value})
+        self.assertEqual(rewards["1"], 0)
+        self.assertEqual(self.env.engine.coins[1], 3)
+
+    def test_mask_follows_the_coins(self):
+        engine = self.env.engine
+        engine.coins[0] = 10
+        self.assertEqual(self.env.action_mask().tolist(), [False, False, True, False, False, False, False])
+        _, rewards, _, _ = self.env.step({"0": Action.TAX.value})
+        self.assertEqual(rewards["0"], -1)
+        self.assertEqual(engine.coins[0], 10)
+        engine.coins[1] = 8
+        _, rewards, _, _ = self.env.step({"1": Action.STEAL.value})
+        self.assertEqual(rewards["1"], 0)
+        self.assertEqual(engine.coins[1], 10)
+
+    def test_episode_ends_with_all_done(self):
+        rng = np.random.default_rng(0)
+        for _ in range(1000):
+            player = str(self.env.current_player)
+            action = int(rng.choice(np.nonzero(self.env.action_mask())[0]))
+            obs, rewards, dones, infos = self.env.step({player: action})
+            self.assertEqual(set(obs), {str(p) for p in range(3) if self.env.engine.is_alive(p)})
+            if dones["__all__"]:
+                break
+            self.assertEqual(list(infos), [str(self.env.current_player)])
+            np.testing.assert_array_equal(infos[str(self.env.current_player)]["action_mask"], self.env.action_mask())
+        self.assertTrue(dones["__all__"])
+        winner = self.env.engine.winner
+        self.assertEqual(rewards[str(winner)], 1)
+        self.assertEqual(infos, {})
+        self.assertEqual([p for p in range(3) if not dones[str(p)]], [winner])
+        self.assertEqual(self.env.step({str(winner): 0}), ({}, {}, {}, {}))
+        self.assertEqual(set(self.env.reset()), {"0", "1", "2"})
+        self.assertFalse(self.env.done)
+
+
+if __name__ == '__main__':
+    unittest.main()
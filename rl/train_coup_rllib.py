@@ -5,211 +5,327 @@ import os
 os.environ["RAY_LOG_TO_STDERR"] = "1"          # Log to stderr, no redirection
 os.environ["RAY_BACKEND_LOG_LEVEL"] = "ERROR"  # Optional: reduce logging verbosity
 
-import ray
-from ray import tune
-from ray.rllib.env.multi_agent_env import MultiAgentEnv
+try:
+    import ray
+    from ray import tune
+    from ray.rllib.env.base_env import BaseEnv
+    from ray.rllib.env.multi_agent_env import MultiAgentEnv
+except ImportError:
+    # The environments only need Ray's base classes to be picked up by RLlib;
+    # without Ray they still run (tests, benchmarks), training does not
+    ray = None
+    BaseEnv = MultiAgentEnv = object
 from gymnasium import spaces
 import numpy as np
 import random
 from enum import Enum
 
-# ----------- Coup environment classes -----------------
+# ----------- Coup environment: RLlib adapter over game/engine.py -----------------
 
-class Card(Enum):
-    DUKE = 0
-    ASSASSIN = 1
-    AMBASSADOR = 2
-    CAPTAIN = 3
-    CONTESSA = 4
+from game import actions as game_actions, cards as game_cards
+from game.engine import Engine, ACTION_SELECTION, EMPTY, OPEN_LEGAL, coin_bucket
+from game.runner import shard_seed
 
-class Action(Enum):
-    INCOME = 0
-    FOREIGN_AID = 1
-    COUP = 2
-    TAX = 3
-    ASSASSINATE = 4
-    EXCHANGE = 5
-    STEAL = 6
+Card = Enum("Card", {name.upper(): code for code, name in enumerate(game_cards.Card.NAMES)})
+Action = Enum("Action", {name.upper(): code for code, name in enumerate(game_actions.Action.NAMES[:game_actions.Action.PASS])})
 
 NUM_PLAYERS = 3
 
-class Player:
-    def __init__(self, player_id):
-        self.id = player_id
-        self.coins = 2
-        self.cards = []
-        self.alive = True
-
-    def lose_influence(self):
-        if self.cards:
-            self.cards.pop()
-        if not self.cards:
-            self.alive = False
-
-    def get_legal_actions(self):
-        actions = list(Action)
-        if self.coins < 3:
-            actions = [a for a in actions if a != Action.ASSASSINATE]
-        if self.coins < 7:
-            actions = [a for a in actions if a != Action.COUP]
-        # Must coup if 10 or more coins
-        if self.coins >= 10:
-            return [Action.COUP]
-        return actions
+# ACTION_MASKS[coin bucket] = legal actions when selecting (the engine's OPEN_LEGAL
+# rules); only COUP at 10+ coins
+ACTION_MASKS = np.array(
+    [[a in actions for a in range(len(Action))] for actions in OPEN_LEGAL], dtype=bool
+)
+MUST_COUP = np.arange(len(Action)) == Action.COUP.value
+
+
+def turn_mask(engine):
+    """Legal actions of engine.to_act on its turn."""
+    coins = engine.coins[engine.to_act]
+    return MUST_COUP if coins >= 10 else ACTION_MASKS[coin_bucket(coins)]
+
+
+def play_turn(engine, action):
+    """Play engine.to_act's turn with action; returns False if it was illegal (the turn is skipped instead)."""
+    # Must coup if 10 or more coins; anything else illegal skips the turn
+    legal = bool(turn_mask(engine)[action])
+    engine.step(action if legal else game_actions.Action.PASS)
+    # Nobody challenges or blocks
+    while engine.phase != ACTION_SELECTION:
+        engine.step(game_actions.Action.PASS)
+    return legal
+
 
 class CoupMultiAgentEnv(MultiAgentEnv):
     def __init__(self):
-        self.players = [Player(i) for i in range(NUM_PLAYERS)]
-        self.deck = [card for card in Card] * 3
-        random.shuffle(self.deck)
-        for p in self.players:
-            p.cards = [self.deck.pop(), self.deck.pop()]
+        self.num_players = NUM_PLAYERS
+        self.engine = Engine(self.num_players, random, random_targets=True, legal=OPEN_LEGAL)
         self.current_player = 0
         self.done = False
 
         # Observation space: for each player, coins and cards count
-        self.observation_space = spaces.Box(low=0, high=10, shape=(NUM_PLAYERS * 2,), dtype=np.int32)
+        self.observation_space = spaces.Box(low=0, high=10, shape=(self.num_players * 2,), dtype=np.int32)
         self.action_space = spaces.Discrete(len(Action))
 
     def reset(self):
-        self.deck = [card for card in Card] * 3
-        random.shuffle(self.deck)
-        for p in self.players:
-            p.coins = 2
-            p.alive = True
-            p.cards = [self.deck.pop(), self.deck.pop()]
-        self.current_player = 0
+        self.engine.reset()
+        self.current_player = self.engine.to_act
         self.done = False
         return self._get_obs()
 
     def _get_obs(self):
-        obs = []
-        for p in self.players:
-            obs.append(p.coins)
-            obs.append(len(p.cards))
-        return {str(p.id): np.array(obs, dtype=np.int32) for p in self.players if p.alive}
+        engine = self.engine
+        obs = np.empty(2 * self.num_players, dtype=np.int32)
+        obs[0::2] = engine.coins
+        for p in range(self.num_players):
+            obs[2 * p + 1] = len(engine.cards(p))
+        return {str(p): obs.copy() for p in range(self.num_players) if engine.is_alive(p)}
 
     def step(self, action_dict):
         if self.done:
             return {}, {}, {}, {}
 
-        rewards = {str(p.id): 0 for p in self.players if p.alive}
-        dones = {}
+        engine = self.engine
+        rewards = {str(p): 0 for p in range(self.num_players) if engine.is_alive(p)}
         infos = {}
 
         current_id = str(self.current_player)
-        player = self.players[self.current_player]
+        action = action_dict[current_id]
 
-        # Check legal action
-        legal_actions = player.get_legal_actions()
-        action = Action(action_dict[current_id])
-        if action not in legal_actions:
-            # Illegal action penalty and skip turn
+        # Illegal actions are penalized
+        if not play_turn(engine, action):
             rewards[current_id] = -1
-            dones = {str(p.id): False for p in self.players if p.alive}
-            dones["__all__"] = False
-            self._next_player()
-            return self._get_obs(), rewards, dones, infos
-
-        # Select a target if action requires it
-        target = None
-        if action in [Action.COUP, Action.ASSASSINATE, Action.STEAL]:
-            targets = [p for p in self.players if p.id != player.id and p.alive]
-            if targets:
-                target = random.choice(targets)
-
-        # Perform action effects
-        if action == Action.INCOME:
-            player.coins += 1
-        elif action == Action.FOREIGN_AID:
-            player.coins += 2
-        elif action == Action.TAX:
-            player.coins += 3
-        elif action == Action.COUP:
-            player.coins -= 7
-            target.lose_influence()
-        elif action == Action.ASSASSINATE:
-            player.coins -= 3
-            target.lose_influence()
-        elif action == Action.STEAL:
-            stolen = min(2, target.coins)
-            target.coins -= stolen
-            player.coins += stolen
-        elif action == Action.EXCHANGE:
-            # Simplified: draw 2 cards, pick 2 best (random here)
-            drawn = [self.deck.pop() for _ in range(2)]
-            combined = player.cards + drawn
-            random.shuffle(combined)
-            player.cards = combined[:2]
-            self.deck.extend(combined[2:])
-            random.shuffle(self.deck)
 
         # Check for win
-        alive_players = [p for p in self.players if p.alive]
-        if len(alive_players) == 1:
-            rewards[str(alive_players[0].id)] = 1
+        if engine.winner is not None:
+            rewards[str(engine.winner)] = 1
             self.done = True
 
-        dones = {str(p.id): not p.alive for p in self.players}
+        dones = {str(p): not engine.is_alive(p) for p in range(self.num_players)}
         dones["__all__"] = self.done
 
-        self._next_player()
+        self.current_player = engine.to_act
+        if not self.done:
+            infos[str(self.current_player)] = {"action_mask": self.action_mask().copy()}
 
         return self._get_obs(), rewards, dones, infos
 
-    def _next_player(self):
-        for _ in range(NUM_PLAYERS):
-            self.current_player = (self.current_player + 1) % NUM_PLAYERS
-            if self.players[self.current_player].alive:
-                return
+    def snapshot(self):
+        """Flat tuple of the game (see Engine.snapshot) for restore()."""
+        return self.engine.snapshot()
 
-    def render(self):
-        for p in self.players:
-            print(f"Player {p.id}: coins={p.coins}, cards={len(p.cards)}, alive={p.alive}")
-        print(f"Current player: {self.current_player}")
+    def restore(self, state):
+        self.engine.restore(state)
+        self.current_player = self.engine.to_act
+        self.done = self.engine.winner is not None
 
-# ----------------- Ray RLlib training setup ----------------
-
-if __name__ == "__main__":
-    ray.init(include_dashboard=False, ignore_reinit_error=True)
+    def action_mask(self):
+        return turn_mask(self.engine)
 
-    from ray.rllib.algorithms.ppo import PPO
-
-    def env_creator(config):
-        return CoupMultiAgentEnv()
-
-    tune.register_env("coup_multi", env_creator)
-
-    policy_ids = [str(i) for i in range(NUM_PLAYERS)]
-
-    def gen_policy():
-        return (None,  # use default policy model
-                CoupMultiAgentEnv().observation_space,
-                CoupMultiAgentEnv().action_space,
-                {})
+    def render(self):
+        engine = self.engine
+        for p in range(self.num_players):
+            print(f"Player {p}: coins={engine.coins[p]}, cards={len(engine.cards(p))}, alive={engine.is_alive(p)}")
+        print(f"Current player: {self.current_player}")
 
-    policies = {pid: gen_policy() for pid in policy_ids}
+class CoupVectorEnv(BaseEnv):
+    """num_envs CoupMultiAgentEnv games behind one RLlib BaseEnv.
+
+    send_actions() plays the turn of every game that sent actions, and poll()
+    returns the results of all of them at once, so a rollout worker's sampler
+    makes one env call per batch of games instead of one per game. Coins and
+    card counts of all games live in one preallocated (num_envs, 2 * players)
+    array that is updated in place for the games that moved. Each poll hands out
+    a single copy of it, because RLlib keeps the returned observations, and
+    every alive agent of a game gets the same row view of that copy.
+    Same rewards, dones and infos as CoupMultiAgentEnv.step.
+    """
+
+    def __init__(self, num_envs=8, seed=None):
+        self.num_envs = num_envs
+        self.num_players = NUM_PLAYERS
+        self.rng = random.Random(seed)
+        self.engines = [
+            Engine(self.num_players, self.rng, random_targets=True, legal=OPEN_LEGAL) for _ in range(num_envs)
+        ]
+        self._state = np.zeros((num_envs, 2 * self.num_players), dtype=np.int32)
+        self._done = [False] * num_envs
+        self._results = {}  # env_id -> (rewards, dones, infos) waiting for the next poll
+        self.observation_space = spaces.Box(low=0, high=10, shape=(self.num_players * 2,), dtype=np.int32)
+        self.action_space = spaces.Discrete(len(Action))
+        for env_id in range(num_envs):
+            self._start(env_id)
+
+    def _start(self, env_id):
+        engine = self.engines[env_id]
+        engine.reset()
+        self._done[env_id] = False
+        self._pack(env_id)
+        self._results[env_id] = ({str(p): 0 for p in range(self.num_players)}, {"__all__": False},
+                                 {str(engine.to_act): {"action_mask": turn_mask(engine).copy()}})
+
+    def _pack(self, env_id):
+        engine, row = self.engines[env_id], self._state[env_id]
+        row[0::2] = engine.coins
+        hands = engine.hands
+        row[1::2] = [(hands[2 * p] != EMPTY) + (hands[2 * p + 1] != EMPTY) for p in range(self.num_players)]
+
+    def _observations(self, env_ids, obs):
+        return {
+            env_id: {str(p): obs[env_id] for p in range(self.num_players) if self.engines[env_id].is_alive(p)}
+            for env_id in env_ids
+        }
+
+    def poll(self):
+        obs = self._state.copy()
+        results, self._results = self._results, {}
+        return (
+            self._observations(results, obs),
+            {env_id: result[0] for env_id, result in results.items()},
+            {env_id: result[1] for env_id, result in results.items()},
+            {env_id: result[2] for env_id, result in results.items()},
+            {},
+        )
+
+    def send_actions(self, action_dict):
+        for env_id, actions in action_dict.items():
+            if self._done[env_id]:
+                continue
+            engine = self.engines[env_id]
+            rewards = {str(p): 0 for p in range(self.num_players) if engine.is_alive(p)}
+            current_id = str(engine.to_act)
+            if not play_turn(engine, actions[current_id]):
+                rewards[current_id] = -1
+            self._done[env_id] = engine.winner is not None
+            if self._done[env_id]:
+                rewards[str(engine.winner)] = 1
+            dones = {str(p): not engine.is_alive(p) for p in range(self.num_players)}
+            dones["__all__"] = self._done[env_id]
+            infos = {} if self._done[env_id] else {str(engine.to_act): {"action_mask": turn_mask(engine).copy()}}
+            self._pack(env_id)
+            self._results[env_id] = (rewards, dones, infos)
+
+    def try_reset(self, env_id=None):
+        """Restart game env_id, or every game with env_id None, and return the new observations."""
+        env_ids = range(self.num_envs) if env_id is None else [env_id]
+        for i in env_ids:
+            self._start(i)
+            del self._results[i]
+        return self._observations(env_ids, self._state.copy())
+
+    def get_agent_ids(self):
+        return {str(p) for p in range(self.num_players)}
+
+    def get_sub_environments(self):
+        return []
 
-    # Policy mapping: each player controls own policy
-    def policy_mapping_fn(agent_id):
-        return agent_id
+# ----------------- Ray RLlib training setup ----------------
 
-    config = {
-        "env": "coup_multi",
-        "num_workers": 0,  # run locally
+def env_creator(config):
+    return CoupMultiAgentEnv()
+
+
+def vector_env_creator(config):
+    # One CoupVectorEnv per rollout worker, with num_envs games; with a seed each
+    # worker gets its own, so workers do not all play the same games
+    seed = config.get("seed")
+    if seed is not None:
+        seed = shard_seed(seed, getattr(config, "worker_index", 0))
+    return CoupVectorEnv(config.get("num_envs", 8), seed)
+
+
+def make_config(num_workers=0, envs_per_worker=1, shared_policy=False, rollout_fragment_length=200,
+                train_batch_size=4000, vector_env=False, seed=None):
+    """PPO config: num_workers rollout workers (0 = sample in the driver) with envs_per_worker games each.
+
+    With shared_policy every seat is played by (and trains) one policy;
+    otherwise each player controls its own. With vector_env each worker steps
+    its games in one CoupVectorEnv instead of one CoupMultiAgentEnv per game,
+    seeded from seed and the worker index (unseeded with seed None).
+    """
+    env = CoupMultiAgentEnv()
+    spec = (None, env.observation_space, env.action_space, {})  # default policy model
+    policy_ids = ["shared"] if shared_policy else [str(i) for i in range(NUM_PLAYERS)]
+
+    def policy_mapping_fn(agent_id, *args, **kwargs):
+        return "shared" if shared_policy else agent_id
+
+    return {
+        "env": "coup_vector" if vector_env else "coup_multi",
+        "env_config": {"num_envs": envs_per_worker, "seed": seed} if vector_env else {},
+        "num_workers": num_workers,
+        "num_envs_per_worker": 1 if vector_env else envs_per_worker,
+        "num_cpus_per_worker": 1,
+        "rollout_fragment_length": rollout_fragment_length,
+        # Every worker contributes whole fragments to each batch
+        "train_batch_size": max(train_batch_size, max(num_workers, 1) * envs_per_worker * rollout_fragment_length),
         "multiagent": {
-            "policies": policies,
+            "policies": {pid: spec for pid in policy_ids},
             "policy_mapping_fn": policy_mapping_fn,
         },
         "framework": "torch",  # or "tf"
         "log_level": "WARN",
     }
 
+
+def sampling_throughput(result, last_steps):
+    """(env steps this iteration, env steps/sec over the iteration, env steps/sec while sampling or None)."""
+    steps = result.get("num_env_steps_sampled_this_iter")
+    if steps is None:
+        steps = result.get("num_env_steps_sampled", result.get("timesteps_total", 0)) - last_steps
+    per_sec = steps / max(result.get("time_this_iter_s", 0.0), 1e-9)
+    sample_ms = result.get("timers", {}).get("sample_time_ms")
+    # sample_time_ms is the mean time of one sampling round of this iteration
+    sampling = steps / (sample_ms / 1000) if sample_ms else None
+    return steps, per_sec, sampling
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train PPO on Coup with RLlib")
+    parser.add_argument("--workers", type=int, default=0, help="rollout worker processes (0 = sample locally)")
+    parser.add_argument("--envs-per-worker", type=int, default=1, help="games stepped by each worker")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--shared-policy", action="store_true", help="one policy for every seat")
+    parser.add_argument("--vector-env", action="store_true",
+                        help="step each worker's games together in one CoupVectorEnv")
+    parser.add_argument("--rollout-fragment-length", type=int, default=200)
+    parser.add_argument("--train-batch-size", type=int, default=4000)
+    parser.add_argument("--num-cpus", type=int, default=None,
+                        help="CPUs of the local Ray cluster (default: all cores, at least workers + 1)")
+    parser.add_argument("--address", default=None, help="connect to a running Ray cluster instead")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed the games of every worker apart (with --vector-env)")
+    args = parser.parse_args()
+    if ray is None:
+        parser.error("training needs Ray (pip install 'ray[rllib]')")
+
+    if args.address:
+        ray.init(address=args.address, include_dashboard=False, ignore_reinit_error=True)
+    else:
+        # Local multi-process cluster: one worker process per rollout worker plus the driver
+        num_cpus = args.num_cpus or max(os.cpu_count() or 1, args.workers + 1)
+        ray.init(num_cpus=num_cpus, include_dashboard=False, ignore_reinit_error=True)
+
+    from ray.rllib.algorithms.ppo import PPO
+
+    tune.register_env("coup_multi", env_creator)
+    tune.register_env("coup_vector", vector_env_creator)
+    config = make_config(args.workers, args.envs_per_worker, args.shared_policy, args.rollout_fragment_length,
+                         args.train_batch_size, args.vector_env, args.seed)
     trainer = PPO(config=config)
 
     # Train loop
-    for i in range(20):  # run 20 iterations
+    total = 0
+    for i in range(args.iterations):
         result = trainer.train()
-        print(f"Iteration {i}: reward_mean={result['episode_reward_mean']}")
+        steps, per_sec, sampling = sampling_throughput(result, total)
+        total += steps
+        line = (f"Iteration {i}: reward_mean={result.get('episode_reward_mean')} "
+                f"env_steps={steps} ({per_sec:.0f} steps/s")
+        if sampling is not None:
+            line += f", {sampling:.0f} steps/s sampling"
+        print(line + ")")
 
     ray.shutdown()
@@ -1,16 +1,26 @@
+import argparse
+import os
+
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
-from coup_env import CoupEnv
+from rl.coup_env import CoupEnv
+from rl_new.masking import MaskedPolicy, MaskObservation
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ppo_coup_multiagent")
 
-def train_agent():
-    env = CoupEnv()
+def train_agent(masked=False):
+    # masked: the legal-action mask is appended to observations and only legal
+    # actions are sampled, so no rollout step is spent on an illegal-action penalty
+    env = MaskObservation(CoupEnv()) if masked else CoupEnv()
     check_env(env, warn=True)
 
-    model = PPO("MlpPolicy", env, verbose=1, n_steps=2048, batch_size=64)
+    model = PPO(MaskedPolicy if masked else "MlpPolicy", env, verbose=1, n_steps=2048, batch_size=64)
     model.learn(total_timesteps=100_000)
 
-    model.save("ppo_coup_multiagent")
+    model.save(MODEL_PATH)
     print("Model saved!")
 
 if __name__ == "__main__":
-    train_agent()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--masked", action="store_true", help="train with action masking")
+    train_agent(parser.parse_args().masked)
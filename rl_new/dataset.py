@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import random
+
+import numpy as np
+import torch as th
+
+from rl_new.coup_env import CoupEnv, Action, OBS_PER_PLAYER
+from rl_new.masking import is_masked
+
+# Offline transition datasets on disk. A dataset is a directory with one raw
+# fixed-dtype file per column and meta.json holding the row count and shapes.
+# Rows are appended through buffered file writes, and TransitionDataset maps the
+# files with np.memmap, so a minibatch only reads its own rows and the dataset
+# can be far larger than RAM.
+#
+# A row is one decision of one seat: the observation (CoupEnv/CoupVecEnv layout),
+# the action, the reward (1 on the winner's last decision of the game), done
+# (the seat's last decision of the game), the legal-action mask and the seat.
+
+NUM_ACTIONS = len(Action)
+COLUMNS = {
+    "obs": np.float32,
+    "action": np.int8,
+    "reward": np.float32,
+    "done": np.bool_,
+    "mask": np.bool_,
+    "seat": np.int8,
+}
+
+
+def _shapes(obs_dim):
+    return {"obs": (obs_dim,), "action": (), "reward": (), "done": (), "mask": (NUM_ACTIONS,), "seat": ()}
+
+
+class TransitionWriter:
+    """Append transitions to the dataset directory path (created, or extended if it exists)."""
+
+    def __init__(self, path, obs_dim, buffer_size=1 << 20):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.obs_dim = obs_dim
+        meta_path = os.path.join(path, "meta.json")
+        self.length = 0
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["obs_dim"] != obs_dim:
+                raise ValueError(f"{path} holds observations of size {meta['obs_dim']}, not {obs_dim}")
+            self.length = meta["length"]
+        shapes = _shapes(obs_dim)
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            file = os.path.join(path, f"{name}.bin")
+            sizes[name] = self.length * np.dtype(dtype).itemsize * int(np.prod(shapes[name]))
+            if (os.path.getsize(file) if os.path.exists(file) else 0) < sizes[name]:
+                raise ValueError(f"{file} is shorter than the {self.length} rows in meta.json")
+        self._files = {}
+        for name in COLUMNS:
+            f = open(os.path.join(path, f"{name}.bin"), "ab", buffering=buffer_size)
+            # Rows past meta.json's length are left over from a writer that did not close; drop them
+            f.truncate(sizes[name])
+            self._files[name] = f
+
+    def add(self, obs, actions, rewards, dones, masks, seats):
+        """Append len(actions) rows; every argument has one entry (row) per transition."""
+        n = len(actions)
+        columns = {"obs": obs, "action": actions, "reward": rewards, "done": dones, "mask": masks, "seat": seats}
+        for name, dtype in COLUMNS.items():
+            values = np.ascontiguousarray(columns[name], dtype=dtype)
+            if values.shape != (n, *_shapes(self.obs_dim)[name]):
+                raise ValueError(f"{name} has shape {values.shape}, expected {(n, *_shapes(self.obs_dim)[name])}")
+            self._files[name].write(values.tobytes())
+        self.length += n
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        # meta.json is written last: a writer that crashes leaves the previous length, and the
+        # next writer truncates the columns back to it
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"length": self.length, "obs_dim": self.obs_dim,
+                       "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TransitionDataset:
+    """Read-only np.memmap columns of a dataset written by TransitionWriter."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.length = meta["length"]
+        self.obs_dim = meta["obs_dim"]
+        self.columns = {
+            name: np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r",
+                            shape=(self.length, *_shapes(self.obs_dim)[name]))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def batches(self, batch_size, rng=None, shuffle=True, drop_last=False):
+        """Yield dicts of column arrays for minibatches covering the dataset once.
+
+        With shuffle, the rows are permuted by rng (a numpy Generator); each batch
+        reads its rows in file order, so only batch_size rows are copied at a time.
+        """
+        order = (rng or np.random.default_rng()).permutation(self.length) if shuffle else np.arange(self.length)
+        stop = self.length - self.length % batch_size if drop_last else self.length
+        for start in range(0, stop, batch_size):
+            rows = np.sort(order[start:start + batch_size])
+            yield {name: np.asarray(column[rows]) for name, column in self.columns.items()}
+
+
+def record_games(path, bots, num_games, seed=0):
+    """Play num_games CoupEnv games with bots[s] in seat s and append every decision to the dataset at path.
+
+    Bots follow the bots/ interface: choose_action(engine, legal_actions), e.g.
+    RandomBot, ISMCTSBot or CFRBot. Returns the wins per seat.
+    """
+    num_players = len(bots)
+    env = CoupEnv(num_players)
+    env.reset(seed=seed)
+    wins = [0] * num_players
+    with TransitionWriter(path, num_players * OBS_PER_PLAYER) as writer:
+        for _ in range(num_games):
+            env.reset()
+            obs, actions, masks, seats = [], [], [], []
+            while not all(env.dones.values()):
+                agent = env.agent_selection
+                seat = env.agent_name_mapping[agent]
+                action = bots[seat].choose_action(env.engine, env.engine.legal_actions())
+                obs.append(env.observe(agent).copy())
+                masks.append(env.action_mask(agent))
+                actions.append(action)
+                seats.append(seat)
+                env.step(action)
+
+            winner = env.engine.winner
+            wins[winner] += 1
+            seats = np.array(seats)
+            rewards = np.zeros(len(seats), dtype=np.float32)
+            dones = np.zeros(len(seats), dtype=bool)
+            for s in range(num_players):
+                acted = np.nonzero(seats == s)[0]
+                if len(acted):
+                    dones[acted[-1]] = True
+                    rewards[acted[-1]] = float(s == winner)
+            writer.add(np.array(obs), actions, rewards, dones, np.array(masks), seats)
+    return wins
+
+
+def behavior_clone(model, dataset, epochs=1, batch_size=1024, learning_rate=1e-3, seats=None, seed=0):
+    """Pretrain the actor of an SB3 PPO model to imitate the dataset's actions; returns the mean loss per epoch.
+
+    Masked models (masking.MaskedPolicy) get the mask appended to the
+    observation, as in training. seats restricts training to those seats' rows.
+    """
+    policy = model.policy
+    masked = is_masked(policy)
+    optimizer = th.optim.Adam(policy.parameters(), lr=learning_rate)
+    rng = np.random.default_rng(seed)
+    policy.set_training_mode(True)
+    losses = []
+    for _ in range(epochs):
+        total, count = 0.0, 0
+        for batch in dataset.batches(batch_size, rng):
+            keep = np.ones(len(batch["action"]), dtype=bool) if seats is None else np.isin(batch["seat"], seats)
+            if not keep.any():
+                continue
+            obs = batch["obs"][keep]
+            if masked:
+                obs = np.concatenate([obs, batch["mask"][keep]], axis=1, dtype=np.float32)
+            obs = th.as_tensor(obs, device=policy.device)
+            actions = th.as_tensor(batch["action"][keep].astype(np.int64), device=policy.device)
+            log_prob = policy.get_distribution(obs).log_prob(actions)
+            loss = -log_prob.mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(actions)
+            count += len(actions)
+        losses.append(total / max(count, 1))
+    policy.set_training_mode(False)
+    return losses
+
+
+if __name__ == "__main__":
+    from stable_baselines3 import PPO
+    from bots.ismcts_bot import ISMCTSBot
+    from bots.random_bot import RandomBot
+    from rl_new.masking import MaskedPolicy
+    from rl_new.train import MODEL_PATHS
+    from rl_new.vec_env import CoupVecEnv
+
+    parser = argparse.ArgumentParser(description="Record bot games to a memory-mapped dataset, or pretrain from one")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="play bot games and append their decisions")
+    rec.add_argument("path")
+    rec.add_argument("--games", type=int, default=100)
+    rec.add_argument("--players", type=int, default=4)
+    rec.add_argument("--bot", choices=("ismcts", "random"), default="ismcts", help="bot in every seat")
+    rec.add_argument("--iterations", type=int, default=200, help="ISMCTS iterations per decision")
+    rec.add_argument("--seed", type=int, default=0)
+    pre = sub.add_parser("pretrain", help="behavior cloning of a new PPO agent")
+    pre.add_argument("path")
+    pre.add_argument("--out", default=MODEL_PATHS[0])
+    pre.add_argument("--epochs", type=int, default=5)
+    pre.add_argument("--batch-size", type=int, default=1024)
+    pre.add_argument("--masked", action="store_true", help="MaskedPolicy agent (see train.py --masked)")
+    pre.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        random.seed(args.seed)
+        bots = [ISMCTSBot(args.iterations, seed=args.seed + s) if args.bot == "ismcts" else RandomBot()
+                for s in range(args.players)]
+        wins = record_games(args.path, bots, args.games, args.seed)
+        print(f"wins per seat: {wins}; {len(TransitionDataset(args.path))} transitions in {args.path}")
+    else:
+        data = TransitionDataset(args.path)
+        vec_env = CoupVecEnv(1, data.obs_dim // OBS_PER_PLAYER, mask_obs=args.masked)
+        model = PPO(MaskedPolicy if args.masked else "MlpPolicy", vec_env, seed=args.seed)
+        for epoch, loss in enumerate(behavior_clone(model, data, args.epochs, args.batch_size, seed=args.seed)):
+            print(f"epoch {epoch}: loss {loss:.4f}")
+        model.save(args.out)
@@ -1,11 +1,178 @@
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from stable_baselines3 import PPO
-from coup_env import env as coup_env_factory, Action
+
+from bots.cfr_bot import CFRBot
+from game.runner import shard_seed, shard_sizes
+from rl_new.coup_env import env as coup_env_factory, Action
+from rl_new.inference import BatchedPolicies
+from rl_new.masking import is_masked
+from rl_new.train import MODEL_PATHS
+from rl_new.vec_env import CoupVecEnv
 
 NUM_PLAYERS = 4
-MODEL_PATHS = [f"ppo_agent_{i}" for i in range(NUM_PLAYERS)]
+PHASES = ("action_selection", "challenge", "counter", "counter_challenge")
+RANDOM = "random"
+CFR_SUFFIX = ".npz"  # lookup tables exported by bots/cfr_solver.py
+Z_95 = 1.959963984540054
+# Default shard count; fixed so results do not depend on --workers, and few
+# enough that each shard still fills a large batch of games
+NUM_SHARDS = 16
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """Wilson score interval for a win rate."""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denom = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denom
+    half = z * np.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return centre - half, centre + half
+
+
+@functools.lru_cache(maxsize=None)
+def load_model(path):
+    # Once per process: a worker reuses the models for every shard it plays
+    return PPO.load(path)
 
-def main():
+
+def play_games(specs, num_games, num_envs=1024, seed=None, deterministic=False, trace_rate=0.0):
+    """Play num_games headless games with specs[s] in seat s and return raw counts.
+
+    A spec is a saved model path, a CFR table (.npz) or "random". Games run
+    num_envs at a time in a CoupVecEnv with every model decision made by
+    BatchedPolicies and every CFR decision by CFRBot.act_batch. With trace_rate > 0
+    that fraction of games also keeps a trace of (seat, phase, action) steps.
+    """
+    num_players = len(specs)
+    paths = sorted({spec for spec in specs if spec != RANDOM and not spec.endswith(CFR_SUFFIX)})
+    models = [load_model(path) for path in paths]
+    seat_policies = [paths.index(spec) if spec in paths else None for spec in specs]
+    rng = np.random.default_rng(seed)
+    policies = BatchedPolicies(models, seat_policies, deterministic, rng)
+    tables = {spec: CFRBot.load(spec, deterministic) for spec in set(specs) if spec.endswith(CFR_SUFFIX)}
+    for spec, bot in tables.items():
+        if bot.abstraction.num_players != num_players:
+            raise ValueError(f"{spec} was solved for {bot.abstraction.num_players} players, not {num_players}")
+    seat_tables = [tables.get(spec) for spec in specs]
+
+    num_envs = max(1, min(num_envs, num_games))
+    # Masked models need the action mask in the observation; the others ignore those columns
+    engine = CoupVecEnv(num_envs, num_players, player_id=None, seed=int(rng.integers(2 ** 63)),
+                        mask_obs=any(is_masked(model) for model in models))
+    engine.reset()
+    wins = np.zeros(num_players, dtype=np.int64)
+    lengths = np.zeros(0, dtype=np.int64)
+    actions = np.zeros((num_players, len(PHASES), len(Action)), dtype=np.int64)
+    traced = rng.random(num_envs) < trace_rate
+    current = [[] for _ in range(num_envs)]
+    traces = []
+
+    active = np.ones(num_envs, dtype=bool)
+    started = num_envs
+    while active.any():
+        g = np.nonzero(active)[0]
+        seats = engine.to_act.copy()
+        phase = engine.phase[g].copy()
+        chosen = policies(engine.observe(seats)[g], seats[g])
+        for bot in tables.values():
+            sel = np.nonzero([seat_tables[s] is bot for s in seats[g]])[0]
+            if len(sel):
+                chosen[sel] = bot.act_batch(engine, g[sel], rng)
+        np.add.at(actions, (seats[g], phase, chosen), 1)
+        for i in np.nonzero(traced[g])[0]:
+            current[g[i]].append((int(seats[g[i]]), PHASES[phase[i]], Action(chosen[i]).name))
+
+        finished = engine.advance(g, chosen)
+        if len(finished) == 0:
+            continue
+        winners = engine.winners(finished)
+        np.add.at(wins, winners, 1)
+        lengths = np.concatenate([lengths, engine.episode_steps[finished]])
+        keep = traced[finished]
+        for i, winner in zip(finished[keep], winners[keep]):
+            traces.append({"winner": int(winner), "steps": current[i]})
+            current[i] = []
+
+        # Start new games in the finished slots until num_games have been started
+        restart = finished[:max(0, num_games - started)]
+        started += len(restart)
+        active[finished[len(restart):]] = False
+        if len(restart):
+            engine.reset_games(restart)
+            traced[restart] = rng.random(len(restart)) < trace_rate
+    return {"wins": wins, "lengths": lengths, "actions": actions, "traces": traces}
+
+
+def evaluate(specs=MODEL_PATHS, num_games=10000, num_envs=1024, seed=0, workers=1, deterministic=False,
+             trace_rate=0.0, num_shards=NUM_SHARDS):
+    """Win rates with 95% confidence intervals per seat and per policy, game length and action counts.
+
+    Games are split into num_shards shards, each with its own seed, which the
+    workers play in turn, and the shard counts are summed, so results depend on
+    (seed, num_shards) only, not on workers.
+    """
+    jobs = [(specs, size, num_envs, shard_seed(seed, shard), deterministic, trace_rate)
+            for shard, size in enumerate(shard_sizes(num_games, num_shards)) if size > 0]
+    if workers == 1:
+        shards = [play_games(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(play_games, *zip(*jobs)))
+
+    wins = sum(shard["wins"] for shard in shards)
+    lengths = np.concatenate([shard["lengths"] for shard in shards])
+    actions = sum(shard["actions"] for shard in shards)
+    games = len(lengths)
+
+    seats = []
+    for seat, spec in enumerate(specs):
+        seats.append({"spec": spec, "wins": int(wins[seat]), "win_rate": wins[seat] / games,
+                      "ci": wilson_interval(wins[seat], games)})
+    policies = {}
+    for spec in dict.fromkeys(specs):
+        in_seats = [seat for seat, s in enumerate(specs) if s == spec]
+        policy_wins, seat_games = int(wins[in_seats].sum()), games * len(in_seats)
+        counts = actions[in_seats].sum(axis=0)
+        policies[spec] = {
+            "seats": in_seats,
+            "wins": policy_wins,
+            "win_rate": policy_wins / seat_games,
+            "ci": wilson_interval(policy_wins, seat_games),
+            "actions": {phase: {action.name: int(counts[p, action.value]) for action in Action}
+                        for p, phase in enumerate(PHASES)},
+        }
+    return {
+        "games": games,
+        "mean_length": float(lengths.mean()),
+        "seats": seats,
+        "policies": policies,
+        "traces": [trace for shard in shards for trace in shard["traces"]],
+    }
+
+
+def print_report(result):
+    print(f"{result['games']} games, mean length {result['mean_length']:.1f} decisions")
+    print("\nseat  win rate  95% CI             policy")
+    for seat, row in enumerate(result["seats"]):
+        low, high = row["ci"]
+        print(f"{seat:4d}  {row['win_rate']:8.4f}  [{low:.4f}, {high:.4f}]  {row['spec']}")
+    for spec, row in result["policies"].items():
+        low, high = row["ci"]
+        print(f"\n{spec} (seats {row['seats']}): win rate {row['win_rate']:.4f} [{low:.4f}, {high:.4f}]")
+        for phase, counts in row["actions"].items():
+            total = sum(counts.values())
+            if total:
+                shares = ", ".join(f"{name} {count / total:.3f}" for name, count in counts.items() if count)
+                print(f"  {phase}: {shares}")
+
+
+def watch_game():
+    # One verbose game between the saved agents, printing every step
     env = coup_env_factory()
     env.reset()
 
@@ -29,6 +196,8 @@ def main():
         print(f"Coins: {player.coins}, Cards: {[c.name for c in player.cards]}, Alive: {player.alive}")
 
         # Predict action
+        if is_masked(models[agent_idx]):
+            obs = np.concatenate([obs, env.action_mask(current_agent)], dtype=np.float32)
         action, _ = models[agent_idx].predict(obs, deterministic=True)
         action_enum = Action(action)
 
@@ -63,5 +232,26 @@ def main():
                 print(f"Player {i}: Alive={p.alive}, Coins={p.coins}, Cards={len(p.cards)}")
             break
 
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Headless evaluation of saved agents over many games")
+    parser.add_argument("--models", nargs="*", default=MODEL_PATHS,
+                        help=f"model path, CFR table (.npz) or '{RANDOM}' for each seat (default: the trained ppo_agent_i)")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--num-envs", type=int, default=1024, help="games played at once per shard")
+    parser.add_argument("--workers", type=int, default=1, help="processes playing the shards")
+    parser.add_argument("--shards", type=int, default=NUM_SHARDS,
+                        help="independently seeded parts of the games (results depend on it, not on --workers)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--deterministic", action="store_true")
+    parser.add_argument("--trace-rate", type=float, default=0.0, help="fraction of games to keep step traces for")
+    parser.add_argument("--watch", action="store_true", help="play one verbose game instead")
+    args = parser.parse_args()
+    if args.watch:
+        watch_game()
+    else:
+        result = evaluate(args.models, args.games, args.num_envs, args.seed, args.workers, args.deterministic,
+                          args.trace_rate, args.shards)
+        print_report(result)
+        if result["traces"]:
+            print(f"\n{len(result['traces'])} traces, first: {result['traces'][0]}")
@@ -0,0 +1,50 @@
+import numpy as np
+
+from rl_new.coup_env import Action
+
+# Batched inference for many games at once. Decisions pending in different games
+# are grouped by the policy that has to make them, each policy runs a single
+# forward pass over its group, and the actions are scattered back per game. The
+# torch call overhead is then paid once per policy per step instead of once per
+# game.
+
+
+class BatchedPolicies:
+    """Actions for a batch of games, one forward pass per policy.
+
+    policies are SB3 models or policies (anything with predict(obs, deterministic=)).
+    seat_policies[s] is the index of the policy playing seat s; by default seat s
+    uses policies[s]. A None entry in seat_policies plays uniformly random actions.
+    Each policy sees the first observation_space.shape[0] columns of obs, so
+    unmasked policies can play in an engine with mask_obs=True.
+    """
+
+    def __init__(self, policies, seat_policies=None, deterministic=False, rng=None):
+        self.policies = [getattr(p, "policy", p) for p in policies]
+        if seat_policies is None:
+            seat_policies = list(range(len(self.policies)))
+        self.seat_policies = list(seat_policies)
+        self.deterministic = deterministic
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def predict(self, obs, seats, games=None):
+        """obs[i] is the observation of seats[i] in game i; returns one action per game.
+
+        games (the engine's game indices, passed by CoupVecEnv) is not needed here.
+        """
+        seats = np.asarray(seats)
+        actions = np.empty(len(seats), dtype=np.int64)
+        for i in [None, *range(len(self.policies))]:
+            played = [s for s, p in enumerate(self.seat_policies) if p == i]
+            g = np.nonzero(np.isin(seats, played))[0]
+            if len(g) == 0:
+                continue
+            if i is None:
+                actions[g] = self.rng.integers(0, len(Action), len(g))
+            else:
+                policy = self.policies[i]
+                features = obs[g, :policy.observation_space.shape[0]]
+                actions[g] = policy.predict(features, deterministic=self.deterministic)[0]
+        return actions
+
+    __call__ = predict
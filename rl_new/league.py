@@ -0,0 +1,234 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch.nn as nn
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.torch_layers import FlattenExtractor
+
+from rl_new.coup_env import Action
+from rl_new.masking import is_masked
+
+# League self-play: frozen snapshots of the learning agents are kept in a pool
+# and opponent seats are filled from it with prioritized fictitious self-play
+# (PFSP) weights, so the learner mostly meets the snapshots it still loses to.
+#
+# Snapshots are the actor half of an MLP policy (policy_net + action_net) as
+# flat float32 vectors in one shared-memory block, and frozen opponents run a
+# plain numpy forward pass on them: no torch modules are built per snapshot,
+# and every rollout worker process maps the same block instead of holding its
+# own copy. Only the training process writes to the block.
+
+NUM_ACTIONS = len(Action)
+ACTIVATIONS = {nn.Tanh: np.tanh, nn.ReLU: lambda x: np.maximum(x, 0)}
+
+
+def actor_layers(policy):
+    """(weight, bias) tensors of the actor of an SB3 MLP ActorCriticPolicy, input to output."""
+    if not isinstance(policy.features_extractor, FlattenExtractor) or policy.activation_fn not in ACTIVATIONS:
+        raise ValueError("snapshots need an MLP policy with a flat observation and Tanh or ReLU activations")
+    linears = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)] + [policy.action_net]
+    return [(layer.weight, layer.bias) for layer in linears]
+
+
+class SnapshotPool:
+    """Up to capacity frozen actors of one architecture in shared memory, with PFSP sampling.
+
+    Build it from a template policy with the architecture of the learners (an
+    SB3 ActorCriticPolicy or masking.MaskedPolicy). add() stores a copy of a
+    policy's actor in the next slot, replacing the oldest snapshot once the
+    pool is full; a game still using that slot continues with the new weights.
+    The pool pickles as a handle to the same block, so it can be passed to
+    worker processes.
+
+    Per slot the pool also counts the games a snapshot played against the
+    learner and the learner's wins. sample() weights snapshot s by
+    (1 - p_s) ** pfsp_power, where p_s is the learner's smoothed win rate
+    against it (pfsp_power=0 samples uniformly).
+    """
+
+    def __init__(self, policy, capacity=32, pfsp_power=2.0):
+        shapes = [tuple(w.shape) for w, _ in actor_layers(policy)]
+        activation = policy.activation_fn
+        masked = is_masked(policy)
+        size = self._layout(shapes, capacity)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        self._attach(shm, shapes, activation, masked, capacity, pfsp_power, owner=True)
+        self.slot_owner[:] = -1
+        self.wins[:] = 0
+        self.games[:] = 0
+        self.added[:] = 0
+
+    @staticmethod
+    def _layout(shapes, capacity):
+        num_params = sum(out * (inp + 1) for out, inp in shapes)
+        return capacity * (4 * num_params + 3 * 8) + 8
+
+    def _attach(self, shm, shapes, activation, masked, capacity, pfsp_power, owner):
+        self._shm = shm
+        self._owner = owner
+        self.shapes = shapes
+        self.activation = activation
+        self.masked = masked
+        self.capacity = capacity
+        self.pfsp_power = pfsp_power
+        self.num_params = sum(out * (inp + 1) for out, inp in shapes)
+
+        buf = shm.buf
+        offset = 0
+        self.slot_owner = np.ndarray(capacity, dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * capacity
+        self.wins = np.ndarray(capacity, dtype=np.float64, buffer=buf, offset=offset)
+        offset += 8 * capacity
+        self.games = np.ndarray(capacity, dtype=np.float64, buffer=buf, offset=offset)
+        offset += 8 * capacity
+        self.added = np.ndarray(1, dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8
+        self.params = np.ndarray((capacity, self.num_params), dtype=np.float32, buffer=buf, offset=offset)
+
+        # Per slot, (weight, bias) views into params for every layer
+        self._layers = []
+        for slot in range(capacity):
+            layers, start = [], 0
+            for out, inp in shapes:
+                weight = self.params[slot, start:start + out * inp].reshape(out, inp)
+                start += out * inp
+                layers.append((weight, self.params[slot, start:start + out]))
+                start += out
+            self._layers.append(layers)
+
+    def __getstate__(self):
+        return (self._shm.name, self.shapes, self.activation, self.masked, self.capacity, self.pfsp_power)
+
+    def __setstate__(self, state):
+        name, shapes, activation, masked, capacity, pfsp_power = state
+        # Worker processes share the creator's resource tracker, and only the creator unlinks
+        shm = shared_memory.SharedMemory(name=name)
+        self._attach(shm, shapes, activation, masked, capacity, pfsp_power, owner=False)
+
+    def close(self):
+        self._layers = self.params = self.slot_owner = self.wins = self.games = self.added = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __len__(self):
+        return int((self.slot_owner >= 0).sum())
+
+    # --- Training process ---
+
+    def add(self, policy, owner):
+        """Store a frozen copy of policy's actor, tagged with owner (e.g. the agent index); returns its slot."""
+        flat = np.concatenate([t.detach().cpu().numpy().ravel() for layer in actor_layers(policy) for t in layer])
+        if flat.shape != (self.num_params,):
+            raise ValueError("policy architecture does not match the pool")
+        slot = int(self.added[0] % self.capacity)
+        self.params[slot] = flat
+        self.slot_owner[slot] = owner
+        self.wins[slot] = self.games[slot] = 0
+        self.added[0] += 1
+        return slot
+
+    def record(self, slots, won):
+        """The learner played games against slots[i] and won[i] of them."""
+        slots, won = np.asarray(slots).ravel(), np.asarray(won, dtype=np.float64).ravel()
+        keep = slots >= 0
+        np.add.at(self.games, slots[keep], 1)
+        np.add.at(self.wins, slots[keep], won[keep])
+
+    def reset_stats(self):
+        """Forget the results, e.g. when a different agent starts learning against the pool."""
+        self.wins[:] = 0
+        self.games[:] = 0
+
+    # --- Any process ---
+
+    def sample(self, n, rng):
+        """n snapshot slots drawn with PFSP weights, or -1 (random play) while the pool is empty."""
+        filled = np.nonzero(self.slot_owner >= 0)[0]
+        if len(filled) == 0:
+            return np.full(n, -1, dtype=np.int64)
+        win_rate = (self.wins[filled] + 1) / (self.games[filled] + 2)
+        weights = (1 - win_rate) ** self.pfsp_power
+        return rng.choice(filled, size=n, p=weights / weights.sum())
+
+    def logits(self, slot, obs):
+        x = obs[:, :self.shapes[0][1]]
+        layers = self._layers[slot]
+        activation = ACTIVATIONS[self.activation]
+        for weight, bias in layers[:-1]:
+            x = activation(x @ weight.T + bias)
+        weight, bias = layers[-1]
+        return x @ weight.T + bias
+
+    def act(self, slots, obs, rng):
+        """Sampled actions of snapshot slots[i] for obs[i]; slot -1 plays uniformly random actions."""
+        actions = rng.integers(0, NUM_ACTIONS, len(slots))
+        for slot in np.unique(slots[slots >= 0]):
+            rows = np.nonzero(slots == slot)[0]
+            logits = self.logits(slot, obs[rows])
+            if self.masked:
+                logits = np.where(obs[rows, -NUM_ACTIONS:] > 0.5, logits, -np.inf)
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            cdf = probs.cumsum(axis=1)
+            pick = rng.random(len(rows)) * cdf[:, -1]
+            actions[rows] = np.minimum((cdf <= pick[:, None]).sum(axis=1), NUM_ACTIONS - 1)
+        return actions
+
+
+class LeagueOpponents:
+    """Opponents for vec_env.CoupVecEnv (or one game of train.SingleAgentWrapper) drawn from a SnapshotPool.
+
+    Every opponent seat of a game is assigned a snapshot when the game starts
+    and keeps it until the game ends. When the env reports the end of games
+    through end_games(), the learner's results go to pool.record().
+    """
+
+    def __init__(self, pool, num_envs, num_players, player_id, rng=None):
+        self.pool = pool
+        self.player_id = player_id
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.assigned = np.full((num_envs, num_players), -1, dtype=np.int64)
+        self._opponent_seats = [s for s in range(num_players) if s != player_id]
+
+    def start_games(self, g):
+        self.assigned[g] = self.pool.sample(len(g) * self.assigned.shape[1], self.rng).reshape(len(g), -1)
+        self.assigned[g, self.player_id] = -1
+
+    def end_games(self, g, won):
+        self.pool.record(self.opponent_slots(g), np.repeat(won, len(self._opponent_seats)))
+
+    def opponent_slots(self, g):
+        return self.assigned[np.asarray(g)[:, None], self._opponent_seats]
+
+    def __call__(self, obs, seats, games):
+        return self.pool.act(self.assigned[games, seats], obs, self.rng)
+
+
+class LeagueCallback(BaseCallback):
+    """Adds a snapshot of the learning model to the pool every snapshot_every rollouts.
+
+    Also records results that rollout workers report in info["league"] as
+    (opponent slots, won), which is how SingleAgentWrapper games in worker
+    processes feed PFSP.
+    """
+
+    def __init__(self, pool, owner, snapshot_every=1, verbose=0):
+        super().__init__(verbose)
+        self.pool = pool
+        self.owner = owner
+        self.snapshot_every = snapshot_every
+        self.rollouts = 0
+
+    def _on_step(self):
+        for info in self.locals["infos"]:
+            if "league" in info:
+                slots, won = info["league"]
+                self.pool.record(slots, np.full(len(slots), won))
+        return True
+
+    def _on_rollout_end(self):
+        self.rollouts += 1
+        if self.rollouts % self.snapshot_every == 0:
+            slot = self.pool.add(self.model.policy, self.owner)
+            self.logger.record("league/pool_size", len(self.pool))
+            self.logger.record("league/snapshot_slot", slot)
@@ -0,0 +1,73 @@
+import gymnasium as gym
+import numpy as np
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+# Action masking for SB3 PPO without sb3-contrib. The environment appends the
+# 0/1 mask of the legal actions to the end of every observation, and
+# MaskedPolicy gives the masked-out actions zero probability. The mask then
+# travels with the observation through rollout buffers, snapshots and batched
+# inference, so every sampled action is legal and PPO's ratios and entropy are
+# computed over the legal actions only.
+
+MASKED_LOGIT = -1e8
+
+
+class MaskObservation(gym.ObservationWrapper):
+    """Append env.action_masks() to the (flat Box) observation as float32 columns."""
+
+    def __init__(self, env):
+        super().__init__(env)
+        space = env.observation_space
+        n = env.action_space.n
+        self.observation_space = gym.spaces.Box(
+            low=np.concatenate([np.broadcast_to(space.low, space.shape), np.zeros(n)]).astype(np.float32),
+            high=np.concatenate([np.broadcast_to(space.high, space.shape), np.ones(n)]).astype(np.float32),
+            dtype=np.float32,
+        )
+
+    def observation(self, observation):
+        return np.concatenate([observation, self.env.unwrapped.action_masks()], dtype=np.float32)
+
+    def action_masks(self):
+        return self.env.unwrapped.action_masks()
+
+
+class MaskedPolicy(ActorCriticPolicy):
+    """ActorCriticPolicy for observations that end with the legal-action mask.
+
+    The mask columns are also part of the network input, which tells the policy
+    which kind of decision (turn action, challenge, block) it is making.
+    """
+
+    def _latent(self, obs):
+        features = self.extract_features(obs)
+        if self.share_features_extractor:
+            return self.mlp_extractor(features)
+        pi_features, vf_features = features
+        return self.mlp_extractor.forward_actor(pi_features), self.mlp_extractor.forward_critic(vf_features)
+
+    def _masked_distribution(self, latent_pi, obs):
+        distribution = self._get_action_dist_from_latent(latent_pi)
+        legal = obs[:, -self.action_space.n:] > 0.5
+        return distribution.proba_distribution(distribution.distribution.logits.masked_fill(~legal, MASKED_LOGIT))
+
+    def forward(self, obs, deterministic=False):
+        latent_pi, latent_vf = self._latent(obs)
+        distribution = self._masked_distribution(latent_pi, obs)
+        actions = distribution.get_actions(deterministic=deterministic)
+        log_prob = distribution.log_prob(actions)
+        return actions.reshape((-1, *self.action_space.shape)), self.value_net(latent_vf), log_prob
+
+    def evaluate_actions(self, obs, actions):
+        latent_pi, latent_vf = self._latent(obs)
+        distribution = self._masked_distribution(latent_pi, obs)
+        return self.value_net(latent_vf), distribution.log_prob(actions), distribution.entropy()
+
+    def get_distribution(self, obs):
+        features = super(ActorCriticPolicy, self).extract_features(obs, self.pi_features_extractor)
+        return self._masked_distribution(self.mlp_extractor.forward_actor(features), obs)
+
+
+def is_masked(model):
+    """True for models (or policies) trained with MaskedPolicy."""
+    return isinstance(getattr(model, "policy", model), MaskedPolicy)
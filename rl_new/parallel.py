@@ -0,0 +1,153 @@
+import multiprocessing as mp
+
+import numpy as np
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+
+# Worker loop: the env's observations are written straight into this worker's row
+# of the shared buffer, so only rewards, dones and infos go through the pipe
+def _worker(remote, parent_remote, env_fn_wrapper, obs_buffer, index):
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    obs_out = np.frombuffer(obs_buffer, dtype=np.float32).reshape(-1, *env.observation_space.shape)[index]
+    while True:
+        try:
+            cmd, data = remote.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if cmd == "step":
+            obs, reward, terminated, truncated, info = env.step(data)
+            done = terminated or truncated
+            info["TimeLimit.truncated"] = truncated and not terminated
+            reset_info = {}
+            if done:
+                info["terminal_observation"] = np.array(obs, dtype=np.float32)
+                obs, reset_info = env.reset()
+            obs_out[...] = obs
+            remote.send((reward, done, info, reset_info))
+        elif cmd == "reset":
+            obs, reset_info = env.reset(seed=data)
+            obs_out[...] = obs
+            remote.send(reset_info)
+        elif cmd == "get_spaces":
+            remote.send((env.observation_space, env.action_space))
+        elif cmd == "env_method":
+            remote.send(getattr(env, data[0])(*data[1], **data[2]))
+        elif cmd == "get_attr":
+            remote.send(getattr(env, data))
+        elif cmd == "has_attr":
+            remote.send(hasattr(env, data))
+        elif cmd == "set_attr":
+            setattr(env, data[0], data[1])
+            remote.send(None)
+        elif cmd == "is_wrapped":
+            remote.send(is_wrapped(env, data))
+        elif cmd == "close":
+            env.close()
+            remote.close()
+            break
+        else:
+            raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+
+
+class ShmSubprocVecEnv(VecEnv):
+    """SubprocVecEnv with observations in one shared float32 buffer.
+
+    Each env runs in its own process and writes its observation into its row of
+    a RawArray, so step_wait only unpickles rewards, dones and infos. Seeds set
+    with seed() are handed to each worker on the next reset.
+    """
+
+    def __init__(self, env_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        # Spaces come from a throwaway env in this process, so the buffer can be
+        # sized before any worker starts
+        probe = env_fns[0]()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+        obs_shape = observation_space.shape
+        self._obs_buffer = ctx.RawArray("f", n_envs * int(np.prod(obs_shape)))
+        self._obs = np.frombuffer(self._obs_buffer, dtype=np.float32).reshape(n_envs, *obs_shape)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(zip(self.work_remotes, self.remotes, env_fns)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), self._obs_buffer, index)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        super().__init__(n_envs, observation_space, action_space)
+
+    def step_async(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", action))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rewards, dones, infos, self.reset_infos = zip(*results)
+        return self._obs.copy(), np.array(rewards, dtype=np.float32), np.array(dones), list(infos)
+
+    def reset(self):
+        for index, remote in enumerate(self.remotes):
+            remote.send(("reset", self._seeds[index]))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def has_attr(self, attr_name):
+        for remote in self.remotes:
+            remote.send(("has_attr", attr_name))
+        return all(remote.recv() for remote in self.remotes)
+
+    def get_attr(self, attr_name, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(("get_attr", attr_name))
+        return [remote.recv() for remote in target_remotes]
+
+    def set_attr(self, attr_name, value, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(("set_attr", (attr_name, value)))
+        for remote in target_remotes:
+            remote.recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(("env_method", (method_name, method_args, method_kwargs)))
+        return [remote.recv() for remote in target_remotes]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        target_remotes = self._get_target_remotes(indices)
+        for remote in target_remotes:
+            remote.send(("is_wrapped", wrapper_class))
+        return [remote.recv() for remote in target_remotes]
+
+    def _get_target_remotes(self, indices):
+        return [self.remotes[i] for i in self._get_indices(indices)]
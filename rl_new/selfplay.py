@@ -0,0 +1,214 @@
+import numpy as np
+import torch as th
+from stable_baselines3.common.utils import obs_as_tensor
+
+from rl_new.inference import BatchedPolicies
+
+# Shared-rollout training: every seat of every game is played by a policy, and
+# each decision of a learning seat becomes a transition in its model's own
+# rollout buffer. One simulated game therefore feeds every learner, instead of
+# each model paying for its own games against random opponents.
+
+
+class PolicyRollout:
+    """Transitions of one model, one column per (learning seat, game), staged until n_steps are ready.
+
+    A transition is written when the seat decides (obs, action, value, log_prob)
+    and its reward is added when the game ends. Columns fill at different speeds,
+    so a rollout is handed to PPO once every column holds n_steps + 1 decisions;
+    the extra decision supplies the bootstrap value and the done flag.
+    """
+
+    def __init__(self, num_columns, obs_dim, n_steps):
+        self.n_steps = n_steps
+        self.count = np.zeros(num_columns, dtype=np.int64)
+        capacity = 2 * (n_steps + 1)
+        self.obs = np.zeros((capacity, num_columns, obs_dim), dtype=np.float32)
+        self.actions = np.zeros((capacity, num_columns), dtype=np.int64)
+        self.rewards = np.zeros((capacity, num_columns), dtype=np.float32)
+        self.starts = np.zeros((capacity, num_columns), dtype=np.float32)
+        self.values = np.zeros((capacity, num_columns), dtype=np.float32)
+        self.log_probs = np.zeros((capacity, num_columns), dtype=np.float32)
+        # Next decision in each column opens an episode
+        self.episode_start = np.ones(num_columns, dtype=np.float32)
+
+    def _arrays(self):
+        return self.obs, self.actions, self.rewards, self.starts, self.values, self.log_probs
+
+    def record(self, c, obs, actions, values, log_probs):
+        if self.count[c].max() >= len(self.obs):
+            self._grow()
+        t = self.count[c]
+        self.obs[t, c] = obs
+        self.actions[t, c] = actions
+        self.rewards[t, c] = 0
+        self.starts[t, c] = self.episode_start[c]
+        self.values[t, c] = values
+        self.log_probs[t, c] = log_probs
+        self.episode_start[c] = 0
+        self.count[c] += 1
+
+    def finish(self, c, rewards):
+        """Episodes in columns c ended; credit the last decision in each."""
+        acted = (self.count[c] > 0) & (self.episode_start[c] == 0)
+        c, rewards = c[acted], rewards[acted]
+        self.rewards[self.count[c] - 1, c] += rewards
+        self.episode_start[c] = 1
+
+    def ready(self):
+        return self.count.min() > self.n_steps
+
+    def drain(self, buffer):
+        """Move the first n_steps decisions of every column into a PPO RolloutBuffer.
+
+        Returns (last_values, dones) for compute_returns_and_advantage.
+        """
+        n = self.n_steps
+        buffer.reset()
+        buffer.observations[:] = self.obs[:n]
+        buffer.actions[:] = self.actions[:n, :, None]
+        buffer.rewards[:] = self.rewards[:n]
+        buffer.episode_starts[:] = self.starts[:n]
+        buffer.values[:] = self.values[:n]
+        buffer.log_probs[:] = self.log_probs[:n]
+        buffer.pos = n
+        buffer.full = True
+        last_values, dones = self.values[n].copy(), self.starts[n].copy()
+
+        # Decisions past n_steps start the next rollout
+        for array in self._arrays():
+            array[:-n] = array[n:]
+        self.count -= n
+        return th.as_tensor(last_values), dones
+
+    def _grow(self):
+        for name in ("obs", "actions", "rewards", "starts", "values", "log_probs"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+
+class SharedRolloutTrainer:
+    """Train PPO models from the same batch of self-play games.
+
+    engine is a CoupVecEnv built with player_id=None that the models were also
+    created on. seat_models[s] is the index of the model playing seat s (one
+    model per seat by default; [0] * num_players is a single shared policy that
+    learns from every seat). Seats in frozen_seats are played by a snapshot of
+    their model, refreshed after every snapshot_every updates of that model, and
+    are not trained on. Each model is updated as soon as its own rollout is
+    full, using its n_steps and the model's usual PPO train().
+    """
+
+    def __init__(self, models, engine, seat_models=None, frozen_seats=(), snapshot_every=1):
+        if seat_models is None:
+            seat_models = list(range(len(models)))
+        if engine.player_id is not None or engine.num_players != len(seat_models):
+            raise ValueError("engine must be a CoupVecEnv with player_id=None and one entry of seat_models per seat")
+        self.models = models
+        self.engine = engine
+        self.seat_models = list(seat_models)
+        self.frozen_seats = set(frozen_seats)
+        self.snapshot_every = snapshot_every
+        self._games = np.arange(engine.num_envs)
+        self.learning_seats = [
+            [s for s, m in enumerate(self.seat_models) if m == i and s not in self.frozen_seats]
+            for i in range(len(models))
+        ]
+        if not all(self.learning_seats):
+            raise ValueError("every model needs at least one seat that is not frozen")
+
+    def learn(self, total_timesteps):
+        """Play until every model has trained on total_timesteps of its own decisions."""
+        engine = self.engine
+        obs_dim = engine.observation_space.shape[0]
+        self.rollouts = []
+        for model, seats in zip(self.models, self.learning_seats):
+            if model.env is not engine:
+                raise ValueError("models must be created on the trainer's engine")
+            # Resets the engine's games, so staging starts empty
+            model._setup_learn(total_timesteps)
+            model.policy.set_training_mode(False)
+            num_columns = len(seats) * engine.num_envs
+            if model.rollout_buffer.n_envs != num_columns:
+                model.rollout_buffer = model.rollout_buffer_class(
+                    model.n_steps, model.observation_space, model.action_space, device=model.device,
+                    gamma=model.gamma, gae_lambda=model.gae_lambda, n_envs=num_columns, **model.rollout_buffer_kwargs,
+                )
+            self.rollouts.append(PolicyRollout(num_columns, obs_dim, model.n_steps))
+        self.iterations = [0] * len(self.models)
+        self.snapshots = [self._snapshot(i) if self._has_frozen(i) else None for i in range(len(self.models))]
+        self._frozen = BatchedPolicies(
+            self.snapshots, [m if s in self.frozen_seats else None for s, m in enumerate(self.seat_models)]
+        )
+        self._total = total_timesteps
+
+        while any(model.num_timesteps < total_timesteps for model in self.models):
+            self.step()
+        return self.models
+
+    def step(self):
+        """One decision in every game, by whichever seat is to act there."""
+        engine = self.engine
+        seats = engine.to_act.copy()
+        obs = engine.observe(seats)
+        actions = np.empty(engine.num_envs, dtype=np.int64)
+        for i, (model, rollout) in enumerate(zip(self.models, self.rollouts)):
+            learning = self.learning_seats[i]
+            g = np.nonzero(np.isin(seats, learning))[0]
+            if len(g):
+                with th.no_grad():
+                    act, values, log_probs = model.policy(obs_as_tensor(obs[g], model.device))
+                actions[g] = act = act.cpu().numpy()
+                if model.num_timesteps < self._total:
+                    columns = self._columns(i, seats[g], g)
+                    rollout.record(columns, obs[g], act, values.cpu().numpy().ravel(), log_probs.cpu().numpy())
+
+        g = np.nonzero(np.isin(seats, list(self.frozen_seats)))[0]
+        if len(g):
+            actions[g] = self._frozen(obs[g], seats[g])
+
+        finished = engine.advance(self._games, actions)
+        if len(finished):
+            winner = engine.winners(finished)
+            for i, (model, rollout) in enumerate(zip(self.models, self.rollouts)):
+                for seat in self.learning_seats[i]:
+                    rewards = (winner == seat).astype(np.float32)
+                    rollout.finish(self._columns(i, np.full(len(finished), seat), finished), rewards)
+                    model.ep_info_buffer.extend(
+                        {"r": float(r), "l": int(l)} for r, l in zip(rewards, engine.episode_steps[finished])
+                    )
+            engine.reset_games(finished)
+
+        for i, rollout in enumerate(self.rollouts):
+            if rollout.ready() and self.models[i].num_timesteps < self._total:
+                self._train(i)
+
+    def _columns(self, i, seats, g):
+        # Column of (seat, game) in model i's rollout
+        slot = np.searchsorted(self.learning_seats[i], seats)
+        return slot * self.engine.num_envs + g
+
+    def _has_frozen(self, i):
+        return any(self.seat_models[s] == i for s in self.frozen_seats)
+
+    def _snapshot(self, i):
+        policy = self.models[i].policy
+        snapshot = type(policy)(**policy._get_constructor_parameters()).to(policy.device)
+        snapshot.load_state_dict(policy.state_dict())
+        snapshot.set_training_mode(False)
+        return snapshot
+
+    def _train(self, i):
+        model, rollout = self.models[i], self.rollouts[i]
+        last_values, dones = rollout.drain(model.rollout_buffer)
+        model.rollout_buffer.compute_returns_and_advantage(last_values=last_values, dones=dones)
+        model.num_timesteps += model.n_steps * model.rollout_buffer.n_envs
+        model._update_current_progress_remaining(model.num_timesteps, self._total)
+        self.iterations[i] += 1
+        if model.verbose:
+            print(f"Agent {i}:")
+            model.dump_logs(self.iterations[i])
+        model.train()
+        model.policy.set_training_mode(False)
+        if self._has_frozen(i) and self.iterations[i] % self.snapshot_every == 0:
+            self.snapshots[i] = self._frozen.policies[i] = self._snapshot(i)
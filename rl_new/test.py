@@ -1,4 +1,4 @@
-from coup_env import CoupEnv
+from rl_new.coup_env import CoupEnv
 
 env = CoupEnv()
 obs = env.reset()
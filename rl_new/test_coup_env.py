@@ -0,0 +1,49 @@
+import random
+import unittest
+
+import numpy as np
+
+from rl_new.coup_env import CoupEnv, OBS_PER_PLAYER
+
+
+class CoupEnvTest(unittest.TestCase):
+    def test_incremental_observations_match_the_engine(self):
+        env = CoupEnv(4)
+        rng = random.Random(0)
+        expected = np.zeros(4 * OBS_PER_PLAYER, dtype=np.float32)
+        states = []
+        for game in range(50):
+            env.reset(seed=game)
+            while not all(env.dones.values()):
+                for agent in env.agents:
+                    env.engine.observe(env.agent_name_mapping[agent], expected)
+                    np.testing.assert_array_equal(env.observe(agent), expected)
+                if rng.random() < 0.05:
+                    states.append(env.snapshot())
+                if states and rng.random() < 0.02:
+                    env.restore(rng.choice(states))
+                    continue
+                env.step(rng.choice(env._legal_actions(env.agent_selection)))
+
+    def test_only_the_agent_to_act_has_a_mask(self):
+        env = CoupEnv(3)
+        env.reset(seed=1)
+        rng = random.Random(1)
+        while not all(env.dones.values()):
+            masked = [agent for agent, info in env.infos.items() if "action_mask" in info]
+            self.assertEqual(masked, [env.agent_selection])
+            np.testing.assert_array_equal(env.infos[env.agent_selection]["action_mask"], env.action_mask())
+            env.step(rng.choice(env._legal_actions(env.agent_selection)))
+
+    def test_observation_is_read_only(self):
+        env = CoupEnv(3)
+        obs = env.reset(seed=0)
+        with self.assertRaises(ValueError):
+            obs[0] = 1
+        out = np.zeros_like(obs)
+        self.assertIs(env.observe(env.agent_selection, out), out)
+        np.testing.assert_array_equal(out, obs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from rl_new.dataset import TransitionWriter, TransitionDataset, record_games, NUM_ACTIONS
+from bots.random_bot import RandomBot
+
+OBS_DIM = 4
+
+
+def rows(n, action):
+    """n rows whose action (and obs) are all action."""
+    return (np.full((n, OBS_DIM), action), np.full(n, action), np.zeros(n), np.zeros(n, dtype=bool),
+            np.ones((n, NUM_ACTIONS), dtype=bool), np.zeros(n))
+
+
+class DatasetTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = self.dir.name
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_append_and_reopen(self):
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            writer.add(*rows(3, 1))
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            writer.add(*rows(2, 2))
+        data = TransitionDataset(self.path)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data["action"].tolist(), [1, 1, 1, 2, 2])
+        self.assertEqual(data["obs"].shape, (5, OBS_DIM))
+        self.assertTrue((data["obs"][:, 0] == data["action"]).all())
+
+    def test_crashed_writer_rows_are_dropped(self):
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            writer.add(*rows(3, 1))
+        crashed = TransitionWriter(self.path, OBS_DIM)
+        crashed.add(*rows(2, 9))
+        for f in crashed._files.values():  # flushed to disk, but meta.json is never updated
+            f.close()
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            writer.add(*rows(3, 5))
+        data = TransitionDataset(self.path)
+        self.assertEqual(data["action"].tolist(), [1, 1, 1, 5, 5, 5])
+        self.assertEqual(data["obs"][:, 0].tolist(), [1, 1, 1, 5, 5, 5])
+
+    def test_wrong_obs_dim(self):
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            writer.add(*rows(1, 0))
+        with self.assertRaises(ValueError):
+            TransitionWriter(self.path, OBS_DIM + 1)
+
+    def test_batches_cover_every_row_once(self):
+        with TransitionWriter(self.path, OBS_DIM) as writer:
+            for a in range(10):
+                writer.add(*rows(1, a))
+        data = TransitionDataset(self.path)
+        batches = list(data.batches(4, np.random.default_rng(0)))
+        self.assertEqual([len(b["action"]) for b in batches], [4, 4, 2])
+        self.assertEqual(sorted(np.concatenate([b["action"] for b in batches]).tolist()), list(range(10)))
+        for b in batches:
+            self.assertTrue((b["obs"][:, 0] == b["action"]).all())
+        self.assertEqual(len(list(data.batches(4, np.random.default_rng(0), drop_last=True))), 2)
+        ordered = np.concatenate([b["action"] for b in data.batches(3, shuffle=False)])
+        self.assertEqual(ordered.tolist(), list(range(10)))
+
+    def test_record_games(self):
+        random.seed(0)
+        wins = record_games(self.path, [RandomBot() for _ in range(3)], 20, seed=0)
+        data = TransitionDataset(self.path)
+        self.assertEqual(sum(wins), 20)
+        self.assertEqual(data["reward"].sum(), 20)
+        self.assertEqual(data["done"].sum(), 20 * 3)
+        self.assertTrue(data["mask"][np.arange(len(data)), data["action"].astype(int)].all())
+
+
+if __name__ == '__main__':
+    unittest.main()
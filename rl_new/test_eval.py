@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from rl_new.eval import RANDOM, evaluate, play_games, wilson_interval
+
+
+class WilsonIntervalTest(unittest.TestCase):
+    def test_known_values(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_bounds(self):
+        for wins, games in ((0, 10), (10, 10), (3, 7), (1, 1000)):
+            low, high = wilson_interval(wins, games)
+            # Up to rounding at 0 and 1
+            self.assertLessEqual(-1e-12, low)
+            self.assertLessEqual(low, wins / games + 1e-12)
+            self.assertLessEqual(wins / games, high + 1e-12)
+            self.assertLessEqual(high, 1 + 1e-12)
+        # More games, narrower interval
+        self.assertGreater(np.diff(wilson_interval(5, 10))[0], np.diff(wilson_interval(500, 1000))[0])
+
+
+class EvaluateTest(unittest.TestCase):
+    def test_results_do_not_depend_on_workers(self):
+        one = evaluate([RANDOM] * 3, 300, num_envs=64, seed=0, workers=1, num_shards=4)
+        two = evaluate([RANDOM] * 3, 300, num_envs=64, seed=0, workers=2, num_shards=4)
+        self.assertEqual([row["wins"] for row in one["seats"]], [row["wins"] for row in two["seats"]])
+        self.assertEqual(one["mean_length"], two["mean_length"])
+        self.assertEqual(one["policies"], two["policies"])
+
+    def test_report(self):
+        result = evaluate([RANDOM] * 3, 200, num_envs=32, seed=1, num_shards=3)
+        self.assertEqual(result["games"], 200)
+        self.assertEqual(sum(row["wins"] for row in result["seats"]), 200)
+        for row in result["seats"]:
+            self.assertEqual(row["win_rate"], row["wins"] / 200)
+            self.assertEqual(row["ci"], wilson_interval(row["wins"], 200))
+        policy = result["policies"][RANDOM]
+        self.assertEqual(policy["seats"], [0, 1, 2])
+        self.assertEqual(policy["wins"], 200)
+        self.assertAlmostEqual(policy["win_rate"], 1 / 3)
+        decisions = sum(sum(counts.values()) for counts in policy["actions"].values())
+        self.assertEqual(decisions, round(result["mean_length"] * 200))
+
+    def test_traces(self):
+        shard = play_games([RANDOM] * 2, 20, num_envs=8, seed=2, trace_rate=1.0)
+        self.assertEqual(shard["wins"].sum(), 20)
+        self.assertEqual(len(shard["traces"]), 20)
+        self.assertEqual(sorted(len(trace["steps"]) for trace in shard["traces"]), sorted(shard["lengths"]))
+        self.assertEqual(np.bincount([trace["winner"] for trace in shard["traces"]], minlength=2).tolist(),
+                         shard["wins"].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
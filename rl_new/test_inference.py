@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+from stable_baselines3 import PPO
+
+from rl_new.coup_env import Action
+from rl_new.inference import BatchedPolicies
+from rl_new.masking import MaskedPolicy
+from rl_new.vec_env import CoupVecEnv
+
+NUM_PLAYERS = 4
+
+
+def make_models():
+    """An unmasked and a masked model with different weights."""
+    plain = PPO("MlpPolicy", CoupVecEnv(1, NUM_PLAYERS, player_id=None), seed=0)
+    masked = PPO(MaskedPolicy, CoupVecEnv(1, NUM_PLAYERS, player_id=None, mask_obs=True), seed=1)
+    return plain, masked
+
+
+def positions(num_envs, seed):
+    """A masked-observation engine a few random legal decisions into its games."""
+    engine = CoupVecEnv(num_envs, NUM_PLAYERS, player_id=None, seed=seed, mask_obs=True)
+    engine.reset()
+    rng = np.random.default_rng(seed)
+    g = np.arange(num_envs)
+    for _ in range(rng.integers(5, 30)):
+        masks = engine.action_masks()
+        engine.reset_games(engine.advance(g, (masks * rng.random(masks.shape)).argmax(axis=1)))
+    return engine
+
+
+class BatchedPoliciesTest(unittest.TestCase):
+    def setUp(self):
+        self.models = make_models()
+
+    def test_matches_each_model(self):
+        plain, masked = self.models
+        # Seat 1 is random; seat 2 gets the policy rather than the model
+        cases = {"mixed": [0, None, 1, 0], "all random": [None] * NUM_PLAYERS, "masked only": [1] * NUM_PLAYERS}
+        for name, seat_policies in cases.items():
+            for seed in range(3):
+                with self.subTest(seat_policies=name, seed=seed):
+                    engine = positions(64, seed)
+                    seats = engine.to_act.copy()
+                    obs = engine.observe(seats).copy()
+                    policies = BatchedPolicies([plain, masked.policy], seat_policies, deterministic=True,
+                                               rng=np.random.default_rng(seed))
+                    actions = policies(obs, seats, np.arange(64))
+
+                    random_games = [i for i in range(64) if seat_policies[seats[i]] is None]
+                    expected = np.random.default_rng(seed).integers(0, len(Action), len(random_games))
+                    np.testing.assert_array_equal(actions[random_games], expected)
+                    for i in range(64):
+                        p = seat_policies[seats[i]]
+                        if p is None:
+                            continue
+                        model = self.models[p]
+                        features = obs[i, :model.observation_space.shape[0]]
+                        self.assertEqual(actions[i], model.predict(features, deterministic=True)[0], f"game {i}")
+
+    def test_masked_model_plays_legal_actions(self):
+        plain, masked = self.models
+        for deterministic in (False, True):
+            with self.subTest(deterministic=deterministic):
+                engine = positions(256, 4)
+                seats = engine.to_act.copy()
+                policies = BatchedPolicies([plain, masked], [0, 1, 1, None], deterministic,
+                                           np.random.default_rng(0))
+                actions = policies(engine.observe(seats), seats)
+                legal = engine.action_masks()[np.arange(256), actions]
+                by_masked = np.isin(seats, [1, 2])
+                self.assertTrue(by_masked.any())
+                self.assertTrue(legal[by_masked].all())
+
+
+if __name__ == '__main__':
+    unittest.main()
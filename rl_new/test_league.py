@@ -0,0 +1,134 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+from rl_new.league import SnapshotPool, LeagueOpponents, NUM_ACTIONS
+from rl_new.masking import MaskedPolicy
+
+OBS_DIM = 12
+
+
+def make_policy(policy_class=ActorCriticPolicy, seed=0):
+    th.manual_seed(seed)
+    extra = NUM_ACTIONS if policy_class is MaskedPolicy else 0
+    space = spaces.Box(0, 1, (OBS_DIM + extra,), dtype=np.float32)
+    return policy_class(space, spaces.Discrete(NUM_ACTIONS), lambda _: 0.0)
+
+
+def record_in_worker(pool):
+    # Runs in a worker process on the unpickled pool handle
+    pool.record([1, 1], [1, 0])
+    return float(pool.params[1].sum())
+
+
+class SnapshotPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = make_policy()
+        self.pool = SnapshotPool(self.policy, capacity=3)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_logits_match_the_policy(self):
+        slot = self.pool.add(self.policy, owner=0)
+        obs = np.random.default_rng(0).random((5, OBS_DIM), dtype=np.float32)
+        with th.no_grad():
+            features = self.policy.extract_features(th.as_tensor(obs))
+            expected = self.policy.action_net(self.policy.mlp_extractor.forward_actor(features)).numpy()
+        np.testing.assert_allclose(self.pool.logits(slot, obs), expected, rtol=1e-5, atol=1e-5)
+
+    def test_empty_pool_plays_random(self):
+        rng = np.random.default_rng(0)
+        slots = self.pool.sample(4, rng)
+        self.assertEqual(slots.tolist(), [-1] * 4)
+        actions = self.pool.act(slots, np.zeros((4, OBS_DIM), dtype=np.float32), rng)
+        self.assertTrue(((actions >= 0) & (actions < NUM_ACTIONS)).all())
+
+    def test_oldest_snapshot_is_replaced(self):
+        slots = [self.pool.add(make_policy(seed=i), owner=i) for i in range(4)]
+        self.assertEqual(slots, [0, 1, 2, 0])
+        self.assertEqual(len(self.pool), 3)
+        self.assertEqual(self.pool.slot_owner.tolist(), [3, 1, 2])
+
+    def test_add_resets_slot_stats(self):
+        self.pool.add(self.policy, 0)
+        self.pool.record([0, 0, -1], [1, 0, 1])
+        self.assertEqual((self.pool.wins[0], self.pool.games[0]), (1, 2))
+        self.pool.add(self.policy, 0)
+        self.pool.add(self.policy, 0)
+        self.pool.add(self.policy, 0)
+        self.assertEqual((self.pool.wins[0], self.pool.games[0]), (0, 0))
+
+    def test_pfsp_weights(self):
+        for owner in range(3):
+            self.pool.add(self.policy, owner)
+        # The learner beats slot 0 every time and never beats slot 2
+        self.pool.record([0] * 10 + [2] * 10, [1] * 10 + [0] * 10)
+        win_rate = np.array([11 / 12, 1 / 2, 1 / 12])
+        expected = (1 - win_rate) ** 2 / ((1 - win_rate) ** 2).sum()
+        counts = np.bincount(self.pool.sample(20000, np.random.default_rng(0)), minlength=3)
+        np.testing.assert_allclose(counts / 20000, expected, atol=0.015)
+
+        self.pool.pfsp_power = 0
+        counts = np.bincount(self.pool.sample(20000, np.random.default_rng(1)), minlength=3)
+        np.testing.assert_allclose(counts / 20000, [1 / 3] * 3, atol=0.015)
+
+    def test_masked_snapshots_play_legal_actions(self):
+        policy = make_policy(MaskedPolicy)
+        pool = SnapshotPool(policy, capacity=2)
+        try:
+            slot = pool.add(policy, 0)
+            rng = np.random.default_rng(0)
+            masks = rng.random((200, NUM_ACTIONS)) < 0.3
+            masks[np.arange(200), rng.integers(0, NUM_ACTIONS, 200)] = True
+            obs = np.concatenate([rng.random((200, OBS_DIM)), masks], axis=1).astype(np.float32)
+            actions = pool.act(np.full(200, slot), obs, rng)
+            self.assertTrue(masks[np.arange(200), actions].all())
+        finally:
+            pool.close()
+
+    def test_pickled_pool_shares_memory(self):
+        self.pool.add(make_policy(seed=1), 0)
+        self.pool.add(make_policy(seed=2), 1)
+        with ProcessPoolExecutor(1) as executor:
+            total = executor.submit(record_in_worker, self.pool).result()
+        self.assertAlmostEqual(total, float(self.pool.params[1].sum()), places=3)
+        self.assertEqual((self.pool.wins[1], self.pool.games[1]), (1, 2))
+
+        handle = pickle.loads(pickle.dumps(self.pool))
+        try:
+            self.pool.add(make_policy(seed=3), 2)
+            self.assertEqual(len(handle), 3)
+            np.testing.assert_array_equal(handle.params[2], self.pool.params[2])
+        finally:
+            handle.close()
+
+
+class LeagueOpponentsTest(unittest.TestCase):
+    def test_seats_keep_their_snapshot_and_results_are_recorded(self):
+        pool = SnapshotPool(make_policy(), capacity=4)
+        try:
+            for owner in range(4):
+                pool.add(make_policy(seed=owner), owner)
+            opponents = LeagueOpponents(pool, num_envs=3, num_players=3, player_id=1, rng=np.random.default_rng(0))
+            opponents.start_games(np.arange(3))
+            self.assertTrue((opponents.assigned[:, 1] == -1).all())
+            self.assertTrue((opponents.assigned[:, [0, 2]] >= 0).all())
+            slots = opponents.opponent_slots([0, 2])
+
+            opponents.end_games(np.array([0, 2]), np.array([True, False]))
+            expected_games = np.bincount(slots.ravel(), minlength=4)
+            expected_wins = np.bincount(slots[0], minlength=4)
+            np.testing.assert_array_equal(pool.games, expected_games)
+            np.testing.assert_array_equal(pool.wins, expected_wins)
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from functools import partial
+
+import numpy as np
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from rl_new.parallel import ShmSubprocVecEnv
+from rl_new.train import make_agent_env
+
+NUM_ENVS = 3
+
+
+def env_fns(masked=False):
+    return [partial(make_agent_env, 1, masked) for _ in range(NUM_ENVS)]
+
+
+def legal_actions(vec_env, rng):
+    """A random legal action per env, from each env's action_masks()."""
+    masks = np.array(vec_env.env_method("action_masks"), dtype=bool)
+    return (masks * rng.random(masks.shape)).argmax(axis=1)
+
+
+class ShmSubprocVecEnvTest(unittest.TestCase):
+    def assert_same_infos(self, infos, expected):
+        self.assertEqual(len(infos), len(expected))
+        for info, expected_info in zip(infos, expected):
+            self.assertEqual(set(info), set(expected_info))
+            for key, value in expected_info.items():
+                np.testing.assert_array_equal(info[key], value, err_msg=key)
+
+    def test_matches_dummy_vec_env(self):
+        for masked in (False, True):
+            with self.subTest(masked=masked):
+                expected_env = DummyVecEnv(env_fns(masked))
+                vec_env = ShmSubprocVecEnv(env_fns(masked))
+                try:
+                    self.assertEqual(vec_env.observation_space, expected_env.observation_space)
+                    self.assertEqual(vec_env.action_space, expected_env.action_space)
+                    expected_env.seed(5)
+                    vec_env.seed(5)
+                    np.testing.assert_array_equal(vec_env.reset(), expected_env.reset())
+                    self.assert_same_infos(vec_env.reset_infos, expected_env.reset_infos)
+
+                    rng = np.random.default_rng(0)
+                    episodes = 0
+                    for _ in range(300):
+                        actions = legal_actions(expected_env, rng)
+                        obs, rewards, dones, infos = vec_env.step(actions)
+                        expected_obs, expected_rewards, expected_dones, expected_infos = expected_env.step(actions)
+                        np.testing.assert_array_equal(obs, expected_obs)
+                        np.testing.assert_array_equal(rewards, expected_rewards)
+                        np.testing.assert_array_equal(dones, expected_dones)
+                        self.assert_same_infos(infos, expected_infos)
+                        self.assert_same_infos(vec_env.reset_infos, expected_env.reset_infos)
+                        episodes += int(dones.sum())
+                    # Several games ended, so the reset-on-done path was compared too
+                    self.assertGreater(episodes, NUM_ENVS)
+                finally:
+                    vec_env.close()
+                    expected_env.close()
+
+    def test_close_releases_the_workers(self):
+        vec_env = ShmSubprocVecEnv(env_fns())
+        vec_env.reset()
+        processes = list(vec_env.processes)
+        self.assertTrue(all(process.is_alive() for process in processes))
+        # A step still in flight is collected before the workers are told to stop
+        vec_env.step_async(np.zeros(NUM_ENVS, dtype=np.int64))
+        vec_env.close()
+        self.assertTrue(vec_env.closed)
+        for process in processes:
+            self.assertFalse(process.is_alive())
+            self.assertEqual(process.exitcode, 0)
+        vec_env.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
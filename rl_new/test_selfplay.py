@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3 import PPO
+from stable_baselines3.common.buffers import RolloutBuffer
+
+from rl_new.selfplay import PolicyRollout, SharedRolloutTrainer
+from rl_new.vec_env import CoupVecEnv
+
+
+def make_trainer(num_envs, seat_models, frozen_seats=(), n_steps=256, snapshot_every=1):
+    engine = CoupVecEnv(num_envs, len(seat_models), player_id=None, seed=0)
+    models = [PPO("MlpPolicy", engine, n_steps=n_steps, batch_size=16, n_epochs=1, seed=i)
+              for i in range(max(seat_models) + 1)]
+    return SharedRolloutTrainer(models, engine, seat_models, frozen_seats, snapshot_every)
+
+
+class PolicyRolloutTest(unittest.TestCase):
+    def test_finish_credits_last_decision_of_each_column(self):
+        rollout = PolicyRollout(3, 2, n_steps=2)
+        rollout.record(np.array([0, 1]), np.ones((2, 2)), np.array([3, 4]), np.zeros(2), np.zeros(2))
+        rollout.record(np.array([0]), np.ones((1, 2)), np.array([5]), np.zeros(1), np.zeros(1))
+        rollout.finish(np.array([0, 1, 2]), np.array([1.0, 0.5, 1.0], dtype=np.float32))
+        self.assertEqual(rollout.rewards[:2, 0].tolist(), [0, 1])
+        self.assertEqual(rollout.rewards[:1, 1].tolist(), [0.5])
+        # Column 2 never decided, so it has nothing to credit
+        self.assertEqual(rollout.count.tolist(), [2, 1, 0])
+        self.assertEqual(rollout.starts[:2, 0].tolist(), [1, 0])
+        self.assertEqual(rollout.episode_start.tolist(), [1, 1, 1])
+
+    def test_drain_keeps_the_next_rollout(self):
+        rollout = PolicyRollout(2, 1, n_steps=2)
+        for t in range(4):
+            rollout.record(np.array([0, 1]), np.full((2, 1), t), np.array([t, t]), np.full(2, t), np.zeros(2))
+            if t == 1:
+                rollout.finish(np.array([0, 1]), np.array([1, 0], dtype=np.float32))
+        self.assertTrue(rollout.ready())
+        buffer = RolloutBuffer(2, spaces.Box(0, 1, (1,)), spaces.Discrete(8), n_envs=2)
+        last_values, dones = rollout.drain(buffer)
+        self.assertEqual(buffer.actions[:, :, 0].tolist(), [[0, 0], [1, 1]])
+        self.assertEqual(buffer.rewards.tolist(), [[0, 0], [1, 0]])
+        # Decision 2 opens a new episode: it bootstraps the rollout and flags the done
+        self.assertEqual(last_values.tolist(), [2, 2])
+        self.assertEqual(dones.tolist(), [1, 1])
+        self.assertEqual(rollout.count.tolist(), [2, 2])
+        self.assertEqual(rollout.actions[:2, 0].tolist(), [2, 3])
+
+
+class SharedRolloutTrainerTest(unittest.TestCase):
+    def play(self, trainer, steps):
+        """Run trainer.step() without training; returns decisions and wins per (seat, game)."""
+        engine = trainer.engine
+        trainer.learn(0)
+        trainer._total = 1 << 30
+        wins = np.zeros((engine.num_players, engine.num_envs), dtype=np.int64)
+        reset_games = engine._reset_games
+
+        def record_winners(g):
+            wins[engine._first_at[engine.alive[g], 0], g] += 1
+            reset_games(g)
+
+        engine._reset_games = record_winners
+        decisions = np.zeros_like(wins)
+        for _ in range(steps):
+            np.add.at(decisions, (engine.to_act, engine._all), 1)
+            trainer.step()
+        self.assertGreater(wins.sum(), 0)
+        return decisions, wins
+
+    def check_columns(self, trainer, decisions, wins):
+        n = trainer.engine.num_envs
+        for i, rollout in enumerate(trainer.rollouts):
+            for slot, seat in enumerate(trainer.learning_seats[i]):
+                columns = slot * n + np.arange(n)
+                self.assertEqual(rollout.count[columns].tolist(), decisions[seat].tolist())
+                for g, c in enumerate(columns):
+                    self.assertEqual(rollout.rewards[:rollout.count[c], c].sum(), wins[seat, g])
+
+    def test_each_seat_credited_in_its_own_columns(self):
+        trainer = make_trainer(4, [0, 1, 0])
+        decisions, wins = self.play(trainer, 120)
+        self.assertEqual(trainer.learning_seats, [[0, 2], [1]])
+        self.check_columns(trainer, decisions, wins)
+
+    def test_frozen_seats_are_not_recorded(self):
+        trainer = make_trainer(4, [0, 0, 1], frozen_seats={1})
+        decisions, wins = self.play(trainer, 120)
+        self.assertEqual(trainer.learning_seats, [[0], [2]])
+        self.assertEqual(sum(r.count.sum() for r in trainer.rollouts), decisions[[0, 2]].sum())
+        self.check_columns(trainer, decisions, wins)
+        snapshot, policy = trainer.snapshots[0], trainer.models[0].policy
+        self.assertIsNot(snapshot, policy)
+        self.assertIsNone(trainer.snapshots[1])
+
+    def test_learn_refreshes_snapshots(self):
+        trainer = make_trainer(2, [0, 0], frozen_seats={1}, n_steps=8)
+        before = {k: v.clone() for k, v in trainer.models[0].policy.state_dict().items()}
+        trainer.learn(32)
+        self.assertGreaterEqual(trainer.models[0].num_timesteps, 32)
+        self.assertGreaterEqual(trainer.iterations[0], 2)
+        after = trainer.models[0].policy.state_dict()
+        self.assertFalse(all(th.equal(before[k], after[k]) for k in before))
+        snapshot = trainer.snapshots[0].state_dict()
+        self.assertTrue(all(th.equal(snapshot[k], after[k]) for k in after))
+
+    def test_needs_a_learning_seat_per_model(self):
+        with self.assertRaises(ValueError):
+            make_trainer(2, [0, 1], frozen_seats={1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import unittest
+
+import numpy as np
+
+from rl_new.coup_env import MASK_ARRAYS, OBS_PER_PLAYER
+from rl_new.vec_env import CoupVecEnv, NUM_ACTIONS, COUNTER_CHALLENGE
+from game.engine import Engine, NUM_CARD_TYPES
+
+
+def snapshot(env, i):
+    """Game i of env in the Engine.snapshot() layout."""
+    return (*env.coins[i].tolist(), *env.hands[i].ravel().tolist(), *env.deck[i].tolist(), int(env.deck[i].sum()),
+            int(env.alive[i]), int(env.phase[i]), int(env.actor[i]), int(env.to_act[i]),
+            int(env.pending_action[i]), int(env.pending_target[i]),
+            int(env.counteraction_player[i]), int(env.counteraction_card[i]))
+
+
+def public(state, num_players):
+    """The parts of a snapshot that do not depend on random draws: coins, cards per seat,
+    deck size, alive mask, phase, actor, to_act, pending action and target, and the
+    counter player and card while they matter."""
+    p = num_players
+    hands = state[p:3 * p]
+    cards = tuple(sum(card != -1 for card in hands[2 * s:2 * s + 2]) for s in range(p))
+    rest = state[3 * p + NUM_CARD_TYPES:]
+    phase = rest[2]
+    return state[:p] + cards + rest[:7] + (rest[7:] if phase == COUNTER_CHALLENGE else ())
+
+
+class CoupVecEnvTest(unittest.TestCase):
+    def test_same_decisions_as_engine(self):
+        # From the same state, a decision must have the same effect in both; card
+        # draws and discards are random in each, so the engine is reloaded from the
+        # batched game before every step
+        for num_players in range(2, 7):
+            env = CoupVecEnv(8, num_players, player_id=None, seed=num_players)
+            env.reset()
+            engine = Engine(num_players, random.Random(num_players))
+            rng = np.random.default_rng(num_players)
+            expected_obs = np.zeros(num_players * OBS_PER_PLAYER, dtype=np.float32)
+            finished = 0
+            for _ in range(200):
+                actions = rng.integers(0, NUM_ACTIONS, env.num_envs)
+                masks = env.action_masks()
+                obs = env._observe(env.to_act.copy())
+                expected = []
+                for i in range(env.num_envs):
+                    engine.restore(snapshot(env, i))
+                    np.testing.assert_array_equal(masks[i], MASK_ARRAYS[engine.legal_mask()])
+                    engine.observe(engine.to_act, expected_obs)
+                    np.testing.assert_array_equal(obs[i], expected_obs)
+                    engine.step(int(actions[i]))
+                    expected.append(public(engine.snapshot(), num_players))
+                env._advance(env._all, actions)
+                for i in range(env.num_envs):
+                    self.assertEqual(public(snapshot(env, i), num_players), expected[i])
+                done = np.nonzero(env._popcount[env.alive] <= 1)[0]
+                finished += len(done)
+                env._reset_games(done)
+            self.assertGreater(finished, 0)
+
+    def test_learner_rewards(self):
+        env = CoupVecEnv(16, 3, player_id=1, seed=0)
+        env.reset()
+        rng = np.random.default_rng(0)
+        wins = games = 0
+        for _ in range(300):
+            masks = env.action_masks()
+            self.assertTrue((env.to_act == 1).all())
+            actions = np.array([rng.choice(np.nonzero(m)[0]) for m in masks])
+            obs, rewards, dones, infos = env.step(actions)
+            self.assertTrue((rewards[~dones] == 0).all())
+            for i in np.nonzero(dones)[0]:
+                self.assertEqual(infos[i]["episode"]["r"], rewards[i])
+                self.assertIn("terminal_observation", infos[i])
+            wins += int(rewards.sum())
+            games += int(dones.sum())
+        self.assertGreater(games, 0)
+        self.assertLess(wins, games)
+
+    def test_stepping_games_directly(self):
+        env = CoupVecEnv(6, 3, player_id=None, seed=0)
+        env.reset()
+        rng = np.random.default_rng(0)
+        games = np.arange(1, 6)
+        ended = []
+        for _ in range(2000):
+            masks = env.action_masks()[games]
+            actions = np.array([rng.choice(np.nonzero(m)[0]) for m in masks])
+            steps = env.episode_steps.copy()
+            finished = env.advance(games, actions)
+            np.testing.assert_array_equal(env.episode_steps - steps, np.isin(np.arange(6), games))
+            alive = [bin(a).count("1") for a in env.alive[finished]]
+            self.assertEqual(alive, [1] * len(finished))
+            np.testing.assert_array_equal(1 << env.winners(finished), env.alive[finished])
+            ended.extend(finished.tolist())
+            env.reset_games(finished)
+            self.assertTrue((env.episode_steps[finished] == 0).all())
+        self.assertGreater(len(ended), 0)
+        self.assertNotIn(0, ended)
+        self.assertEqual(env.episode_steps[0], 0)
+        obs = env.observe(np.full(6, 2))
+        self.assertEqual(obs.shape, (6, 3 * OBS_PER_PLAYER))
+
+
+if __name__ == '__main__':
+    unittest.main()
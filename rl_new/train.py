@@ -1,75 +1,196 @@
-import gym
+import argparse
+import os
+from functools import partial
+
+import gymnasium as gym
 import numpy as np
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv
-from stable_baselines3.common.env_util import make_vec_env
-from coup_env import env as coup_env_factory
-import os
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+from rl_new.coup_env import env as coup_env_factory, Action
+from rl_new.inference import BatchedPolicies
+from rl_new.league import LeagueCallback, LeagueOpponents, SnapshotPool
+from rl_new.masking import MaskedPolicy, MaskObservation, is_masked
+from rl_new.parallel import ShmSubprocVecEnv
+from rl_new.selfplay import SharedRolloutTrainer
+from rl_new.vec_env import CoupVecEnv
 
 NUM_PLAYERS = 4
 TIMESTEPS = 100000  # Adjust as needed
+NUM_ENVS = 64  # Games stepped together per agent (one CoupVecEnv, or one process each with --parallel)
+# Saved agents live next to this file, whatever the working directory
+MODEL_PATHS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), f"ppo_agent_{i}") for i in range(NUM_PLAYERS)]
+
+# Wrap to provide only this player's observations and actions; opponents play
+# uniformly random actions drawn from the wrapper's seeded np_random, or come
+# from a league.LeagueOpponents for this one game
+class SingleAgentWrapper(gym.Env):
+    def __init__(self, env, player_id, opponents=None):
+        super().__init__()
+        self.env = env
+        self.player_id = player_id
+        self.opponents = opponents
+        self.agent = f"player_{player_id}"
+        self.action_space = env.action_spaces[self.agent]
+        self.observation_space = gym.spaces.Box(low=0, high=1, shape=(len(env.observe(self.agent)),), dtype=np.float32)
+
+    def _play_opponents(self):
+        # PettingZoo requires advancing through all agents, so we step env until our turn again
+        while not self.env.dones[self.agent] and self.env.agent_selection != self.agent:
+            if self.opponents is None:
+                self.env.step(int(self.np_random.integers(self.action_space.n)))
+                continue
+            agent = self.env.agent_selection
+            obs = self.env.observe(agent)
+            if self.opponents.pool.masked:
+                obs = np.concatenate([obs, self.env.action_mask(agent)], dtype=np.float32)
+            seat = np.array([self.env.agent_name_mapping[agent]])
+            self.env.step(int(self.opponents(obs[None], seat, self._game)[0]))
+
+    def _result(self):
+        done = self.env.dones[self.agent]
+        obs = np.zeros(self.observation_space.shape, dtype=np.float32) if done else self.env.observe(self.agent).copy()
+        info = {}
+        if done and self.opponents is not None:
+            # Reported to the training process, which keeps the league results (see league.LeagueCallback)
+            info["league"] = (self.opponents.opponent_slots(self._game)[0].tolist(), self.env.rewards[self.agent] > 0)
+        return obs, self.env.rewards[self.agent], done, False, info
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.env.reset(seed=seed)
+        if self.opponents is not None:
+            self._game = np.zeros(1, dtype=np.int64)
+            self.opponents.rng = self.np_random
+            self.opponents.start_games(self._game)
+        self._play_opponents()
+        return self._result()[0], {}
+
+    def step(self, action):
+        self.env.step(int(action))
+        self._play_opponents()
+        return self._result()
+
+    def action_masks(self):
+        return self.env.action_mask(self.agent)
+
+    def render(self):
+        self.env.render()
+
 
-def make_agent_env(player_id):
-    env = coup_env_factory()
+def make_agent_env(player_id, masked=False, pool=None):
+    env = coup_env_factory(NUM_PLAYERS)
     env.reset()
-    # Wrap to provide only this player's observations and actions
-    class SingleAgentWrapper(gym.Env):
-        def __init__(self, env, player_id):
-            super().__init__()
-            self.env = env
-            self.player_id = player_id
-            self.agent = f"player_{player_id}"
-            self.action_space = env.action_spaces[self.agent]
-            self.observation_space = gym.spaces.Box(low=0, high=1, shape=(len(env.observe(self.agent)),), dtype=np.float32)
-
-        def reset(self):
-            self.env.reset()
-            obs = self.env.observe(self.agent)
-            return obs
-
-        def step(self, action):
-            done = False
-            reward = 0
-            info = {}
-            # PettingZoo requires advancing through all agents, so we step env until our turn again
-            while True:
-                current_agent = self.env.agent_selection
-                if current_agent == self.agent:
-                    self.env.step(action)
-                else:
-                    self.env.step(self.env.action_spaces[current_agent].sample())
-
-                if self.env.dones[self.agent]:
-                    done = True
-                    reward = self.env.rewards[self.agent]
-                    obs = np.zeros_like(self.env.observe(self.agent))
-                    break
-
-                if self.env.agent_selection == self.agent:
-                    obs = self.env.observe(self.agent)
-                    reward = self.env.rewards[self.agent]
-                    break
-
-            return obs, reward, done, info
-
-        def render(self, mode='human'):
-            self.env.render(mode)
-
-    return SingleAgentWrapper(env, player_id)
-
-def main():
-    agents = []
+    opponents = None if pool is None else LeagueOpponents(pool, 1, NUM_PLAYERS, player_id)
+    env = SingleAgentWrapper(env, player_id, opponents)
+    return MaskObservation(env) if masked else env
+
+
+def make_vec_env(player_id, num_envs, parallel, seed, opponents=None, masked=False, pool=None):
+    # With a league pool the opponents are snapshots drawn from it
+    if parallel:
+        if opponents is not None:
+            raise ValueError("policy opponents are only supported without --parallel")
+        # One SingleAgentWrapper per worker process; league workers all map the pool's shared weights
+        vec_env = ShmSubprocVecEnv([partial(make_agent_env, player_id, masked, pool) for _ in range(num_envs)])
+    else:
+        if pool is not None:
+            opponents = LeagueOpponents(pool, num_envs, NUM_PLAYERS, player_id, np.random.default_rng(seed))
+        vec_env = CoupVecEnv(num_envs, NUM_PLAYERS, player_id=player_id, opponents=opponents, mask_obs=masked)
+    # Worker i is seeded with seed + i on its first reset
+    vec_env.seed(seed)
+    return vec_env
+
+
+def train_concurrent(num_envs, n_steps, seed, shared_policy=False, frozen_seats=(), snapshot_every=1, masked=False):
+    # All agents learn at once from the same self-play games, one seat each, or
+    # one shared policy learning from every seat that is not frozen
+    engine = CoupVecEnv(num_envs, NUM_PLAYERS, player_id=None, mask_obs=masked)
+    engine.seed(seed)
+    num_models = 1 if shared_policy else NUM_PLAYERS
+    seat_models = [0] * NUM_PLAYERS if shared_policy else list(range(NUM_PLAYERS))
+    policy = MaskedPolicy if masked else "MlpPolicy"
+    models = [PPO(policy, engine, n_steps=n_steps, seed=seed + i, verbose=1) for i in range(num_models)]
+    SharedRolloutTrainer(models, engine, seat_models, frozen_seats, snapshot_every).learn(TIMESTEPS)
     for i in range(NUM_PLAYERS):
-        env = make_agent_env(i)
-        vec_env = DummyVecEnv([lambda: env])
-        model = PPO("MlpPolicy", vec_env, verbose=1)
-        agents.append((model, env))
+        models[seat_models[i]].save(MODEL_PATHS[i])
+
+
+def load_opponents(paths, masked=False):
+    # One saved model for every seat, or one per seat; the learner's own entry is skipped
+    models = [PPO.load(path) for path in paths]
+    if not masked and any(is_masked(model) for model in models):
+        raise ValueError("masked opponent models need --masked")
+    if len(models) == 1:
+        models *= NUM_PLAYERS
+    if len(models) != NUM_PLAYERS:
+        raise ValueError(f"expected 1 or {NUM_PLAYERS} opponent models, got {len(models)}")
+    return models
+
+
+def make_pool(masked, pool_size, pfsp_power):
+    # Template policy with the learners' default PPO architecture, only used to size the pool
+    observation_space = CoupVecEnv(1, NUM_PLAYERS, mask_obs=masked).observation_space
+    policy_class = MaskedPolicy if masked else ActorCriticPolicy
+    template = policy_class(observation_space, gym.spaces.Discrete(len(Action)), lambda _: 0.0)
+    return SnapshotPool(template, pool_size, pfsp_power)
+
+
+def main(num_envs=NUM_ENVS, parallel=False, seed=0, concurrent=False, shared_policy=False, frozen_seats=(),
+         snapshot_every=1, opponent_paths=(), masked=False, league=False, pool_size=32, pfsp_power=2.0):
+    # Keeps PPO's default rollout size of 2048 transitions
+    n_steps = max(1, 2048 // num_envs)
+    if league and (concurrent or shared_policy):
+        raise ValueError("--league trains one agent at a time; it cannot be combined with --concurrent")
+    if concurrent or shared_policy:
+        train_concurrent(num_envs, n_steps, seed, shared_policy, frozen_seats, snapshot_every, masked)
+        return
+
+    if league and opponent_paths:
+        raise ValueError("--league draws the opponents from its own pool; drop --opponents")
+    opponent_models = load_opponents(opponent_paths, masked) if opponent_paths else None
+    # League: snapshots of every agent so far, taken every snapshot_every rollouts, play the opponents
+    pool = make_pool(masked, pool_size, pfsp_power) if league else None
 
     # Training loop for all agents (independent learning)
-    for i, (model, env) in enumerate(agents):
+    for i in range(NUM_PLAYERS):
         print(f"Training agent {i}...")
-        model.learn(total_timesteps=TIMESTEPS)
-        model.save(f"ppo_agent_{i}")
+        opponents = None
+        if opponent_models is not None:
+            # All opponent decisions of the num_envs games go through one forward pass per model
+            opponents = BatchedPolicies(opponent_models, [None if s == i else s for s in range(NUM_PLAYERS)])
+        vec_env = make_vec_env(i, num_envs, parallel, seed + i * num_envs, opponents, masked, pool)
+        model = PPO(MaskedPolicy if masked else "MlpPolicy", vec_env, n_steps=n_steps, seed=seed + i, verbose=1)
+        callback = None
+        if pool is not None:
+            pool.reset_stats()
+            callback = LeagueCallback(pool, i, snapshot_every)
+        model.learn(total_timesteps=TIMESTEPS, callback=callback)
+        model.save(MODEL_PATHS[i])
+        vec_env.close()
+    if pool is not None:
+        pool.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train one PPO agent per seat")
+    parser.add_argument("--num-envs", type=int, default=NUM_ENVS, help="environments stepped per rollout")
+    parser.add_argument("--parallel", action="store_true", help="run each environment in its own worker process")
+    parser.add_argument("--concurrent", action="store_true", help="train all agents together on shared self-play games")
+    parser.add_argument("--shared-policy", action="store_true", help="one policy plays and learns from every seat")
+    parser.add_argument("--frozen-seats", type=int, nargs="*", default=[],
+                        help="seats played by a frozen snapshot of their policy and not trained on")
+    parser.add_argument("--snapshot-every", type=int, default=1,
+                        help="policy updates between snapshot refreshes (or between league snapshots)")
+    parser.add_argument("--opponents", nargs="*", default=[],
+                        help="saved models playing the opponents (one for all seats or one per seat) instead of random")
+    parser.add_argument("--masked", action="store_true",
+                        help="append the legal-action mask to observations and only sample legal actions")
+    parser.add_argument("--league", action="store_true",
+                        help="opponents are PFSP-sampled frozen snapshots of the agents trained so far")
+    parser.add_argument("--pool-size", type=int, default=32, help="league snapshots kept")
+    parser.add_argument("--pfsp-power", type=float, default=2.0,
+                        help="PFSP weight (1 - win rate) ** power of each snapshot; 0 samples uniformly")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.num_envs, args.parallel, args.seed, args.concurrent, args.shared_policy, args.frozen_seats,
+         args.snapshot_every, args.opponents, args.masked, args.league, args.pool_size, args.pfsp_power)
@@ -0,0 +1,436 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from rl_new.coup_env import Action, Card, MASK_ARRAYS, OBS_PER_PLAYER
+from game import engine
+from game.deck import draw_counts
+
+# Batched version of CoupEnv for a single learning seat against random (or policy) opponents
+# (the same setup as SingleAgentWrapper in train.py). All num_envs games live in
+# flat arrays and every phase of the game/engine.py state machine is advanced for many
+# games at once, so PPO can use a large n_envs without a Python env per game.
+
+EMPTY = -1
+NUM_CARDS = len(Card)
+NUM_ACTIONS = len(Action)
+INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, EXCHANGE, STEAL, PASS = (a.value for a in Action)
+
+# CoupEnv.phase values
+ACTION_SELECTION, CHALLENGE, COUNTER, COUNTER_CHALLENGE = (
+    engine.ACTION_SELECTION, engine.CHALLENGE, engine.COUNTER, engine.COUNTER_CHALLENGE)
+
+MAX_PLAYERS = 6  # exchange draws up to 2 of the 15 - 2 * num_players cards left in the deck
+
+# Array versions of the rule tables in game/engine.py
+# Card claimed by each action (EMPTY = no claim, cannot be challenged)
+CLAIM_CARD = np.array(engine.CLAIM_CARD, dtype=np.int64)
+
+# BLOCKS[action, card]: card can be claimed to block action
+BLOCKS = np.zeros((NUM_ACTIONS, NUM_CARDS), dtype=bool)
+for _action, _cards in enumerate(engine.BLOCKERS):
+    BLOCKS[_action, list(_cards)] = True
+
+TARGETED = np.zeros(NUM_ACTIONS, dtype=bool)
+TARGETED[list(engine.TARGETED)] = True
+
+# LEGAL[coin bucket, action], buckets are <3, 3-6, 7+
+LEGAL = np.zeros((3, NUM_ACTIONS), dtype=bool)
+for _bucket, _actions in enumerate(engine.LEGAL):
+    LEGAL[_bucket, list(_actions)] = True
+
+# MASKS[phase, coin bucket, pending action] = bool mask of the decisions to_act can make
+MASKS = MASK_ARRAYS[np.array(engine.LEGAL_MASK)]
+
+
+def _seat_tables(num_players):
+    """engine.seat_tables as arrays, plus popcount[m] = number of seats alive in m."""
+    first_at, next_turn = (np.array(table, dtype=np.int64) for table in engine.seat_tables(num_players))
+    popcount = np.array([bin(m).count("1") for m in range(1 << num_players)], dtype=np.int64)
+    return first_at, next_turn, popcount
+
+
+class CoupVecEnv(VecEnv):
+    """num_envs independent CoupEnv games seen from player_<player_id>.
+
+    Opponents play uniformly random actions, exactly like SingleAgentWrapper,
+    and a step returns when it is the learner's decision again or the game is
+    over (reward 1 for a win). Finished games are reset automatically and their
+    last observation is put in infos[i]["terminal_observation"]. action_masks()
+    gives the legal actions of the pending decision in every game.
+
+    If opponents is given it plays instead: it is called as opponents(obs, seats, g)
+    with the pending opponent decision of every waiting game g at once (e.g. an
+    inference.BatchedPolicies) and returns their actions. Opponents with
+    start_games(g) and end_games(g, won) methods are also told when games start
+    and end, and whether the learner won (see league.LeagueOpponents).
+
+    With player_id=None there is no learning seat: nobody is played for, and the
+    caller steps whichever seat is to_act in each game through observe(),
+    advance(), winners() and reset_games() (see selfplay.py and eval.py).
+
+    With mask_obs=True every observation ends with the action mask of the
+    pending decision, for masking.MaskedPolicy.
+    """
+
+    def __init__(self, num_envs, num_players=4, player_id=0, seed=None, opponents=None, mask_obs=False):
+        if not 2 <= num_players <= MAX_PLAYERS:
+            raise ValueError(f"num_players must be between 2 and {MAX_PLAYERS}, got {num_players}")
+        self.num_players = num_players
+        self.player_id = player_id
+        self.opponents = opponents
+        self.mask_obs = mask_obs
+        self.render_mode = None
+        self.rng = np.random.default_rng(seed)
+        obs_dim = num_players * OBS_PER_PLAYER + (NUM_ACTIONS if mask_obs else 0)
+        observation_space = spaces.Box(low=0, high=1, shape=(obs_dim,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, spaces.Discrete(NUM_ACTIONS))
+
+        n = num_envs
+        self.coins = np.zeros((n, num_players), dtype=np.int64)
+        self.hands = np.full((n, num_players, 2), EMPTY, dtype=np.int64)
+        self.alive = np.zeros(n, dtype=np.int64)
+        self.deck = np.zeros((n, NUM_CARDS), dtype=np.int64)
+        self.phase = np.zeros(n, dtype=np.int64)
+        self.actor = np.zeros(n, dtype=np.int64)
+        self.to_act = np.zeros(n, dtype=np.int64)
+        self.pending_action = np.zeros(n, dtype=np.int64)
+        self.pending_target = np.zeros(n, dtype=np.int64)
+        self.counteraction_player = np.zeros(n, dtype=np.int64)
+        self.counteraction_card = np.zeros(n, dtype=np.int64)
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+
+        self._first_at, self._next_turn, self._popcount = _seat_tables(num_players)
+        self._all = np.arange(n)
+        # Flat observation rows; _obs is the per-seat view of their first num_players * OBS_PER_PLAYER columns
+        self._obs_flat = np.zeros((n, obs_dim), dtype=np.float32)
+        self._obs = self._obs_flat[:, :num_players * OBS_PER_PLAYER].reshape(n, num_players, OBS_PER_PLAYER)
+        self._actions = None
+
+    # --- VecEnv API ---
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+            self._seeds = [None] * self.num_envs
+        self._reset_games(self._all)
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return self._observe().copy()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        g = self._all
+        self._advance(g, self._actions)
+        self._play_opponents(g)
+        self.episode_steps += 1
+
+        done = self._popcount[self.alive] <= 1
+        winner = self._first_at[self.alive, 0]
+        rewards = (done & (winner == self.player_id)).astype(np.float32)
+        obs = self._observe().copy()
+        infos = [{} for _ in range(self.num_envs)]
+
+        finished = np.nonzero(done)[0]
+        if len(finished):
+            for i in finished:
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["episode"] = {"r": float(rewards[i]), "l": int(self.episode_steps[i])}
+            if hasattr(self.opponents, "end_games"):
+                self.opponents.end_games(finished, winner[finished] == self.player_id)
+            self._reset_games(finished)
+            obs[finished] = self._observe()[finished]
+        return obs, rewards, done, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        if method_name in self._PER_GAME_METHODS:
+            # Already batched: one row per game
+            return list(method(*method_args, **method_kwargs)[self._get_indices(indices)])
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    _PER_GAME_METHODS = ("action_masks",)
+
+    def action_masks(self):
+        """(num_envs, NUM_ACTIONS) bool masks of the decision pending in each game."""
+        seats = self.to_act
+        coins = self.coins[self._all, seats]
+        bucket = (coins >= 3).astype(np.int64) + (coins >= 7)
+        return MASKS[self.phase, bucket, self.pending_action]
+
+    # --- Stepping games directly (player_id=None) ---
+
+    def observe(self, seats):
+        """Observation rows of every game from seats[i]'s view; overwritten by the next call."""
+        return self._observe(seats)
+
+    def advance(self, g, actions):
+        """Decision actions[i] by the seat to act in game g[i]; returns the games of g that ended."""
+        self._advance(g, actions)
+        self.episode_steps[g] += 1
+        return g[self._popcount[self.alive[g]] <= 1]
+
+    def winners(self, g):
+        """Winning seat of each ended game in g."""
+        return self._first_at[self.alive[g], 0]
+
+    def reset_games(self, g):
+        """Deal new games in g."""
+        self._reset_games(g)
+
+    # --- Batched CoupEnv ---
+
+    def _reset_games(self, g):
+        self.coins[g] = 2
+        self.hands[g] = EMPTY
+        self.alive[g] = (1 << self.num_players) - 1
+        self.deck[g] = 3
+        for p in range(self.num_players):
+            for slot in range(2):
+                self.hands[g, p, slot] = self._draw(g)
+        self.phase[g] = ACTION_SELECTION
+        self.actor[g] = 0
+        self.to_act[g] = 0
+        self.episode_steps[g] = 0
+        if hasattr(self.opponents, "start_games"):
+            self.opponents.start_games(g)
+        self._play_opponents(g)
+
+    def _observe(self, seats=None):
+        # Same layout as CoupEnv._observe(player_<seat>), seat defaults to player_id
+        # (or to the seat to act when there is no learner)
+        if seats is None:
+            seats = self.to_act if self.player_id is None else np.full(self.num_envs, self.player_id)
+        obs = self._obs
+        obs[:, :, 0] = self.coins / 10
+        obs[:, :, 1] = (self.hands != EMPTY).sum(axis=2) / 2
+        obs[:, :, 2] = (self.alive[:, None] >> np.arange(self.num_players)) & 1
+        obs[:, :, 3:] = 0
+        own = obs[self._all, seats, 3:]
+        for slot in range(2):
+            card = self.hands[self._all, seats, slot]
+            has = np.nonzero(card != EMPTY)[0]
+            own[has, card[has]] += 1
+        obs[self._all, seats, 3:] = own
+        if self.mask_obs:
+            self._obs_flat[:, -NUM_ACTIONS:] = self.action_masks()
+        return self._obs_flat
+
+    def _play_opponents(self, g):
+        """Opponent actions for everyone else until the learner acts or the game ends."""
+        if self.player_id is None:
+            return
+        while True:
+            waiting = (self._popcount[self.alive[g]] > 1) & (self.to_act[g] != self.player_id)
+            g = g[waiting]
+            if len(g) == 0:
+                return
+            if self.opponents is None:
+                actions = self.rng.integers(0, NUM_ACTIONS, len(g))
+            else:
+                seats = self.to_act.copy()
+                actions = self.opponents(self._observe(seats)[g], seats[g], g)
+            self._advance(g, actions)
+
+    def _advance(self, g, action):
+        """One CoupEnv.step() by the agent to act in each game of g."""
+        phase = self.phase[g]
+        for value, handler in (
+            (ACTION_SELECTION, self._handle_action_selection),
+            (CHALLENGE, self._handle_challenge_phase),
+            (COUNTER, self._handle_counter_phase),
+            (COUNTER_CHALLENGE, self._handle_counter_challenge_phase),
+        ):
+            sel = phase == value
+            if sel.any():
+                handler(g[sel], action[sel])
+
+    def _handle_action_selection(self, g, action):
+        p = self.actor[g]
+        coins = self.coins[g, p]
+        bucket = (coins >= 3).astype(np.int64) + (coins >= 7)
+        action = np.where(LEGAL[bucket, action], action, INCOME)  # Force legal action
+        others = self.alive[g] & ~(1 << p)
+        target = np.where(TARGETED[action], self._first_at[others, 0], EMPTY)
+        self.pending_action[g] = action
+        self.pending_target[g] = target
+
+        sel = action == COUP
+        self.coins[g[sel], p[sel]] -= 7
+        self._lose_influence(g[sel], target[sel])
+
+        sel = action == INCOME
+        self.coins[g[sel], p[sel]] += 1
+
+        sel = (action == COUP) | (action == INCOME) | (action == PASS)
+        self._end_turn(g[sel])
+
+        sel = CLAIM_CARD[action] != EMPTY
+        self.phase[g[sel]] = CHALLENGE
+        self._ask_next(g[sel], others[sel], 0, self._after_claim_stands)
+
+        self._start_counter_phase(g[action == FOREIGN_AID])
+
+    def _handle_challenge_phase(self, g, action):
+        responder = self.to_act[g]
+        claimant = self.actor[g]
+
+        sel = action == PASS
+        others = self.alive[g[sel]] & ~(1 << claimant[sel])
+        self._ask_next(g[sel], others, responder[sel] + 1, self._after_claim_stands)
+
+        sel = ~sel
+        caught = self._challenge(g[sel], claimant[sel], responder[sel], CLAIM_CARD[self.pending_action[g[sel]]])
+        self._after_claim_stands(g[sel][~caught])
+        self._end_turn(g[sel][caught])
+
+    def _handle_counter_phase(self, g, action):
+        responder = self.to_act[g]
+        block = (action < NUM_CARDS) & BLOCKS[self.pending_action[g], np.minimum(action, NUM_CARDS - 1)]
+
+        # Anything that is not a legal counter card is a pass
+        sel = ~block
+        others = self.alive[g[sel]] & ~(1 << self.actor[g[sel]])
+        self._ask_next(g[sel], others, responder[sel] + 1, self._apply_and_end_turn)
+
+        gb, rb = g[block], responder[block]
+        self.counteraction_player[gb] = rb
+        self.counteraction_card[gb] = action[block]
+        self.phase[gb] = COUNTER_CHALLENGE
+        self._ask_next(gb, self.alive[gb] & ~(1 << rb), 0, self._end_turn)
+
+    def _handle_counter_challenge_phase(self, g, action):
+        responder = self.to_act[g]
+        claimant = self.counteraction_player[g]
+
+        # Nobody challenging means the block stands
+        sel = action == PASS
+        others = self.alive[g[sel]] & ~(1 << claimant[sel])
+        self._ask_next(g[sel], others, responder[sel] + 1, self._end_turn)
+
+        sel = ~sel
+        caught = self._challenge(g[sel], claimant[sel], responder[sel], self.counteraction_card[g[sel]])
+        self._apply_action(g[sel][caught])
+        self._end_turn(g[sel])
+
+    def _ask_next(self, g, responders, start, when_none):
+        """Hand the decision to the first responder seat >= start, else call when_none."""
+        nxt = self._first_at[responders, start]
+        none = nxt == EMPTY
+        self.to_act[g[~none]] = nxt[~none]
+        if none.any():
+            when_none(g[none])
+
+    def _after_claim_stands(self, g):
+        # Claim was not challenged or survived a challenge
+        if len(g) == 0:
+            return
+        pending = self.pending_action[g]
+        counterable = (pending == ASSASSINATE) | (pending == STEAL)
+        self._start_counter_phase(g[counterable])
+        self._apply_and_end_turn(g[~counterable])
+
+    def _start_counter_phase(self, g):
+        if len(g) == 0:
+            return
+        self.phase[g] = COUNTER
+        others = self.alive[g] & ~(1 << self.actor[g])
+        self._ask_next(g, others, 0, self._apply_and_end_turn)
+
+    def _apply_and_end_turn(self, g):
+        self._apply_action(g)
+        self._end_turn(g)
+
+    def _end_turn(self, g):
+        self.phase[g] = ACTION_SELECTION
+        nxt = self._next_turn[self.alive[g], self.actor[g]]
+        self.actor[g] = nxt
+        self.to_act[g] = nxt
+
+    def _apply_action(self, g):
+        if len(g) == 0:
+            return
+        pending = self.pending_action[g]
+        p = self.actor[g]
+        target = self.pending_target[g]
+
+        sel = pending == TAX
+        self.coins[g[sel], p[sel]] += 3
+
+        sel = pending == FOREIGN_AID
+        self.coins[g[sel], p[sel]] += 2
+
+        sel = (pending == ASSASSINATE) & (target != EMPTY)
+        sel[sel] = self.coins[g[sel], p[sel]] >= 3
+        self.coins[g[sel], p[sel]] -= 3
+        self._lose_influence(g[sel], target[sel])
+
+        sel = (pending == STEAL) & (target != EMPTY)
+        gs, ps, ts = g[sel], p[sel], target[sel]
+        stolen = np.minimum(2, self.coins[gs, ts])
+        self.coins[gs, ts] -= stolen
+        self.coins[gs, ps] += stolen
+
+        sel = pending == EXCHANGE
+        self._exchange(g[sel], p[sel])
+
+    def _exchange(self, g, p):
+        # Draw as many cards as in hand, then shuffle the old hand back in
+        if len(g) == 0:
+            return
+        old = self.hands[g, p]
+        for slot in range(2):
+            has = np.nonzero(old[:, slot] != EMPTY)[0]
+            self.hands[g[has], p[has], slot] = self._draw(g[has])
+        for slot in range(2):
+            has = np.nonzero(old[:, slot] != EMPTY)[0]
+            self.deck[g[has], old[has, slot]] += 1
+
+    def _challenge(self, g, claimant, challenger, card):
+        """Resolve challenges of claimant's card; returns True where claimant was bluffing."""
+        if len(g) == 0:
+            return np.zeros(0, dtype=bool)
+        hand = self.hands[g, claimant]
+        has_card = (hand[:, 0] == card) | (hand[:, 1] == card)
+        ok = np.nonzero(has_card)[0]
+        self._lose_influence(g[ok], challenger[ok])
+        # Claimant exchanges revealed card with deck
+        go, po, co = g[ok], claimant[ok], card[ok]
+        slot = (self.hands[go, po, 0] != co).astype(np.int64)
+        self.deck[go, co] += 1
+        self.hands[go, po, slot] = self._draw(go)
+        bluff = np.nonzero(~has_card)[0]
+        self._lose_influence(g[bluff], claimant[bluff])
+        return ~has_card
+
+    def _lose_influence(self, g, p):
+        """Discard a random card of player p in each game (slot 0 is filled first)."""
+        keep = p != EMPTY
+        g, p = g[keep], p[keep]
+        if len(g) == 0:
+            return
+        hand = self.hands[g, p]
+        two = hand[:, 1] != EMPTY
+        drop_first = two & (self.rng.random(len(g)) < 0.5)
+        self.hands[g, p, 0] = np.where(drop_first, hand[:, 1], np.where(two, hand[:, 0], EMPTY))
+        self.hands[g, p, 1] = EMPTY
+        self.alive[g[~two]] &= ~(1 << p[~two])
+
+    def _draw(self, g):
+        """Draw one uniformly random card from the deck of each game in g."""
+        if len(g) == 0:
+            return g
+        return draw_counts(self.deck, g, self.rng.random(len(g)))
@@ -2,6 +2,10 @@
 import random
 from collections import deque
 
+from game import actions as game_actions, cards as game_cards
+from game.records import (BLOCKED, BLOCK_CHALLENGED, BLOCK_CHALLENGE_SUCCEEDED, CHALLENGED, CHALLENGE_SUCCEEDED,
+                          PERFORMED)
+
 class Card:
     DUKE = "Duke"
     ASSASSIN = "Assassin"
@@ -10,9 +14,19 @@ class Card:
     CONTESSA = "Contessa"
     ALL_CARDS = [DUKE, ASSASSIN, CAPTAIN, AMBASSADOR, CONTESSA]
 
+# Card and action names to the game/cards.py and game/actions.py codes used in game records
+CARD_CODES = {name: code for code, name in enumerate(game_cards.Card.NAMES)}
+ACTION_CODES = {name: code for code, name in enumerate(game_actions.Action.NAMES)}
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
 class Player:
-    def __init__(self, player_id):
+    def __init__(self, player_id, log=print):
         self.id = player_id
+        self.log = log
         self.coins = 2
         self.cards = []
         self.lost_cards = []
@@ -28,7 +42,7 @@ class Player:
             self.cards.pop()
         if not self.cards:
             self.alive = False
-        print(f"Player {self.id} loses a card. Remaining hand: {self.cards}")
+        self.log(f"Player {self.id} loses a card. Remaining hand: {self.cards}")
 
 
 class Action:
@@ -48,9 +62,10 @@ class Action:
     BLOCK_ACTIONS = [BLOCK_FOREIGN_AID, BLOCK_STEAL, BLOCK_ASSASSINATE]
 
 class GameState:
-    def __init__(self, num_players):
+    def __init__(self, num_players, log=print):
         self.num_players = num_players
-        self.players = [Player(i) for i in range(num_players)]
+        self.log = log
+        self.players = [Player(i, log) for i in range(num_players)]
         self.deck = self._init_deck()
         self.current_player_idx = 0
         self.action_stack = deque()
@@ -92,21 +107,21 @@ class GameState:
     def challenge(self, challenger_id, target_id, target_claim):
         target = self.players[target_id]
         challenger = self.players[challenger_id]
-        print(f"Player {challenger_id} challenges Player {target_id}'s claim of {target_claim}.")
+        self.log(f"Player {challenger_id} challenges Player {target_id}'s claim of {target_claim}.")
         if target_claim in target.cards:
-            print(f"Challenge failed! Player {target_id} had {target_claim}.")
+            self.log(f"Challenge failed! Player {target_id} had {target_claim}.")
             challenger.lose_influence()
             try: # This except should be removed since it should be impossible (can only happen if self-challenge?)
                 target.cards.remove(target_claim)
             except ValueError:
-                print(f"WARNING: {target_claim} not in Player {target_id}'s hand during challenge resolution.")
+                self.log(f"WARNING: {target_claim} not in Player {target_id}'s hand during challenge resolution.")
                 return False
             self.deck.append(target_claim)
             random.shuffle(self.deck)
             target.cards.append(self.deck.pop())
             return False
         else:
-            print(f"Challenge successful! Player {target_id} did not have {target_claim}.")
+            self.log(f"Challenge successful! Player {target_id} did not have {target_claim}.")
             target.lose_influence()
             return True
 
@@ -131,7 +146,7 @@ class GameState:
             return False
 
         if action in Action.PRIMARY_ACTIONS:
-            print(f"Player {player_id} performs {action}" + 
+            self.log(f"Player {player_id} performs {action}" + 
                 (f" on Player {target_id}" if target_id is not None else "") + 
                 f" | Coins: {player.coins}")
 
@@ -161,7 +176,7 @@ class GameState:
         elif action == Action.EXCHANGE:
             num_to_draw = 2 if len(player.cards) == 2 else 1
             drawn = [self.deck.pop() for _ in range(num_to_draw)]
-            print(f"Player {player_id} draws {drawn} using Ambassador.")
+            self.log(f"Player {player_id} draws {drawn} using Ambassador.")
 
             combined = player.cards + drawn
             random.shuffle(combined)
@@ -172,10 +187,10 @@ class GameState:
             random.shuffle(self.deck)
 
             # Output the player's hand after the exchange
-            print(f"Player {player_id}'s new hand after exchange: {player.cards}")
+            self.log(f"Player {player_id}'s new hand after exchange: {player.cards}")
 
 
-        print("----")
+        self.log("----")
 
         return True
 
@@ -223,21 +238,27 @@ class GameState:
 #         target.lose_influence()
 #         return False
 
-def block_foreign_aid(blocker_id, target_id):
-    print(f"Player {blocker_id} blocks foreign aid from {target_id} using Duke.")
+def block_foreign_aid(blocker_id, target_id, log=print):
+    log(f"Player {blocker_id} blocks foreign aid from {target_id} using Duke.")
     return
 
 
-def counteract(counter_card_claim, player_id):
-    print(f"Player {player_id} counteracts with: {counter_card_claim}")
+def counteract(counter_card_claim, player_id, log=print):
+    log(f"Player {player_id} counteracts with: {counter_card_claim}")
     return
 
 
-def simulate_random_game(num_players=3):
-    game = GameState(num_players)
-    print("Starting a new game of Coup")
+def simulate_random_game(num_players=3, recorder=None, seed=0):
+    # With a recorder (a game.records.GameRecordWriter) the game is recorded
+    # instead of printed: the deal and one event per turn. seed is stored with
+    # the game and should be what random was seeded with for it
+    log = print if recorder is None else quiet
+    game = GameState(num_players, log)
+    log("Starting a new game of Coup")
     for p in game.players:
-        print(f"Player {p.id} starts with: {p.cards}")
+        log(f"Player {p.id} starts with: {p.cards}")
+    if recorder is not None:
+        recorder.start_game(seed, [[CARD_CODES[card] for card in p.cards] for p in game.players])
 
     while not game.is_game_over():
         player = game.get_current_player()
@@ -245,7 +266,7 @@ def simulate_random_game(num_players=3):
         legal_actions = game.get_legal_actions(player_id)
         action = random.choice(legal_actions)
 
-        print(legal_actions)
+        log(legal_actions)
 
         target_id = None
         if action in [Action.ASSASSINATE, Action.STEAL, Action.COUP]:
@@ -279,6 +300,8 @@ def simulate_random_game(num_players=3):
         # There is a 30% chance for any action to be challenged, and a random player is picked among all alive.
         challenged_by = None
         challenged_status = 0
+        action_challenger = blocker = block_claim = block_challenger = None
+        outcome = 0
         if action != (Action.INCOME or Action.COUP):
             if random.random() < 0.3:
                 challengers = [p.id for p in game.players if p.id != player_id and p.is_alive()]
@@ -287,56 +310,75 @@ def simulate_random_game(num_players=3):
 
         # Foreign aid has a unique interaction since it doesn't require a claim card.
         if challenged_by is not None:
-            print(f'Player {player_id} attempts to perform {action}.')
+            log(f'Player {player_id} attempts to perform {action}.')
             
             if action == Action.FOREIGN_AID:
+                # The "challenger" of foreign aid blocks it with a Duke
+                blocker, block_claim = challenged_by, Card.DUKE
+                outcome |= BLOCKED
                 # 30% chance someone calls out the Duke, otherwise foreign aid is just blocked.
                 if random.random() < 0.3:
                     duke_challengers = [p.id for p in game.players if p.id != challenged_by and p.is_alive()]
                     duke_challenged_by = random.choice(duke_challengers)
+                    block_challenger = duke_challenged_by
+                    outcome |= BLOCK_CHALLENGED
 
                     # 30% chance that the Duke claim is challenged, otherwise the block just goes through
                     foreign_aid_challenge_status = game.challenge(duke_challenged_by, challenged_by, Card.DUKE)
                     if not foreign_aid_challenge_status:
-                        block_foreign_aid(challenged_by, player_id)
+                        block_foreign_aid(challenged_by, player_id, log)
                         challenged_status = 1
+                    else:
+                        outcome |= BLOCK_CHALLENGE_SUCCEEDED
                 else:
-                    print(f'Player {challenged_by} blocked foreign aid to {player_id}.')
-                    block_foreign_aid(challenged_by, player_id)
+                    log(f'Player {challenged_by} blocked foreign aid to {player_id}.')
+                    block_foreign_aid(challenged_by, player_id, log)
                     challenged_status = 1
                     
             else:
+                action_challenger = challenged_by
                 challenged_status = game.challenge(challenged_by, player_id, claim_card)
+                outcome |= CHALLENGED | (CHALLENGE_SUCCEEDED if challenged_status else 0)
 
         # If there is no challenge, then the action goes through the first stage, and now the target must respond.
         # Assassinate and steal are the only actions that can be responded to.
         counteracted_challenge_status = 0
+        # A failed challenge can leave the target as the last player, with nobody to block or challenge
+        blockable = target_id is not None and not game.is_game_over()
 
-        if action == Action.ASSASSINATE and target_id is not None and random.random() < 0.5:
+        if action == Action.ASSASSINATE and blockable and random.random() < 0.5:
             # 50% chance the target claims Contessa.
-            counteract(Card.CONTESSA, target_id)
+            counteract(Card.CONTESSA, target_id, log)
+            blocker, block_claim = target_id, Card.CONTESSA
+            outcome |= BLOCKED
             if random.random() < 0.5: # 50% chance someone calls out the Contessa counteract ability.
                 challengers = [p.id for p in game.players if p.id != target_id and p.is_alive()]
                 challenged_by = random.choice(challengers)
+                block_challenger = challenged_by
                 counteracted_challenge_status = game.challenge(challenged_by, target_id, Card.CONTESSA)
+                outcome |= BLOCK_CHALLENGED | (BLOCK_CHALLENGE_SUCCEEDED if counteracted_challenge_status else 0)
             else:
-                counteract(Card.CONTESSA, target_id)
+                counteract(Card.CONTESSA, target_id, log)
                 counteracted_challenge_status = 1
 
-        elif action == Action.STEAL and target_id is not None and random.random() < 0.5:
+        elif action == Action.STEAL and blockable and random.random() < 0.5:
             if Card.CAPTAIN in player.cards:
                 counteract_card = Card.CAPTAIN
             elif Card.AMBASSADOR in player.cards:
                 counteract_card = Card.AMBASSADOR
             else:
                 counteract_card = random.choice([Card.CAPTAIN, Card.AMBASSADOR])
+            blocker, block_claim = target_id, counteract_card
+            outcome |= BLOCKED
 
             if random.random() < 0.5: # 50% chance someone calls out the Captain/Ambassador block.
                 challengers = [p.id for p in game.players if p.id != target_id and p.is_alive()]
                 challenged_by = random.choice(challengers)
+                block_challenger = challenged_by
                 counteracted_challenge_status = game.challenge(challenged_by, target_id, counteract_card)
+                outcome |= BLOCK_CHALLENGED | (BLOCK_CHALLENGE_SUCCEEDED if counteracted_challenge_status else 0)
             else:
-                counteract(counteract_card, target_id)
+                counteract(counteract_card, target_id, log)
                 counteracted_challenge_status = 1
 
             
@@ -345,8 +387,14 @@ def simulate_random_game(num_players=3):
         # For an action to have its effect, the initial challenge, if any, must have failed.
         # Also the counteract challenge, if any, must have also  failed.
         if not challenged_status and not counteracted_challenge_status:
-            game.perform_action(player_id, action, target_id)
-
+            if game.perform_action(player_id, action, target_id):
+                outcome |= PERFORMED
+
+        if recorder is not None:
+            recorder.event(player_id, ACTION_CODES[action], -1 if target_id is None else target_id,
+                           -1 if block_claim is None else CARD_CODES[block_claim], -1 if blocker is None else blocker,
+                           -1 if action_challenger is None else action_challenger,
+                           -1 if block_challenger is None else block_challenger, outcome)
         game.history.append((player_id, action, target_id))
         game.next_player()
             
@@ -381,7 +429,33 @@ def simulate_random_game(num_players=3):
 
         # game.perform_action(player_id, action, target_id, claim_card, block_by, challenged_by)
 
-    print(f"Game over! Winner: Player {game.get_winner()}")
-
-for i in range(1):
-    simulate_random_game()
\ No newline at end of file
+    log(f"Game over! Winner: Player {game.get_winner()}")
+    if recorder is not None:
+        recorder.end_game(game.get_winner())
+    return game.get_winner()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from game.records import GameRecordWriter
+
+    parser = argparse.ArgumentParser(description="Simulate random games of the prototype rules")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", metavar="DIR", help="write game records to DIR instead of printing every turn")
+    args = parser.parse_args()
+
+    seeds = random.Random(args.seed)
+    if args.record is None:
+        for i in range(args.games):
+            random.seed(seeds.getrandbits(64))
+            simulate_random_game(args.players)
+    else:
+        with GameRecordWriter(args.record) as writer:
+            for i in range(args.games):
+                seed = seeds.getrandbits(64)
+                random.seed(seed)
+                simulate_random_game(args.players, writer, seed)
+        print(f"recorded {args.games} games in {args.record}")
\ No newline at end of file